@@ -0,0 +1,264 @@
+"""
+SportSync AI - Tracking Event Pipeline
+Write-behind buffer between /api/track and the configured sinks
+
+FLOW:
+    track_response -> submit() -> bounded ring buffer -> flusher thread -> sinks
+
+- submit() never blocks and never does I/O: it appends to a deque under a
+  short lock. When the buffer is full the oldest event is dropped and
+  counted, so overload costs data, never latency.
+- The flusher writes a batch when flush_size events are waiting or the
+  oldest buffered event is flush_interval seconds old.
+- shutdown() drains everything still buffered before returning.
+
+SINKS ("sinks" in data/app_config.json - $APPCONFIG_PATH - read through
+apps.app_config.get_config(); defaults come from its _apply_defaults):
+    disk     {"enabled": true, "path": "./data/events.jsonl"}
+    sqlite   {"enabled": true, "path": "./data/sportsync.db"}  analytics_events table
+    webhook  {"enabled": true, "url": "https://...", "timeout": 5}
+    stats    always on: live aggregates (api/track_stats.py)
+"""
+
+import atexit
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional
+
+DEFAULT_SINKS = {
+    "disk": {"enabled": True, "path": "./data/events.jsonl"},
+    "sqlite": {"enabled": False, "path": "./data/sportsync.db"},
+    "webhook": {"enabled": False, "url": ""}
+}
+
+DEFAULT_CAPACITY = 10000
+DEFAULT_FLUSH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+
+# ═══════════════════════════════════════════════════════════════
+# SINKS
+# ═══════════════════════════════════════════════════════════════
+
+class DiskSink:
+    """Appends events as JSON lines (one write per batch)"""
+
+    name = "disk"
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, events: List[Dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n" for e in events)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteSink:
+    """Inserts events into the schema.sql analytics_events table"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        from api.sql_storage import INSERT_EVENT, SQLiteAdapter
+        self.adapter = SQLiteAdapter(path)
+        self.adapter.init_schema()
+        self.sql = self.adapter.render(INSERT_EVENT)
+
+    def write(self, events: List[Dict[str, Any]]) -> None:
+        conn = self.adapter.connect()
+        conn.executemany(self.sql, [
+            (str(uuid.uuid4()), None, e.get("event", "quiz_tracked"),
+             json.dumps(e, ensure_ascii=False), str(e.get("timestamp", "")).replace("T", " "))
+            for e in events
+        ])
+        conn.commit()
+
+    def close(self) -> None:
+        self.adapter.close()
+
+
+class WebhookSink:
+    """POSTs {"events": [...]} per batch"""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        import httpx
+        self.url = url
+        self.client = httpx.Client(timeout=timeout)
+
+    def write(self, events: List[Dict[str, Any]]) -> None:
+        self.client.post(self.url, json={"events": events}).raise_for_status()
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def build_sinks(config: Optional[Mapping[str, Any]] = None) -> List[Any]:
+    """Instantiate every enabled sink from the "sinks" config section"""
+    sinks = []
+    for name, cfg in (config or DEFAULT_SINKS).items():
+        if not isinstance(cfg, Mapping) or not cfg.get("enabled"):
+            continue
+        try:
+            if name == "disk":
+                sinks.append(DiskSink(cfg.get("path", "./data/events.jsonl")))
+            elif name == "sqlite":
+                sinks.append(SQLiteSink(cfg.get("path", "./data/sportsync.db")))
+            elif name == "webhook" and cfg.get("url"):
+                sinks.append(WebhookSink(cfg["url"], float(cfg.get("timeout", 5))))
+            else:
+                print(f"⚠️ Event sink '{name}' not supported by the tracking pipeline")
+        except Exception as e:
+            print(f"❌ Event sink '{name}' failed to start: {e}")
+    return sinks
+
+
+# ═══════════════════════════════════════════════════════════════
+# PIPELINE
+# ═══════════════════════════════════════════════════════════════
+
+class EventPipeline:
+    """Bounded, non-blocking event buffer with a background batch flusher"""
+
+    def __init__(
+        self,
+        sinks: List[Any],
+        capacity: int = DEFAULT_CAPACITY,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    ):
+        self.sinks = sinks
+        self.capacity = capacity
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+
+        self._buffer: deque = deque()  # (monotonic enqueue time, event)
+        self._cond = threading.Condition(threading.Lock())
+        self._stopping = False
+        self.counters = {"submitted": 0, "dropped": 0, "flushed": 0, "batches": 0, "sink_errors": 0}
+
+        self._flusher = threading.Thread(target=self._run, name="event-flusher", daemon=True)
+        self._flusher.start()
+
+    def submit(self, event: Dict[str, Any]) -> bool:
+        """Buffer one event; returns False if an older event had to be dropped"""
+        with self._cond:
+            if self._stopping:
+                self.counters["dropped"] += 1
+                return False
+            dropped = len(self._buffer) >= self.capacity
+            if dropped:
+                self._buffer.popleft()
+                self.counters["dropped"] += 1
+            self._buffer.append((time.monotonic(), event))
+            self.counters["submitted"] += 1
+            if len(self._buffer) >= self.flush_size:
+                self._cond.notify()
+        return not dropped
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        """Wait for a size/age trigger (or shutdown), then pop up to flush_size events"""
+        with self._cond:
+            while not self._stopping:
+                if len(self._buffer) >= self.flush_size:
+                    break
+                if self._buffer:
+                    remaining = self._buffer[0][0] + self.flush_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                else:
+                    self._cond.wait(self.flush_interval)
+            return [self._buffer.popleft()[1] for _ in range(min(self.flush_size, len(self._buffer)))]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+            elif self._stopping:
+                return
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        for sink in self.sinks:
+            try:
+                sink.write(batch)
+            except Exception as e:
+                self.counters["sink_errors"] += 1
+                print(f"❌ Event sink '{sink.name}' failed ({len(batch)} events): {e}")
+        self.counters["flushed"] += len(batch)
+        self.counters["batches"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                **self.counters,
+                "buffered": len(self._buffer),
+                "capacity": self.capacity,
+                "sinks": [sink.name for sink in self.sinks]
+            }
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Stop accepting events, drain the buffer and close the sinks"""
+        with self._cond:
+            if self._stopping:
+                return
+            self._stopping = True
+            self._cond.notify()
+        self._flusher.join(timeout)
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception:
+                pass
+
+
+_pipeline: Optional[EventPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def _sinks_config() -> Mapping[str, Any]:
+    try:
+        from apps.app_config import get_config
+        return get_config().get("sinks") or DEFAULT_SINKS
+    except Exception as e:
+        print(f"⚠️ app_config unavailable, using default event sinks: {e}")
+        return DEFAULT_SINKS
+
+
+def get_event_pipeline() -> EventPipeline:
+    """
+    Process-wide pipeline built from app_config "sinks" (drained at exit)
+    Always feeds the in-memory StreamingStats behind /api/track/stats
+    """
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                from api.track_stats import get_track_stats
+                config = _sinks_config()
+                disk = config.get("disk") or {}
+                # Restores a snapshot and replays the events.jsonl tail in the background
+                stats = get_track_stats(disk.get("path") if disk.get("enabled") else None)
+                # stats goes last: its snapshot offset assumes the disk sink already wrote the batch
+                _pipeline = EventPipeline(build_sinks(config) + [stats])
+                atexit.register(_pipeline.shutdown)
+    return _pipeline
+
+
+def shutdown_event_pipeline() -> None:
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None:
+            _pipeline.shutdown()
+            _pipeline = None
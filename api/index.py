@@ -8,7 +8,8 @@ ARCHITECTURE:
 3. MCP Integration: Real-time communication protocol
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Dict, Any, Optional
 import json
@@ -19,8 +20,12 @@ import httpx
 import random
 import re
 import hashlib
+import hmac
 from datetime import datetime
 from expanded_fallback_sports import EXPANDED_FALLBACK_SPORTS
+from api.event_pipeline import get_event_pipeline, shutdown_event_pipeline
+from api.track_stats import get_track_stats
+from question_bank import QuestionBank, first_existing, load_question_bank
 
 # Create FastAPI app
 app = FastAPI(
@@ -43,10 +48,11 @@ app.add_middleware(
 # ═══════════════════════════════════════════════════════════════
 
 QUESTIONS_DATA = None
+QUESTION_BANK = None
 
 def load_questions():
-    """Load all 10 questions from arabic_questions_v2.json"""
-    global QUESTIONS_DATA
+    """Load all 10 questions from arabic_questions_v2.json (shared cached QuestionBank)"""
+    global QUESTIONS_DATA, QUESTION_BANK
 
     # Try multiple paths
     possible_paths = [
@@ -55,11 +61,11 @@ def load_questions():
         Path("/var/task/data/questions/arabic_questions_v2.json"),  # Vercel path
     ]
 
-    for path in possible_paths:
-        if path.exists():
-            with open(path, 'r', encoding='utf-8') as f:
-                QUESTIONS_DATA = json.load(f)
-            return QUESTIONS_DATA
+    path = first_existing(possible_paths)
+    if path:
+        QUESTION_BANK = load_question_bank(path)
+        QUESTIONS_DATA = QUESTION_BANK.questions
+        return QUESTIONS_DATA
 
     # Fallback: Embed minimal questions
     QUESTIONS_DATA = [
@@ -91,6 +97,7 @@ def load_questions():
             ]
         }
     ]
+    QUESTION_BANK = QuestionBank(QUESTIONS_DATA)
     return QUESTIONS_DATA
 
 # Load questions on startup
@@ -119,18 +126,8 @@ def calculate_personality_scores(answers: List[Dict]) -> Dict[str, float]:
         q_key = answer.get("question_key", "")
         answer_text = answer.get("answer_text", "")
 
-        # Find the question
-        question = next((q for q in QUESTIONS_DATA if q["key"] == q_key), None)
-        if not question:
-            continue
-
-        # Find the selected option
-        selected_option = None
-        for option in question.get("options", []):
-            if answer_text in option.get("text_ar", "") or answer_text in option.get("text_en", ""):
-                selected_option = option
-                break
-
+        # Find the selected option (compiled per-question lookup)
+        selected_option = QUESTION_BANK.match_option(q_key, answer_text)
         if not selected_option:
             continue
 
@@ -785,8 +782,8 @@ async def track_response(request: dict):
     try:
         anonymous_data = anonymize_tracking_data(request)
 
-        # Log to Vercel logs for analysis
-        print(f"[TRACK] {json.dumps(anonymous_data)}")
+        # Write-behind: buffered in memory, flushed to the configured sinks
+        get_event_pipeline().submit(anonymous_data)
 
         return {
             "success": True,
@@ -800,16 +797,67 @@ async def track_response(request: dict):
             "error": "Tracking failed"
         }
 
+@app.on_event("shutdown")
+def drain_tracking_events():
+    """Flush buffered tracking events before the worker exits"""
+    shutdown_event_pipeline()
+
 @app.get("/api/track/stats")
 def get_tracking_stats():
     """
-    Placeholder for analytics dashboard
-    In production: Connect to database and return stats
+    Live analytics over tracked events
+    Bounded-memory sketches updated by the event flusher; O(1) per request
     """
+    pipeline = get_event_pipeline()
     return {
         "success": True,
-        "message": "Analytics endpoint - ready for database integration",
-        "note": "Connect to Vercel KV, MongoDB, or your preferred database"
+        **get_track_stats().snapshot(),
+        "pipeline": pipeline.stats()
     }
 
+# ═══════════════════════════════════════════════════════════════
+# RESEARCH DATA EXPORT
+# ═══════════════════════════════════════════════════════════════
+
+def require_admin_token(token: Optional[str]):
+    """
+    Admin-only endpoints: X-Admin-Token must equal $SPORTSYNC_ADMIN_TOKEN
+    Disabled (403) when the secret is not configured
+    """
+    secret = os.environ.get("SPORTSYNC_ADMIN_TOKEN", "")
+    if not secret:
+        raise HTTPException(status_code=403, detail="Export is disabled")
+    if not token or not hmac.compare_digest(token.encode("utf-8"), secret.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/api/export")
+def export_research_data(format: str = "csv", gzip: bool = False,
+                         since: Optional[str] = None, until: Optional[str] = None,
+                         x_admin_token: Optional[str] = Header(None)):
+    """
+    Stream saved research responses (constant memory) - admin only
+    format=csv (gzip=true for .csv.gz) or format=parquet (z-scores as float columns)
+    """
+    require_admin_token(x_admin_token)
+    from api import storage
+
+    stamp = datetime.utcnow().strftime("%Y%m%d")
+    if format == "parquet":
+        if storage.pa is None:
+            raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+        return StreamingResponse(
+            storage.iter_parquet(since, until),
+            media_type="application/vnd.apache.parquet",
+            headers={"Content-Disposition": f'attachment; filename="sportsync_responses_{stamp}.parquet"'}
+        )
+    if format != "csv":
+        raise HTTPException(status_code=400, detail="format must be csv or parquet")
+
+    filename = f"sportsync_responses_{stamp}.csv" + (".gz" if gzip else "")
+    return StreamingResponse(
+        storage.iter_csv(since, until, compress=gzip),
+        media_type="application/gzip" if gzip else "text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # Required for Vercel
@@ -0,0 +1,266 @@
+"""
+SportSync AI - Segmented Log Storage
+Append-only JSONL segments for research responses
+
+LAYOUT (data/responses_log/):
+    segment_000001_<created>.jsonl        sealed (immutable)
+    segment_000001_<created>.idx.json     sparse index of a sealed segment
+    segment_000001_<created>.jsonl.gz     sealed + compressed (optional)
+    segment_000002_<created>.jsonl        active segment (appends go here)
+    .append.lock                          writers hold this while appending
+
+- Appends are one write() of one compact JSON line under an flock, so
+  several workers can share the log without interleaving or collisions.
+- The active segment is sealed when it reaches max_segment_bytes or
+  max_segment_secs. Sealing writes its index; compression is optional.
+- The sparse index keeps min/max timestamp, the session IDs in the
+  segment and every Nth (running max timestamp, byte offset), so time-range
+  and session lookups skip whole segments and seek into the rest.
+  Timestamps are stamped by callers and can land slightly out of order,
+  hence the running max: a seek never skips a record at or after `since`.
+"""
+
+import bisect
+import gzip
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process locking only
+    fcntl = None
+
+try:
+    import zstandard
+except ImportError:  # Optional: gzip is always available
+    zstandard = None
+
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+DEFAULT_SEGMENT_SECS = 24 * 3600
+SPARSE_EVERY = 64
+INDEX_VERSION = 2  # 1: sparse entries held the raw timestamp (not safe to seek by)
+
+_SEGMENT_RE = re.compile(r"^segment_(\d{6})_(\d+)\.jsonl(\.gz|\.zst)?$")
+
+
+class SegmentedLogStore:
+    """Append-only, size/time rotated JSONL log with sparse per-segment indexes"""
+
+    def __init__(
+        self,
+        root: str,
+        max_segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        max_segment_secs: float = DEFAULT_SEGMENT_SECS,
+        compression: Optional[str] = None,
+        timestamp_field: str = "saved_at",
+        session_field: str = "session_id"
+    ):
+        """compression: None, "gzip" or "zstd" (falls back to gzip without zstandard)"""
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_secs = max_segment_secs
+        if compression == "zstd" and zstandard is None:
+            compression = "gzip"
+        self.compression = compression
+        self.timestamp_field = timestamp_field
+        self.session_field = session_field
+        self.lock_path = self.root / ".append.lock"
+
+    # ---------- segments ----------
+
+    def _segments(self) -> List[Tuple[int, int, Path]]:
+        """(seq, created, path) for every segment, oldest first; prefers uncompressed copies"""
+        found = {}
+        for path in self.root.iterdir():
+            m = _SEGMENT_RE.match(path.name)
+            if not m:
+                continue
+            seq, created = int(m.group(1)), int(m.group(2))
+            if seq not in found or not m.group(3):
+                found[seq] = (seq, created, path)
+        return [found[seq] for seq in sorted(found)]
+
+    @staticmethod
+    def _base(path: Path) -> str:
+        name = path.name
+        return name[:name.index(".jsonl")]
+
+    def _index_path(self, path: Path) -> Path:
+        return self.root / f"{self._base(path)}.idx.json"
+
+    def _is_sealed(self, path: Path) -> bool:
+        return self._index_path(path).exists()
+
+    def _new_segment(self, seq: int) -> Path:
+        path = self.root / f"segment_{seq:06d}_{int(time.time())}.jsonl"
+        path.touch()
+        return path
+
+    @contextmanager
+    def _append_lock(self):
+        with open(self.lock_path, "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ---------- writes ----------
+
+    def append(self, record: Dict[str, Any]) -> str:
+        """Append one record; returns "<segment>#<offset>" as its locator"""
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        sealed = None
+        with self._append_lock():
+            segments = self._segments()
+            if segments and not self._is_sealed(segments[-1][2]):
+                seq, created, active = segments[-1]
+                size = active.stat().st_size
+                if size and (size + len(line) > self.max_segment_bytes
+                             or time.time() - created > self.max_segment_secs):
+                    self._write_index(active)
+                    sealed = active
+                    active = self._new_segment(seq + 1)
+            else:
+                active = self._new_segment(segments[-1][0] + 1 if segments else 1)
+
+            fd = os.open(active, os.O_WRONLY | os.O_APPEND)
+            try:
+                offset = os.fstat(fd).st_size
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+
+        if sealed is not None and self.compression:
+            self.compress_segment(sealed)
+        return f"{active.name}#{offset}"
+
+    def _write_index(self, path: Path) -> Dict[str, Any]:
+        index = {"version": INDEX_VERSION, "count": 0, "min_ts": None, "max_ts": None,
+                 "sessions": [], "sparse": []}
+        sessions = set()
+        for offset, record in self._scan(path):
+            ts = str(record.get(self.timestamp_field, ""))
+            index["min_ts"] = ts if index["min_ts"] is None else min(index["min_ts"], ts)
+            index["max_ts"] = ts if index["max_ts"] is None else max(index["max_ts"], ts)
+            if index["count"] % SPARSE_EVERY == 0:
+                # max_ts so far: every record before this offset is <= it
+                index["sparse"].append([index["max_ts"], offset])
+            index["count"] += 1
+            if record.get(self.session_field):
+                sessions.add(str(record[self.session_field]))
+        index["sessions"] = sorted(sessions)
+
+        tmp = self._index_path(path).with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp, self._index_path(path))
+        return index
+
+    def compress_segment(self, path: Path) -> Path:
+        """Compress a sealed segment (readers keep using the .jsonl until it is swapped)"""
+        if not self._is_sealed(path) or path.suffix != ".jsonl":
+            return path
+        suffix = ".zst" if self.compression == "zstd" else ".gz"
+        target = path.with_name(path.name + suffix)
+        tmp = target.with_name(target.name + ".tmp")
+        with open(path, "rb") as src, open(tmp, "wb") as raw:
+            if suffix == ".zst":
+                with zstandard.ZstdCompressor().stream_writer(raw) as dst:
+                    dst.write(src.read())
+            else:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as dst:
+                    dst.write(src.read())
+        os.replace(tmp, target)
+        path.unlink()
+        return target
+
+    def seal_active(self) -> None:
+        """Seal the active segment now (e.g. before a backup)"""
+        with self._append_lock():
+            segments = self._segments()
+            if segments and not self._is_sealed(segments[-1][2]):
+                self._write_index(segments[-1][2])
+                self._new_segment(segments[-1][0] + 1)
+
+    # ---------- reads ----------
+
+    def _open(self, path: Path):
+        if path.name.endswith(".gz"):
+            return gzip.open(path, "rb")
+        if path.name.endswith(".zst"):
+            return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+        return open(path, "rb")
+
+    def _scan(self, path: Path, start_offset: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """(byte offset, record) for every complete line from start_offset"""
+        try:
+            f = self._open(path)
+        except FileNotFoundError:
+            # Compressed while we were listing; read the compressed copy
+            path = next((p for p in self.root.glob(path.name + ".*")
+                         if p.suffix in (".gz", ".zst")), None)
+            if path is None:
+                return
+            f = self._open(path)
+        with f:
+            if start_offset:
+                f.seek(start_offset)  # compressed readers seek by decompressing forward
+            offset = start_offset
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partial line being written right now
+                try:
+                    yield offset, json.loads(line)
+                except ValueError:
+                    pass
+                offset += len(line)
+
+    def _read_index(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._index_path(path), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def iter_records(self, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream records in append order, optionally within [since, until] timestamps"""
+        for _, _, path in self._segments():
+            index = self._read_index(path)
+            start = 0
+            if index and index["count"]:
+                if (since and index["max_ts"] < since) or (until and index["min_ts"] > until):
+                    continue
+                if since and index.get("version") == INDEX_VERSION:
+                    # Entries before pos only follow records older than since
+                    pos = bisect.bisect_left([ts for ts, _ in index["sparse"]], since)
+                    if pos:
+                        start = index["sparse"][pos - 1][1]
+            for _, record in self._scan(path, start):
+                ts = str(record.get(self.timestamp_field, ""))
+                if since and ts < since:
+                    continue
+                if until and ts > until:
+                    continue
+                yield record
+
+    def find_session(self, session_id: str) -> List[Dict[str, Any]]:
+        """All records of one session; sealed segments without it are skipped via their index"""
+        matches = []
+        for _, _, path in self._segments():
+            index = self._read_index(path)
+            if index is not None:
+                sessions = index["sessions"]
+                pos = bisect.bisect_left(sessions, session_id)
+                if pos == len(sessions) or sessions[pos] != session_id:
+                    continue
+            matches.extend(r for _, r in self._scan(path) if str(r.get(self.session_field)) == session_id)
+        return matches
@@ -0,0 +1,534 @@
+"""
+SportSync AI - SQL Storage Engine
+Writes research responses and analytics events into the schema.sql tables
+
+BACKENDS:
+1. SQLite (default, local): WAL mode, schema translated from schema.sql
+2. Postgres: runs schema.sql as-is (requires psycopg)
+
+DESIGN:
+- Writes are queued and flushed by one background thread in batches
+  (executemany per statement), so request handlers never wait on disk.
+- A failed batch is retried row by row: a bad row is dropped (logged),
+  rows hitting a transient error (locked DB, lost connection) are
+  re-queued, and spilled to a JSONL file after MAX_WRITE_ATTEMPTS.
+- Every statement is a module-level constant, so SQLite's per-connection
+  statement cache / psycopg's auto-prepare reuse the compiled plan.
+- calculate_7day_retention / calculate_activation_rate are answered by
+  covering indexes instead of table scans.
+"""
+
+import json
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import psycopg
+except ImportError:  # Optional: only needed for the Postgres adapter
+    psycopg = None
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_PATH = Path(__file__).parent.parent / "schema.sql"
+
+FLUSH_BATCH = 500
+FLUSH_INTERVAL_SECS = 0.5
+MAX_WRITE_ATTEMPTS = 5
+SPILL_PATH = "data/sql_spill.jsonl"
+
+# Errors worth retrying (locks, dropped connections); anything else is a bad row
+TRANSIENT_ERRORS: tuple = (sqlite3.OperationalError,)
+if psycopg is not None:
+    TRANSIENT_ERRORS += (psycopg.OperationalError,)
+
+# ═══════════════════════════════════════════════════════════════
+# SQLITE SCHEMA (schema.sql translated: UUID/JSONB -> TEXT, no plpgsql)
+# ═══════════════════════════════════════════════════════════════
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    created_at TEXT DEFAULT (datetime('now')),
+    updated_at TEXT DEFAULT (datetime('now')),
+    language TEXT NOT NULL CHECK (language IN ('ar', 'en')),
+    profile TEXT,
+    metadata TEXT
+);
+CREATE TABLE IF NOT EXISTS user_sessions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT REFERENCES users(id) ON DELETE CASCADE,
+    session_data TEXT NOT NULL,
+    answers TEXT,
+    z_scores TEXT,
+    systems_analysis TEXT,
+    created_at TEXT DEFAULT (datetime('now')),
+    last_active TEXT DEFAULT (datetime('now')),
+    completed INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS recommendations (
+    id TEXT PRIMARY KEY,
+    user_id TEXT REFERENCES users(id) ON DELETE CASCADE,
+    session_id TEXT REFERENCES user_sessions(id) ON DELETE CASCADE,
+    sport_name TEXT NOT NULL,
+    sport_label TEXT NOT NULL,
+    match_score REAL CHECK (match_score >= 0 AND match_score <= 1),
+    z_alignment TEXT,
+    card_data TEXT,
+    variant TEXT,
+    created_at TEXT DEFAULT (datetime('now'))
+);
+CREATE TABLE IF NOT EXISTS blacklist (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sport_label TEXT UNIQUE NOT NULL,
+    reason TEXT,
+    added_at TEXT DEFAULT (datetime('now'))
+);
+CREATE TABLE IF NOT EXISTS analytics_events (
+    id TEXT PRIMARY KEY,
+    user_id TEXT REFERENCES users(id) ON DELETE CASCADE,
+    event_name TEXT NOT NULL,
+    event_properties TEXT,
+    created_at TEXT DEFAULT (datetime('now'))
+);
+CREATE TABLE IF NOT EXISTS ab_experiments (
+    id TEXT PRIMARY KEY,
+    experiment_name TEXT UNIQUE NOT NULL,
+    variant_a TEXT NOT NULL,
+    variant_b TEXT NOT NULL,
+    start_date TEXT DEFAULT (datetime('now')),
+    end_date TEXT,
+    is_active INTEGER DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS user_ab_assignments (
+    id TEXT PRIMARY KEY,
+    user_id TEXT REFERENCES users(id) ON DELETE CASCADE,
+    experiment_id TEXT REFERENCES ab_experiments(id) ON DELETE CASCADE,
+    variant TEXT CHECK (variant IN ('A', 'B')),
+    assigned_at TEXT DEFAULT (datetime('now')),
+    converted INTEGER DEFAULT 0,
+    converted_at TEXT,
+    UNIQUE(user_id, experiment_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_users_created_at ON users(created_at);
+CREATE INDEX IF NOT EXISTS idx_users_language ON users(language);
+CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON user_sessions(user_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_created_at ON user_sessions(created_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_completed_created_user ON user_sessions(completed, created_at, user_id);
+CREATE INDEX IF NOT EXISTS idx_recommendations_user_id ON recommendations(user_id);
+CREATE INDEX IF NOT EXISTS idx_recommendations_session_id ON recommendations(session_id);
+CREATE INDEX IF NOT EXISTS idx_recommendations_sport_label ON recommendations(sport_label);
+CREATE INDEX IF NOT EXISTS idx_recommendations_created_user ON recommendations(created_at, user_id);
+CREATE INDEX IF NOT EXISTS idx_analytics_event_name ON analytics_events(event_name);
+CREATE INDEX IF NOT EXISTS idx_analytics_created_at ON analytics_events(created_at);
+CREATE INDEX IF NOT EXISTS idx_analytics_user_created ON analytics_events(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_ab_assignments_user ON user_ab_assignments(user_id);
+CREATE INDEX IF NOT EXISTS idx_ab_assignments_experiment ON user_ab_assignments(experiment_id);
+"""
+
+# ═══════════════════════════════════════════════════════════════
+# STATEMENTS ("?::jsonb" marks JSON params; adapters render placeholders)
+# ═══════════════════════════════════════════════════════════════
+
+INSERT_USER = (
+    "INSERT INTO users (id, created_at, updated_at, language, profile, metadata) "
+    "VALUES (?, ?, ?, ?, ?::jsonb, ?::jsonb)"
+)
+INSERT_SESSION = (
+    "INSERT INTO user_sessions (id, user_id, session_data, answers, z_scores, "
+    "systems_analysis, created_at, last_active, completed) "
+    "VALUES (?, ?, ?::jsonb, ?::jsonb, ?::jsonb, ?::jsonb, ?, ?, ?)"
+)
+INSERT_RECOMMENDATION = (
+    "INSERT INTO recommendations (id, user_id, session_id, sport_name, sport_label, "
+    "match_score, z_alignment, card_data, variant, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?::jsonb, ?::jsonb, ?, ?)"
+)
+INSERT_EVENT = (
+    "INSERT INTO analytics_events (id, user_id, event_name, event_properties, created_at) "
+    "VALUES (?, ?, ?, ?::jsonb, ?)"
+)
+
+SELECT_EVENT_SPAN = (
+    "SELECT MIN(created_at), MAX(created_at) FROM analytics_events WHERE user_id = ?"
+)
+COUNT_COMPLETED_USERS = (
+    "SELECT COUNT(DISTINCT user_id) FROM user_sessions "
+    "WHERE completed = ? AND created_at BETWEEN ? AND ?"
+)
+COUNT_RECOMMENDED_USERS = (
+    "SELECT COUNT(DISTINCT user_id) FROM recommendations WHERE created_at BETWEEN ? AND ?"
+)
+SELECT_TOP_SPORTS = (
+    "SELECT sport_label, sport_name, COUNT(*) AS recommendation_count, AVG(match_score) "
+    "FROM recommendations GROUP BY sport_label, sport_name "
+    "ORDER BY recommendation_count DESC LIMIT ?"
+)
+SELECT_SESSIONS = (
+    "SELECT session_data FROM user_sessions WHERE created_at BETWEEN ? AND ? "
+    "ORDER BY created_at, id"
+)
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat(sep=" ")
+
+
+def _json(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+def _label(name: str) -> str:
+    return re.sub(r"[^\w]+", "_", str(name).strip().lower(), flags=re.UNICODE).strip("_") or "unknown"
+
+
+def _parse_ts(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("T", " "))
+
+
+# ═══════════════════════════════════════════════════════════════
+# ADAPTERS
+# ═══════════════════════════════════════════════════════════════
+
+class SQLiteAdapter:
+    """SQLite in WAL mode; one connection per thread"""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str = "data/sportsync.db"):
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+    def connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False,
+                                   cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def render(self, sql: str) -> str:
+        return sql.replace("?::jsonb", "?")
+
+    def init_schema(self):
+        conn = self.connect()
+        conn.executescript(SQLITE_SCHEMA)
+        conn.commit()
+
+    def to_bool(self, value: bool) -> int:
+        return 1 if value else 0
+
+    def stream_cursor(self, conn):
+        return conn.cursor()
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class PostgresAdapter:
+    """Postgres via psycopg 3 (statements are auto-prepared after a few executions)"""
+
+    name = "postgres"
+
+    def __init__(self, dsn: str):
+        if psycopg is None:
+            raise RuntimeError("Postgres backend requires: pip install 'psycopg[binary]'")
+        self.dsn = dsn
+        self._local = threading.local()
+
+    def connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or conn.closed:
+            conn = psycopg.connect(self.dsn, prepare_threshold=1)
+            self._local.conn = conn
+        return conn
+
+    def render(self, sql: str) -> str:
+        return sql.replace("?", "%s")
+
+    def init_schema(self):
+        """Apply schema.sql once (skipped when the tables already exist)"""
+        conn = self.connect()
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('public.users')")
+            if cur.fetchone()[0] is None:
+                cur.execute(SCHEMA_PATH.read_text(encoding="utf-8"))
+        conn.commit()
+
+    def to_bool(self, value: bool) -> bool:
+        return bool(value)
+
+    def stream_cursor(self, conn):
+        """Server-side cursor: rows arrive in fetchmany() chunks"""
+        return conn.cursor(name=f"stream_{uuid.uuid4().hex[:8]}")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# ═══════════════════════════════════════════════════════════════
+# ENGINE
+# ═══════════════════════════════════════════════════════════════
+
+class SQLStorageEngine:
+    """
+    Batched writer + prepared analytics queries over the schema.sql tables
+    Call flush() before reading your own writes, close() on shutdown.
+    """
+
+    def __init__(self, adapter, flush_batch: int = FLUSH_BATCH, flush_interval: float = FLUSH_INTERVAL_SECS,
+                 spill_path: str = SPILL_PATH):
+        self.adapter = adapter
+        self.adapter.init_schema()
+        self.flush_batch = flush_batch
+        self.flush_interval = flush_interval
+        self.spill_path = Path(spill_path)
+        self.dropped = 0
+        self.spilled = 0
+        # (sql, params, attempts); sql None = flush marker with an Event as params
+        self._queue: "queue.Queue[Tuple[Optional[str], Any, int]]" = queue.Queue()
+        self._stopped = threading.Event()
+        self._writer = threading.Thread(target=self._writer_loop, name="sql-writer", daemon=True)
+        self._writer.start()
+
+    # ---------- background writer ----------
+
+    def _writer_loop(self):
+        try:
+            while not self._stopped.is_set() or not self._queue.empty():
+                batch = []
+                try:
+                    batch.append(self._queue.get(timeout=self.flush_interval))
+                    while len(batch) < self.flush_batch:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+                if batch:
+                    self._write_batch(batch)
+        finally:
+            self.adapter.close()  # the writer's own thread-local connection
+
+    def _write_batch(self, batch: List[Tuple[Optional[str], Any, int]]):
+        """Group consecutive items by statement and executemany each group"""
+        rows = [item for item in batch if item[0] is not None]
+        flush_waiters = [item[1] for item in batch if item[0] is None]
+
+        groups: List[Tuple[str, List[tuple]]] = []
+        for sql, params, _ in rows:
+            if groups and groups[-1][0] == sql:
+                groups[-1][1].append(params)
+            else:
+                groups.append((sql, [params]))
+
+        if groups:
+            conn = self.adapter.connect()
+            try:
+                cur = conn.cursor()
+                for sql, group in groups:
+                    cur.executemany(self.adapter.render(sql), group)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.warning("SQL storage batch failed (%d rows), retrying row by row: %s", len(rows), e)
+                if self._write_rows(rows, flush_waiters):
+                    return
+        for waiter in flush_waiters:
+            waiter.set()
+
+    def _write_rows(self, rows: List[Tuple[str, Any, int]], flush_waiters: List[threading.Event]) -> bool:
+        """
+        Commit rows one at a time; drop rows that fail on their own
+        On a transient error the rest of the batch (and its flush markers)
+        is re-queued in order; returns True in that case.
+        """
+        conn = self.adapter.connect()
+        for index, (sql, params, attempts) in enumerate(rows):
+            try:
+                conn.execute(self.adapter.render(sql), params)
+                conn.commit()
+            except TRANSIENT_ERRORS as e:
+                conn.rollback()
+                self._retry(rows[index:], flush_waiters, e)
+                return True
+            except Exception as e:
+                conn.rollback()
+                self.dropped += 1
+                logger.error("SQL storage dropped a row (%s): %s", sql.split("(")[0].strip(), e)
+        return False
+
+    def _retry(self, rows: List[Tuple[str, Any, int]], flush_waiters: List[threading.Event], error: Exception):
+        attempts = rows[0][2] + 1
+        if attempts >= MAX_WRITE_ATTEMPTS:
+            self._spill(rows, error)
+        else:
+            logger.warning("SQL storage transient error (attempt %d/%d), re-queueing %d rows: %s",
+                           attempts, MAX_WRITE_ATTEMPTS, len(rows), error)
+            time.sleep(self.flush_interval * attempts)
+            for sql, params, _ in rows:
+                self._queue.put((sql, params, attempts))
+        for waiter in flush_waiters:
+            self._queue.put((None, waiter, 0))
+
+    def _spill(self, rows: List[Tuple[str, Any, int]], error: Exception):
+        """Persist rows that kept failing so replay_spill() can write them later"""
+        self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.spill_path.open("a", encoding="utf-8") as f:
+            for sql, params, _ in rows:
+                f.write(json.dumps({"sql": sql, "params": list(params)}, ensure_ascii=False) + "\n")
+        self.spilled += len(rows)
+        logger.error("SQL storage spilled %d rows to %s after %d attempts: %s",
+                     len(rows), self.spill_path, MAX_WRITE_ATTEMPTS, error)
+
+    def replay_spill(self) -> int:
+        """Re-queue spilled rows (e.g. on startup once the database is healthy)"""
+        if not self.spill_path.exists():
+            return 0
+        pending = self.spill_path.with_suffix(".replaying")
+        self.spill_path.replace(pending)
+        count = 0
+        with pending.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    self._enqueue(item["sql"], tuple(item["params"]))
+                    count += 1
+        pending.unlink()
+        return count
+
+    def _enqueue(self, sql: str, params: tuple):
+        self._queue.put((sql, params, 0))
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until everything queued so far is written"""
+        done = threading.Event()
+        self._queue.put((None, done, 0))
+        return done.wait(timeout)
+
+    def close(self):
+        self._stopped.set()
+        self._writer.join(timeout=10)
+        self.adapter.close()
+
+    # ---------- writes ----------
+
+    def record_response(self, data: Dict[str, Any]) -> str:
+        """Queue one research response (user + session + recommendations); returns the session id"""
+        user_id, session_id = str(uuid.uuid4()), str(uuid.uuid4())
+        now = data.get("saved_at") or _now()
+        now = now.replace("T", " ")
+        lang = "ar" if str(data.get("language", "ar")).lower().startswith(("ar", "ع")) else "en"
+        summary = data.get("analysis_summary", {}) or {}
+
+        self._enqueue(INSERT_USER, (
+            user_id, now, now, lang,
+            _json(summary),
+            _json({
+                "research_consent": bool(data.get("research_consent")),
+                "has_additional_info": bool(str(data.get("additional_info", "")).strip()),
+                "source_session_id": data.get("session_id"),
+            })
+        ))
+        self._enqueue(INSERT_SESSION, (
+            session_id, user_id, _json(data), _json(data.get("answers")),
+            _json(data.get("personality_scores")), _json(data.get("reasoning_analysis")),
+            now, now, self.adapter.to_bool(True)
+        ))
+        for rec in data.get("recommendations", []) or []:
+            score = rec.get("match_score")
+            if isinstance(score, (int, float)):
+                score = score / 100.0 if score > 1 else float(score)
+                score = max(0.0, min(1.0, score))
+            else:
+                score = None
+            sport = rec.get("sport") or rec.get("sport_name") or "unknown"
+            self._enqueue(INSERT_RECOMMENDATION, (
+                str(uuid.uuid4()), user_id, session_id, sport, _label(rec.get("sport_name_en", sport)),
+                score, _json(rec.get("z_scores")), _json(rec), rec.get("variant"), now
+            ))
+        return session_id
+
+    def track_event(self, user_id: Optional[str], event_name: str, properties: Dict[str, Any] = None,
+                    created_at: Optional[str] = None):
+        self._enqueue(INSERT_EVENT, (
+            str(uuid.uuid4()), user_id, event_name, _json(properties or {}),
+            (created_at or _now()).replace("T", " ")
+        ))
+
+    # ---------- prepared analytics queries ----------
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        conn = self.adapter.connect()
+        cur = conn.cursor()
+        cur.execute(self.adapter.render(sql), params)
+        rows = cur.fetchall()
+        conn.commit()  # end the read transaction (Postgres)
+        return rows
+
+    def calculate_7day_retention(self, user_id: str) -> bool:
+        """Same definition as schema.sql: first/last event at most 7 days apart"""
+        first, last = self._query(SELECT_EVENT_SPAN, (user_id,))[0]
+        if first is None or last is None:
+            return False
+        return (_parse_ts(last) - _parse_ts(first)).days <= 7
+
+    def calculate_activation_rate(self, start_date: str, end_date: str) -> float:
+        """% of users with a completed session who also received recommendations"""
+        start, end = start_date.replace("T", " "), end_date.replace("T", " ")
+        total = self._query(COUNT_COMPLETED_USERS, (self.adapter.to_bool(True), start, end))[0][0]
+        if not total:
+            return 0.0
+        activated = self._query(COUNT_RECOMMENDED_USERS, (start, end))[0][0]
+        return activated / total * 100
+
+    def top_sports(self, limit: int = 10) -> List[Dict[str, Any]]:
+        return [
+            {"sport_label": label, "sport_name": name, "recommendation_count": count,
+             "avg_match_score": avg}
+            for label, name, count, avg in self._query(SELECT_TOP_SPORTS, (limit,))
+        ]
+
+    def iter_sessions(self, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream stored responses (session_data) in save order, optionally within [since, until]"""
+        conn = self.adapter.connect()
+        cur = self.adapter.stream_cursor(conn)
+        try:
+            cur.execute(self.adapter.render(SELECT_SESSIONS), (
+                (since or "0001-01-01").replace("T", " "),
+                (until or "9999-12-31").replace("T", " "),
+            ))
+            while True:
+                rows = cur.fetchmany(500)
+                if not rows:
+                    return
+                for (session_data,) in rows:
+                    yield session_data if isinstance(session_data, dict) else json.loads(session_data)
+        finally:
+            cur.close()
+            conn.commit()
+
+
+def create_engine(backend: str, sqlite_path: str = "data/sportsync.db", dsn: str = "") -> SQLStorageEngine:
+    """backend: "sqlite" | "postgres" """
+    if backend == "postgres":
+        return SQLStorageEngine(PostgresAdapter(dsn))
+    return SQLStorageEngine(SQLiteAdapter(sqlite_path))
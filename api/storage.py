@@ -3,34 +3,196 @@ SportSync AI - Data Storage System
 For academic research and system validation
 """
 
+import atexit
+import csv
+import io
 import json
 import os
+import sys
+import tempfile
+import uuid
+import zlib
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Any, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process locking only
+    fcntl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: Parquet export
+    pa = pq = None
 
 # Storage directory
 STORAGE_DIR = Path(__file__).parent.parent / "data" / "responses"
 STORAGE_DIR.mkdir(parents=True, exist_ok=True)
 
+# Backend: "files" (one JSON file per response), "log" (append-only
+# segments, see api/segment_log.py), or "sqlite" / "postgres" (schema.sql
+# tables, see api/sql_storage.py). Optional log compression: gzip | zstd
+STORAGE_BACKEND = os.getenv("SPORTSYNC_STORAGE_BACKEND", "files").lower()
+SQL_BACKENDS = ("sqlite", "postgres")
+LOG_DIR = STORAGE_DIR.parent / "responses_log"
+LOG_COMPRESSION = os.getenv("SPORTSYNC_LOG_COMPRESSION") or None
+SQLITE_PATH = Path(os.getenv("SPORTSYNC_SQLITE_PATH", str(STORAGE_DIR.parent / "sportsync.db")))
+DATABASE_URL = os.getenv("SPORTSYNC_DATABASE_URL", "")
+_log_store = None
+_sql_engine = None
+
+def _get_log_store():
+    global _log_store
+    if _log_store is None or _log_store.root != LOG_DIR:
+        from api.segment_log import SegmentedLogStore
+        _log_store = SegmentedLogStore(LOG_DIR, compression=LOG_COMPRESSION)
+    return _log_store
+
+def get_sql_engine():
+    """Shared SQL engine for the sqlite/postgres backends (background writer drains at exit)"""
+    global _sql_engine
+    if _sql_engine is None or getattr(_sql_engine.adapter, "db_path", None) not in (None, str(SQLITE_PATH)):
+        from api.sql_storage import create_engine
+        if _sql_engine is not None:
+            _sql_engine.close()
+        _sql_engine = create_engine(STORAGE_BACKEND, str(SQLITE_PATH), DATABASE_URL)
+        atexit.register(_sql_engine.close)
+    return _sql_engine
+
+# Running aggregates maintained by save_response (see get_statistics)
+STATS_PATH = STORAGE_DIR / "stats_rollup.json"
+STATS_LOCK_PATH = STORAGE_DIR / ".stats_rollup.lock"
+
+@contextmanager
+def _stats_lock():
+    """Exclusive lock around read-modify-write of the rollup (across processes)"""
+    with open(STATS_LOCK_PATH, "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _empty_rollup() -> Dict[str, Any]:
+    return {
+        "total_responses": 0,
+        "languages": {},
+        "profile_types": {},
+        "sports": {},
+        "consent": 0,
+        "additional_info": 0,
+        "first_saved_at": None,
+        "last_saved_at": None
+    }
+
+def _iso_timestamp(value: Any) -> Optional[str]:
+    """value if it is an ISO-8601 timestamp string, else None (e.g. "unknown", missing)"""
+    if not isinstance(value, str):
+        return None
+    try:
+        datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    except ValueError:
+        return None
+    return value
+
+def _apply_to_rollup(rollup: Dict[str, Any], resp: Dict[str, Any]) -> None:
+    """Add one response to the aggregates (same rules as the old full scan)"""
+    rollup["total_responses"] += 1
+
+    lang = resp.get("language", "unknown")
+    rollup["languages"][lang] = rollup["languages"].get(lang, 0) + 1
+
+    profile = resp.get("analysis_summary", {}).get("profile_type", "unknown")
+    rollup["profile_types"][profile] = rollup["profile_types"].get(profile, 0) + 1
+
+    for rec in resp.get("recommendations", []):
+        sport = rec.get("sport", "unknown")
+        rollup["sports"][sport] = rollup["sports"].get(sport, 0) + 1
+
+    if resp.get("research_consent"):
+        rollup["consent"] += 1
+    if resp.get("additional_info", "").strip():
+        rollup["additional_info"] += 1
+
+    # Unparseable values would sort after every real timestamp ("unknown" > "2025-...")
+    saved_at = _iso_timestamp(resp.get("saved_at"))
+    if saved_at is None:
+        return
+    if rollup["first_saved_at"] is None or saved_at < rollup["first_saved_at"]:
+        rollup["first_saved_at"] = saved_at
+    if rollup["last_saved_at"] is None or saved_at > rollup["last_saved_at"]:
+        rollup["last_saved_at"] = saved_at
+
+def _read_rollup() -> Dict[str, Any]:
+    try:
+        with open(STATS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_rollup(rollup: Dict[str, Any]) -> None:
+    fd, tmp = tempfile.mkstemp(dir=str(STORAGE_DIR), prefix=".stats_rollup.", suffix=".tmp")
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(rollup, f, ensure_ascii=False)
+    os.replace(tmp, STATS_PATH)
+
+def _update_rollup(resp: Dict[str, Any]) -> None:
+    with _stats_lock():
+        rollup = _read_rollup()
+        if rollup is None:
+            # First write (or lost rollup): rebuild includes this response already
+            _write_rollup(_rebuild_rollup())
+            return
+        _apply_to_rollup(rollup, resp)
+        _write_rollup(rollup)
+
+def _rebuild_rollup() -> Dict[str, Any]:
+    rollup = _empty_rollup()
+    for resp in iter_responses():
+        _apply_to_rollup(rollup, resp)
+    return rollup
+
+def rebuild_statistics() -> Dict[str, Any]:
+    """
+    Recompute the rollup from every saved response
+    Run after restoring/deleting response files: python -m api.storage rebuild-stats
+    """
+    with _stats_lock():
+        rollup = _rebuild_rollup()
+        _write_rollup(rollup)
+    return rollup
+
 def save_response(data: Dict[str, Any]) -> str:
     """
     Save user response for research study
-    Returns: filename of saved response
+    Returns: filename of saved response ("<segment>#<offset>" for the log
+    backend, the user_sessions id for the SQL backends)
     """
     try:
-        # Generate filename with timestamp
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S_%f")
-        filename = f"response_{timestamp}.json"
-        filepath = STORAGE_DIR / filename
-
         # Add metadata
         data["saved_at"] = datetime.utcnow().isoformat()
         data["version"] = "1.0"
 
-        # Save to file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if STORAGE_BACKEND == "log":
+            filename = _get_log_store().append(data)
+        elif STORAGE_BACKEND in SQL_BACKENDS:
+            filename = get_sql_engine().record_response(data)
+        else:
+            # Timestamp + random suffix: no collisions between workers
+            timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S_%f")
+            filename = f"response_{timestamp}_{uuid.uuid4().hex[:6]}.json"
+            with open(STORAGE_DIR / filename, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+
+        try:
+            _update_rollup(data)
+        except Exception as e:
+            print(f"Stats rollup error: {str(e)}")
 
         return filename
 
@@ -38,25 +200,44 @@ def save_response(data: Dict[str, Any]) -> str:
         print(f"Storage error: {str(e)}")
         return ""
 
+def iter_responses(since: Optional[str] = None, until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream saved responses in save order, optionally within [since, until]
+    (ISO saved_at strings). Nothing is held in memory beyond one response.
+    """
+    if STORAGE_BACKEND == "log":
+        yield from _get_log_store().iter_records(since, until)
+        return
+    if STORAGE_BACKEND in SQL_BACKENDS:
+        engine = get_sql_engine()
+        engine.flush()  # include writes still queued in the batch writer
+        yield from engine.iter_sessions(since, until)
+        return
+
+    if not STORAGE_DIR.exists():
+        return
+    for filepath in sorted(STORAGE_DIR.glob("response_*.json")):
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Error loading {filepath}: {e}")
+            continue
+        saved_at = data.get("saved_at", "")
+        if (since and saved_at < since) or (until and saved_at > until):
+            continue
+        yield data
+
 def load_all_responses() -> List[Dict[str, Any]]:
     """
     Load all saved responses for analysis
+    Prefer iter_responses() for large datasets
     """
     responses = []
 
     try:
-        if not STORAGE_DIR.exists():
-            return responses
-
-        for filepath in sorted(STORAGE_DIR.glob("response_*.json")):
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    responses.append(data)
-            except Exception as e:
-                print(f"Error loading {filepath}: {e}")
-                continue
-
+        for data in iter_responses():
+            responses.append(data)
         return responses
 
     except Exception as e:
@@ -65,95 +246,186 @@ def load_all_responses() -> List[Dict[str, Any]]:
 
 def get_statistics() -> Dict[str, Any]:
     """
-    Calculate statistics from all responses
+    Statistics from the incrementally maintained rollup
+    O(1) regardless of how many responses are stored
     """
-    responses = load_all_responses()
+    rollup = _read_rollup()
+    if rollup is None:
+        rollup = rebuild_statistics()
 
-    if not responses:
+    total = rollup["total_responses"]
+    if not total:
         return {
             "total_responses": 0,
             "message": "No data yet"
         }
 
-    # Calculate statistics
-    total = len(responses)
-    languages = {}
-    profile_types = {}
-    recommended_sports = {}
-    has_consent = 0
-    has_additional_info = 0
+    return {
+        "total_responses": total,
+        "consent_rate": f"{(rollup['consent'] / total * 100):.1f}%",
+        "languages": rollup["languages"],
+        "profile_types": dict(sorted(rollup["profile_types"].items(), key=lambda x: x[1], reverse=True)),
+        "top_sports": dict(sorted(rollup["sports"].items(), key=lambda x: x[1], reverse=True)[:10]),
+        "additional_info_rate": f"{(rollup['additional_info'] / total * 100):.1f}%",
+        "date_range": {
+            "first": rollup["first_saved_at"],
+            "last": rollup["last_saved_at"]
+        }
+    }
+
+# ═══════════════════════════════════════════════════════════════
+# EXPORT (streamed: one response in memory at a time)
+# ═══════════════════════════════════════════════════════════════
 
-    for resp in responses:
-        # Language distribution
-        lang = resp.get("language", "unknown")
-        languages[lang] = languages.get(lang, 0) + 1
+CSV_COLUMNS = [
+    "timestamp", "session_id", "language", "profile_type", "sport1", "sport2", "sport3",
+    "consent", "has_additional_info", "answers_count"
+]
+EXPORT_CHUNK_BYTES = 64 * 1024
+PARQUET_BATCH_ROWS = 5000
 
-        # Profile types
-        profile = resp.get("analysis_summary", {}).get("profile_type", "unknown")
-        profile_types[profile] = profile_types.get(profile, 0) + 1
+def _export_row(resp: Dict[str, Any]) -> List[Any]:
+    sports = [rec.get("sport", "") for rec in resp.get("recommendations", [])[:3]]
+    sports += [""] * (3 - len(sports))
+    return [
+        resp.get("saved_at", ""),
+        resp.get("session_id", ""),
+        resp.get("language", ""),
+        resp.get("analysis_summary", {}).get("profile_type", ""),
+        sports[0],
+        sports[1],
+        sports[2],
+        bool(resp.get("research_consent")),
+        bool(resp.get("additional_info", "").strip()),
+        len(resp.get("answers", []))
+    ]
 
-        # Recommended sports
-        for rec in resp.get("recommendations", []):
-            sport = rec.get("sport", "unknown")
-            recommended_sports[sport] = recommended_sports.get(sport, 0) + 1
+def iter_csv(since: Optional[str] = None, until: Optional[str] = None, compress: bool = False) -> Iterator[bytes]:
+    """
+    Stream the CSV export as UTF-8 byte chunks (gzip-framed when compress=True)
+    Fields are escaped by the csv module
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf, quoting=csv.QUOTE_ALL, lineterminator="\n")
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
 
-        # Consent
-        if resp.get("research_consent"):
-            has_consent += 1
+    def drain() -> bytes:
+        data = buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+        return gz.compress(data) if gz else data
 
-        # Additional info
-        if resp.get("additional_info", "").strip():
-            has_additional_info += 1
+    writer.writerow(CSV_COLUMNS)
+    for resp in iter_responses(since, until):
+        row = _export_row(resp)
+        row[7] = "yes" if row[7] else "no"
+        row[8] = "yes" if row[8] else "no"
+        writer.writerow(row)
+        if buf.tell() >= EXPORT_CHUNK_BYTES:
+            chunk = drain()
+            if chunk:
+                yield chunk
 
-    return {
-        "total_responses": total,
-        "consent_rate": f"{(has_consent / total * 100):.1f}%",
-        "languages": languages,
-        "profile_types": dict(sorted(profile_types.items(), key=lambda x: x[1], reverse=True)),
-        "top_sports": dict(sorted(recommended_sports.items(), key=lambda x: x[1], reverse=True)[:10]),
-        "additional_info_rate": f"{(has_additional_info / total * 100):.1f}%",
-        "date_range": {
-            "first": responses[0].get("saved_at", "unknown") if responses else None,
-            "last": responses[-1].get("saved_at", "unknown") if responses else None
-        }
-    }
+    tail = drain() + (gz.flush() if gz else b"")
+    if tail:
+        yield tail
 
 def export_to_csv() -> str:
     """
     Export responses to CSV format for analysis
-    Returns: CSV string
+    Returns: CSV string (use iter_csv() to stream large datasets)
     """
-    responses = load_all_responses()
-
-    if not responses:
+    csv_text = b"".join(iter_csv()).decode("utf-8")
+    if csv_text.count("\n") <= 1:
         return "No data to export"
+    return csv_text.rstrip("\n")
 
-    # CSV header
-    csv_lines = [
-        "timestamp,session_id,language,profile_type,sport1,sport2,sport3,"
-        "consent,has_additional_info,answers_count"
-    ]
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def _parquet_schema(z_axes: List[str]):
+    return pa.schema(
+        [("timestamp", pa.string()), ("session_id", pa.string()), ("language", pa.string()),
+         ("profile_type", pa.string()), ("sport1", pa.string()), ("sport2", pa.string()),
+         ("sport3", pa.string()), ("consent", pa.bool_()), ("has_additional_info", pa.bool_()),
+         ("answers_count", pa.int32())]
+        + [(f"z_{axis}", pa.float64()) for axis in z_axes]
+    )
+
+def _write_parquet(sink, since: Optional[str], until: Optional[str], batch_rows: int) -> Iterator[None]:
+    """Write row groups of batch_rows responses; yields after each one"""
+    if pa is None:
+        raise RuntimeError("Parquet export requires: pip install pyarrow")
+    from local_sports_db import Z_AXES
+
+    schema = _parquet_schema(Z_AXES)
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    columns = {name: [] for name in schema.names}
+
+    def write_batch():
+        writer.write_table(pa.table(columns, schema=schema))
+        for values in columns.values():
+            values.clear()
+
+    for resp in iter_responses(since, until):
+        for name, value in zip(CSV_COLUMNS, _export_row(resp)):
+            columns[name].append(value)
+        scores = resp.get("personality_scores") or resp.get("z_scores") or {}
+        for axis in Z_AXES:
+            value = scores.get(axis)
+            columns[f"z_{axis}"].append(float(value) if isinstance(value, (int, float)) else None)
+        if len(columns["timestamp"]) >= batch_rows:
+            write_batch()
+            yield
+    if columns["timestamp"]:
+        write_batch()
+    writer.close()
+    yield
+
+def iter_parquet(since: Optional[str] = None, until: Optional[str] = None,
+                 batch_rows: int = PARQUET_BATCH_ROWS) -> Iterator[bytes]:
+    """Stream a Parquet file (one row group per batch_rows responses, z-scores as float64 columns)"""
+    sink = _ChunkSink()
+    for _ in _write_parquet(pa.PythonFile(sink, mode="w") if pa else sink, since, until, batch_rows):
+        chunk = sink.drain()
+        if chunk:
+            yield chunk
+
+def export_to_parquet(path: str, since: Optional[str] = None, until: Optional[str] = None,
+                      batch_rows: int = PARQUET_BATCH_ROWS) -> str:
+    """Write the Parquet export to a file; returns the path"""
+    for _ in _write_parquet(path, since, until, batch_rows):
+        pass
+    return path
 
-    # CSV rows
-    for resp in responses:
-        recommendations = resp.get("recommendations", [])
-        sports = [rec.get("sport", "") for rec in recommendations[:3]]
-        while len(sports) < 3:
-            sports.append("")
-
-        row = [
-            resp.get("saved_at", ""),
-            resp.get("session_id", ""),
-            resp.get("language", ""),
-            resp.get("analysis_summary", {}).get("profile_type", ""),
-            sports[0],
-            sports[1],
-            sports[2],
-            "yes" if resp.get("research_consent") else "no",
-            "yes" if resp.get("additional_info", "").strip() else "no",
-            str(len(resp.get("answers", [])))
-        ]
-
-        csv_lines.append(",".join(f'"{item}"' for item in row))
-
-    return "\n".join(csv_lines)
+if __name__ == "__main__":
+    if sys.argv[1:] == ["rebuild-stats"]:
+        stats = rebuild_statistics()
+        print(f"✓ Rebuilt statistics from {stats['total_responses']} responses")
+    else:
+        print("Usage: python -m api.storage rebuild-stats")
@@ -0,0 +1,450 @@
+"""
+SportSync AI - Streaming Tracking Statistics
+Live, bounded-memory aggregates over the /api/track event stream
+
+STRUCTURES:
+- Counters per language / profile type (capped, overflow goes to "other")
+- HyperLogLog for unique sessions (~1.6% error at p=12, 4 KB)
+- Count-Min Sketch + min-heap for the top recommended sports
+- Welford running mean / variance per z-axis
+- Ring buffers of time buckets for the last hour, day and week
+
+StreamingStats is registered as an in-process sink of the event pipeline
+(api/event_pipeline.py), so it is updated by the flusher thread, never by
+the request. snapshot() cost depends only on the fixed structure sizes.
+
+COLD START: the sketches are saved every SNAPSHOT_SECS (and at shutdown)
+together with the events.jsonl offset they cover. A new process loads that
+snapshot and replays only the tail of events.jsonl, in a background thread;
+until it finishes snapshot() reports "warming": true with partial numbers.
+"""
+
+import base64
+import hashlib
+import heapq
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from local_sports_db import Z_AXES
+
+MAX_LABELS = 200
+SNAPSHOT_SECS = 60
+SNAPSHOT_VERSION = 1
+
+# (name, bucket seconds, bucket count)
+WINDOWS = [
+    ("last_hour", 60, 60),
+    ("last_day", 3600, 24),
+    ("last_week", 6 * 3600, 28),
+]
+
+
+def _hash64(value: str, salt: bytes = b"") -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8, key=salt).digest(), "big")
+
+
+# ═══════════════════════════════════════════════════════════════
+# SKETCHES
+# ═══════════════════════════════════════════════════════════════
+
+class HyperLogLog:
+    """Cardinality estimator with 2^p one-byte registers"""
+
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+        self.alpha = 0.7213 / (1 + 1.079 / self.m)
+
+    def add(self, value: str) -> None:
+        x = _hash64(value)
+        index = x >> (64 - self.p)
+        rest = x & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self) -> int:
+        estimate = self.alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)  # linear counting for small sets
+        return int(round(estimate))
+
+
+class CountMinSketch:
+    """Approximate frequencies; never underestimates"""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+        self.salts = [bytes([i + 1]) * 8 for i in range(depth)]
+
+    def _cells(self, item: str):
+        for row, salt in zip(self.rows, self.salts):
+            yield row, _hash64(item, salt) % self.width
+
+    def add(self, item: str, count: int = 1) -> int:
+        estimate = None
+        for row, col in self._cells(item):
+            row[col] += count
+            estimate = row[col] if estimate is None else min(estimate, row[col])
+        return estimate
+
+    def estimate(self, item: str) -> int:
+        return min(row[col] for row, col in self._cells(item))
+
+
+class TopK:
+    """Heavy hitters: Count-Min estimates + a min-heap of the current top k"""
+
+    def __init__(self, k: int = 20, width: int = 2048, depth: int = 4):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.members: Dict[str, int] = {}
+        self._heap: List[tuple] = []  # (estimate, item); stale entries skipped lazily
+
+    def add(self, item: str) -> None:
+        estimate = self.sketch.add(item)
+        if item in self.members or len(self.members) < self.k:
+            self.members[item] = estimate
+            heapq.heappush(self._heap, (estimate, item))
+        else:
+            floor, floor_item = self._min()
+            if estimate > floor:
+                heapq.heappop(self._heap)
+                del self.members[floor_item]
+                self.members[item] = estimate
+                heapq.heappush(self._heap, (estimate, item))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(count, item) for item, count in self.members.items()]
+            heapq.heapify(self._heap)
+
+    def _min(self):
+        while True:
+            count, item = self._heap[0]
+            if self.members.get(item) == count:
+                return count, item
+            heapq.heappop(self._heap)
+
+    def top(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        ranked = sorted(self.members.items(), key=lambda x: (-x[1], x[0]))[:n or self.k]
+        return [{"sport": item, "count": count} for item, count in ranked]
+
+
+class Welford:
+    """Running mean / variance in O(1) memory"""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def summary(self) -> Dict[str, Any]:
+        variance = self.m2 / (self.count - 1) if self.count > 1 else 0.0
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 4),
+            "variance": round(variance, 4),
+            "std": round(math.sqrt(variance), 4)
+        }
+
+
+def _bump(counter: Dict[str, int], key: str) -> None:
+    if key not in counter and len(counter) >= MAX_LABELS:
+        key = "other"
+    counter[key] = counter.get(key, 0) + 1
+
+
+# ═══════════════════════════════════════════════════════════════
+# TIME WINDOWS
+# ═══════════════════════════════════════════════════════════════
+
+class _Bucket:
+    __slots__ = ("slot", "events", "languages", "sessions")
+
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.events = 0
+        self.languages: Dict[str, int] = {}
+        self.sessions = HyperLogLog(p=8)
+
+
+class TimeWindow:
+    """Ring of fixed-width buckets; stale buckets are reset on reuse"""
+
+    def __init__(self, bucket_secs: int, num_buckets: int):
+        self.bucket_secs = bucket_secs
+        self.num_buckets = num_buckets
+        self.buckets: List[Optional[_Bucket]] = [None] * num_buckets
+
+    def add(self, ts: float, language: str, session_id: str) -> None:
+        slot = int(ts // self.bucket_secs)
+        if slot <= int(time.time() // self.bucket_secs) - self.num_buckets:
+            return  # older than the window
+        bucket = self.buckets[slot % self.num_buckets]
+        if bucket is None or bucket.slot < slot:
+            bucket = self.buckets[slot % self.num_buckets] = _Bucket(slot)
+        elif bucket.slot > slot:
+            return
+        bucket.events += 1
+        _bump(bucket.languages, language)
+        if session_id:
+            bucket.sessions.add(session_id)
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, Any]:
+        current = int((now or time.time()) // self.bucket_secs)
+        live = [b for b in self.buckets if b is not None and current - self.num_buckets < b.slot <= current]
+        languages: Dict[str, int] = {}
+        sessions = HyperLogLog(p=8)
+        for bucket in live:
+            for lang, count in bucket.languages.items():
+                languages[lang] = languages.get(lang, 0) + count
+            sessions.merge(bucket.sessions)
+        return {
+            "events": sum(b.events for b in live),
+            "unique_sessions": sessions.count() if live else 0,
+            "languages": languages
+        }
+
+
+# ═══════════════════════════════════════════════════════════════
+# AGGREGATOR
+# ═══════════════════════════════════════════════════════════════
+
+def _event_time(event: Dict[str, Any]) -> float:
+    try:
+        stamp = datetime.fromisoformat(str(event["timestamp"]))
+        if stamp.tzinfo is None:
+            stamp = stamp.replace(tzinfo=timezone.utc)
+        return stamp.timestamp()
+    except (KeyError, ValueError):
+        return time.time()
+
+
+class StreamingStats:
+    """All tracking aggregates; usable directly or as an event pipeline sink"""
+
+    name = "stats"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total_events = 0
+        self.languages: Dict[str, int] = {}
+        self.profile_types: Dict[str, int] = {}
+        self.sessions = HyperLogLog()
+        self.sports = TopK()
+        self.z_scores = {axis: Welford() for axis in Z_AXES}
+        self.windows = {name: TimeWindow(secs, count) for name, secs, count in WINDOWS}
+        self.started_at = datetime.utcnow().isoformat()
+        self.warm = threading.Event()
+        self.warm.set()
+        self._snapshot_path: Optional[Path] = None
+        self._events_path: Optional[Path] = None
+        self._last_saved = time.monotonic()
+
+    def add(self, event: Dict[str, Any]) -> None:
+        language = str(event.get("language") or "unknown")
+        session_id = str(event.get("session_id") or "")
+        ts = _event_time(event)
+        with self._lock:
+            self.total_events += 1
+            _bump(self.languages, language)
+            _bump(self.profile_types, str(event.get("profile_type") or "unknown"))
+            if session_id:
+                self.sessions.add(session_id)
+            for sport in event.get("recommended_sports") or []:
+                if sport:
+                    self.sports.add(str(sport))
+            for axis, value in (event.get("z_scores") or {}).items():
+                if axis in self.z_scores and isinstance(value, (int, float)):
+                    self.z_scores[axis].add(float(value))
+            for window in self.windows.values():
+                window.add(ts, language, session_id)
+
+    # Event pipeline sink interface
+    def write(self, events: Iterable[Dict[str, Any]]) -> None:
+        for event in events:
+            self.add(event)
+        if self._snapshot_path and time.monotonic() - self._last_saved > SNAPSHOT_SECS:
+            self.save_snapshot()
+
+    def close(self) -> None:
+        if self._snapshot_path:
+            self.save_snapshot()
+
+    def replay_jsonl(self, path: str, start: int = 0, end: Optional[int] = None) -> int:
+        """Load events from the disk sink's events.jsonl (byte range [start, end)); returns events loaded"""
+        loaded = 0
+        try:
+            with open(path, "rb") as f:
+                f.seek(start)
+                position = start
+                for line in f:
+                    position += len(line)
+                    if end is not None and position > end:
+                        break
+                    try:
+                        self.add(json.loads(line))
+                        loaded += 1
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        return loaded
+
+    # ---------- snapshots ----------
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-serialisable copy of every structure"""
+        def registers(hll: HyperLogLog) -> str:
+            return base64.b64encode(bytes(hll.registers)).decode("ascii")
+
+        with self._lock:
+            return {
+                "version": SNAPSHOT_VERSION,
+                "total_events": self.total_events,
+                "languages": dict(self.languages),
+                "profile_types": dict(self.profile_types),
+                "sessions": registers(self.sessions),
+                "sports": {"rows": self.sports.sketch.rows, "members": dict(self.sports.members)},
+                "z_scores": {axis: [w.count, w.mean, w.m2] for axis, w in self.z_scores.items()},
+                "windows": {
+                    name: [[b.slot, b.events, b.languages, registers(b.sessions)]
+                           for b in window.buckets if b is not None]
+                    for name, window in self.windows.items()
+                },
+                "started_at": self.started_at
+            }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "StreamingStats":
+        def registers(hll: HyperLogLog, encoded: str) -> HyperLogLog:
+            hll.registers = bytearray(base64.b64decode(encoded))
+            return hll
+
+        stats = cls()
+        stats.total_events = state["total_events"]
+        stats.languages = dict(state["languages"])
+        stats.profile_types = dict(state["profile_types"])
+        registers(stats.sessions, state["sessions"])
+        stats.sports.sketch.rows = [list(row) for row in state["sports"]["rows"]]
+        stats.sports.members = dict(state["sports"]["members"])
+        stats.sports._heap = [(count, item) for item, count in stats.sports.members.items()]
+        heapq.heapify(stats.sports._heap)
+        for axis, (count, mean, m2) in state["z_scores"].items():
+            if axis in stats.z_scores:
+                w = stats.z_scores[axis]
+                w.count, w.mean, w.m2 = count, mean, m2
+        for name, buckets in state["windows"].items():
+            window = stats.windows.get(name)
+            for slot, events, languages, encoded in buckets if window else []:
+                bucket = _Bucket(slot)
+                bucket.events, bucket.languages = events, dict(languages)
+                registers(bucket.sessions, encoded)
+                window.buckets[slot % window.num_buckets] = bucket
+        stats.started_at = state["started_at"]
+        return stats
+
+    def save_snapshot(self) -> None:
+        """
+        Persist the sketches with the events.jsonl offset they cover (skipped while warming)
+        Called from the flusher thread after the disk sink wrote the same batch.
+        """
+        if not self._snapshot_path or not self.warm.is_set():
+            return
+        self._last_saved = time.monotonic()
+        try:
+            offset = self._events_path.stat().st_size if self._events_path else 0
+            state = self.to_state()
+            state["offset"] = offset
+            self._snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=str(self._snapshot_path.parent), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f, separators=(",", ":"))
+            os.replace(tmp, self._snapshot_path)
+        except Exception as e:
+            print(f"⚠️ Track stats snapshot failed: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total_events": self.total_events,
+                "unique_sessions": self.sessions.count() if self.total_events else 0,
+                "languages": dict(self.languages),
+                "profile_types": dict(sorted(self.profile_types.items(), key=lambda x: x[1], reverse=True)),
+                "top_sports": self.sports.top(10),
+                "z_scores": {axis: w.summary() for axis, w in self.z_scores.items()},
+                "windows": {name: window.summary() for name, window in self.windows.items()},
+                "since": self.started_at,
+                "warming": not self.warm.is_set()
+            }
+
+
+def load_track_stats(events_path: Optional[str] = None, snapshot_path: Optional[str] = None) -> StreamingStats:
+    """
+    Restore the aggregator from its snapshot and replay the rest of
+    events_path in a background thread (stats.warm is set when done)
+    snapshot_path defaults to events.stats.json next to events_path.
+    """
+    if not events_path:
+        return StreamingStats()
+    events = Path(events_path)
+    snapshot = Path(snapshot_path) if snapshot_path else events.with_suffix(".stats.json")
+
+    stats, offset = StreamingStats(), 0
+    try:
+        with open(snapshot, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        size = events.stat().st_size if events.exists() else 0
+        if state.get("version") == SNAPSHOT_VERSION and state.get("offset", 0) <= size:
+            stats, offset = StreamingStats.from_state(state), state["offset"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # no (usable) snapshot: replay everything
+
+    stats._snapshot_path, stats._events_path = snapshot, events
+    end = events.stat().st_size if events.exists() else 0
+    if end > offset:
+        stats.warm.clear()
+
+        def replay():
+            try:
+                loaded = stats.replay_jsonl(str(events), offset, end)
+                print(f"✓ Track stats: restored snapshot at {offset}, replayed {loaded} newer events")
+            finally:
+                stats.warm.set()  # the next flush saves a snapshot
+        threading.Thread(target=replay, name="track-stats-replay", daemon=True).start()
+    return stats
+
+
+_stats: Optional[StreamingStats] = None
+_stats_lock = threading.Lock()
+
+
+def get_track_stats(replay_path: Optional[str] = None) -> StreamingStats:
+    """Process-wide aggregator, warm-started from its snapshot + events.jsonl tail (never blocks)"""
+    global _stats
+    if _stats is None:
+        with _stats_lock:
+            if _stats is None:
+                _stats = load_track_stats(replay_path)
+    return _stats
@@ -7,42 +7,37 @@ import streamlit as st
 import qrcode
 from PIL import Image  # noqa: F401  (مطلوبة لـ qrcode.save)
 
-from src.utils.submit_answers_to_queue import submit_to_queue
-from src.utils.check_result_ready import check_result
+from jobs import submit_to_queue, check_result, job_status, read_progress, get_result_watcher
+from components.background_tasks import poll_every
+from question_bank import load_question_bank
+from draft_store import get_draft_store
 
 # ===================== إعداد عام =====================
 # لو عندك دومين/رندر حطه هنا أو في secrets كـ PUBLIC_BASE، وإلا بيستخدم رابط نسبي
 PUBLIC_BASE = st.secrets.get("PUBLIC_BASE", os.getenv("PUBLIC_BASE", "")).rstrip("/")
 
 DATA_DIR = Path("data")
-DRAFTS_DIR = DATA_DIR / "drafts"
 PENDING_DIR = DATA_DIR / "pending_requests"
 READY_DIR = DATA_DIR / "ready_results"
-for d in (DATA_DIR, DRAFTS_DIR, PENDING_DIR, READY_DIR):
+for d in (DATA_DIR, PENDING_DIR, READY_DIR):
     d.mkdir(parents=True, exist_ok=True)
 
 def build_share_url(user_id: str, lang: str) -> str:
     qs = f"user_id={urllib.parse.quote(user_id)}&lang={urllib.parse.quote(lang)}"
     return f"{PUBLIC_BASE}/?{qs}" if PUBLIC_BASE else f"?{qs}"
 
-def _draft_path(uid: str) -> Path:
-    return DRAFTS_DIR / f"{uid}.json"
-
+# المسودات كلها في data/drafts.db: الكتابة فقط لما تتغيّر الإجابات (hash) ومجمّعة كل ثانيتين
 def save_draft(user_id: str, answers: dict) -> None:
     try:
-        with _draft_path(user_id).open("w", encoding="utf-8") as f:
-            json.dump(answers, f, ensure_ascii=False, indent=2)
+        get_draft_store().save(user_id, answers)
     except Exception:
         pass
 
 def load_draft(user_id: str) -> dict:
-    p = _draft_path(user_id)
-    if p.exists():
-        try:
-            return json.load(p.open("r", encoding="utf-8"))
-        except Exception:
-            return {}
-    return {}
+    try:
+        return get_draft_store().load(user_id)
+    except Exception:
+        return {}
 
 # ===================== لغة + هوية ثابتة بالرابط =====================
 params = st.experimental_get_query_params()
@@ -66,8 +61,7 @@ st.experimental_set_query_params(user_id=user_id, lang=lang)
 
 # ===================== تحميل الأسئلة =====================
 question_file = "questions/arabic_questions.json" if is_arabic else "questions/english_questions.json"
-with open(question_file, "r", encoding="utf-8") as f:
-    questions = json.load(f)
+questions = load_question_bank(question_file).questions  # cached per process; reruns skip disk
 
 st.title("🎯 توصيتك الرياضية الذكية" if is_arabic else "🎯 Your Smart Sport Recommendation")
 
@@ -78,7 +72,7 @@ if "view" not in st.session_state:
     if result:
         st.session_state.result = result
         st.session_state.view = "result"
-    elif (PENDING_DIR / f"{user_id}.json").exists():
+    elif job_status(user_id) in ("pending", "leased"):
         st.session_state.view = "waiting"
     else:
         st.session_state.view = "quiz"
@@ -122,6 +116,7 @@ if st.session_state.view == "quiz":
     if st.button("🔍 اعرض التوصيات" if is_arabic else "🔍 Show Recommendations"):
         submit_to_queue(user_id=user_id, answers=st.session_state.answers, lang=lang)
         st.session_state.view = "waiting"
+        st.session_state.pop("progress_version", None)
         st.session_state.share_url = build_share_url(user_id, lang)
         st.success("تم إرسال طلبك ✅")
         st.rerun()
@@ -142,17 +137,37 @@ elif st.session_state.view == "waiting":
         qr.save(buf)
         st.image(buf.getvalue(), width=180, caption="امسح لفتح النتيجة")
 
-    if st.button("🔄 تحديث النتيجة" if is_arabic else "🔄 Refresh Result"):
-        result = check_result(user_id)
-        if result:
-            st.session_state.result = result
-            st.session_state.view = "result"
-            # إزالة المسودة بعد اكتمال النتيجة (اختياري)
-            try: _draft_path(user_id).unlink(missing_ok=True)
-            except Exception: pass
-            st.rerun()
-        else:
-            st.warning("… لسه يجهّز")
+    # النتيجة تظهر لحظة كتابتها: الـ fragment يقرأ من ذاكرة الـ watcher فقط،
+    # والـ watcher (خيط واحد لكل العملية) هو اللي يراقب data/ready_results و data/job_progress
+    @poll_every(1.0)
+    def _wait_for_result():
+        watcher = get_result_watcher()
+
+        if watcher.is_ready(user_id):
+            result = check_result(user_id)
+            if result:
+                st.session_state.result = result
+                st.session_state.view = "result"
+                # إزالة المسودة بعد اكتمال النتيجة (اختياري)
+                try: get_draft_store().delete(user_id)
+                except Exception: pass
+                st.rerun()
+
+        # تقدّم التحليل كما يكتبه الـ worker؛ يُقرأ من القرص فقط لما يتغيّر
+        version = watcher.version("progress", user_id)
+        if st.session_state.get("progress_version") != version:
+            st.session_state.progress_version = version
+            st.session_state.progress = read_progress(user_id)
+            st.session_state.job_failed = job_status(user_id) == "failed"
+        progress = st.session_state.progress
+        if progress:
+            st.progress(progress.get("percent", 0) / 100, text=progress.get("message") or progress.get("stage", ""))
+        if st.session_state.job_failed:
+            st.error("تعذّر إكمال التحليل، جرّب الإرسال مرة ثانية" if is_arabic else "Analysis failed, please submit again")
+            return False
+        st.caption("… لسه يجهّز" if is_arabic else "… still preparing")
+
+    _wait_for_result()
 
 # ===================== عرض النتيجة =====================
 elif st.session_state.view == "result":
@@ -5,39 +5,68 @@ core/app_config.py
 Loader لإعدادات التطبيق من ملف محلي + اختيارياً من رابط خارجي.
 - يقرأ: data/app_config.json (إن وُجد)
 - يدمج مع نسخة remote JSON (إن تم ضبط remote.config_url)
-- يدعم cache مع TTL تلقائي
 - ENV تظل أعلى أولوية لو حاب تتجاوز (مثال CHAT_MODEL)
+
+التحديث في الخلفية (stale-while-revalidate):
+- get_config() لا يقرأ ملفات ولا يتصل بالشبكة ولا ينتظر قفل؛ يرجّع آخر snapshot سليمة
+  (أول استدعاء فقط يقرأ الملف المحلي مرة واحدة)
+- خيط واحد يفحص mtime الملف كل _CHECK_SECS، ويجلب النسخة البعيدة كل refresh_secs
+  مع ETag / If-None-Match (رد 304 = نفس النسخة بدون تحميل)
+- كل تحديث يبني snapshot جديدة ويبدّلها مرة واحدة؛ الـ snapshot المنشورة مجمّدة:
+  القواميس MappingProxyType والقوائم tuple (أي تعديل يرمي TypeError)، فالقرّاء
+  يتشاركونها بأمان بدون نسخ
+- فشل القراءة/الجلب يبقي آخر نسخة سليمة
 """
 
 from __future__ import annotations
-import os, json, time, threading
-from typing import Any, Dict
+import os, json, time, copy, threading
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
 
 _CFG_PATH = os.getenv("APPCONFIG_PATH", "data/app_config.json")
-_TTL_SECS = 60           # إعادة قراءة الملف المحلي كل ~دقيقة
+_CHECK_SECS = 5          # فحص mtime الملف المحلي
 _REMOTE_TTL_SECS = 900   # إعادة جلب النسخة البعيدة كل ~15 دقيقة
-_LOCK = threading.RLock()
+_LOCK = threading.RLock()  # لحالة المحدّث فقط، القرّاء لا يلمسونه
+
+_snapshot: Optional[Mapping[str, Any]] = None
+_local_cfg: Dict[str, Any] = {}
+_local_sig: Optional[Tuple[int, int]] = None
+_remote_cfg: Dict[str, Any] = {}
+_remote_etag: Optional[str] = None
+_remote_url: Optional[str] = None
+_next_remote = 0.0
+_refresher: Optional[threading.Thread] = None
 
-_cache: Dict[str, Any] = {}
-_last_read_local = 0.0
-_last_read_remote = 0.0
+def _local_signature() -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(_CFG_PATH)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
 
-def _read_local() -> Dict[str, Any]:
+def _read_local() -> Optional[Dict[str, Any]]:
+    """None لو الملف موجود لكن تالف (نبقي النسخة السابقة)"""
     try:
         with open(_CFG_PATH, "r", encoding="utf-8") as f:
             return json.load(f)
-    except Exception:
+    except FileNotFoundError:
         return {}
+    except Exception:
+        return None
 
-def _fetch_remote(url: str, timeout: int = 8) -> Dict[str, Any]:
+def _fetch_remote(url: str, etag: Optional[str] = None, timeout: int = 8) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """(cfg, etag) — cfg=None يعني 304/فشل: استمر على النسخة الحالية"""
     try:
         import requests
-        r = requests.get(url, timeout=timeout)
+        headers = {"If-None-Match": etag} if etag else {}
+        r = requests.get(url, timeout=timeout, headers=headers)
+        if r.status_code == 304:
+            return None, etag
         if r.ok:
-            return r.json()
+            return r.json(), r.headers.get("ETag")
     except Exception:
         pass
-    return {}
+    return None, etag
 
 def _deep_merge(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
     out = dict(a)
@@ -59,52 +88,106 @@ def _env_overrides(cfg: Dict[str, Any]) -> Dict[str, Any]:
         cfg["app_version"] = os.getenv("APP_VERSION")
     return cfg
 
-def get_config() -> Dict[str, Any]:
-    global _cache, _last_read_local, _last_read_remote
-    now = time.time()
+def _apply_defaults(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    cfg.setdefault("app_version", "dev")
+    cfg.setdefault("llm", {}).setdefault("model", "gpt-4o")
+
+    rec = cfg.setdefault("recommendations", {})
+    rec.setdefault("allow_sport_names", True)
+    rec.setdefault("min_chars", 220)
+    rec.setdefault("require_win_condition", True)
+    rec.setdefault("min_core_skills", 3)
+
+    ana = cfg.setdefault("analysis", {})
+    eg  = ana.setdefault("egate", {})
+    eg.setdefault("min_answered", 3)
+    eg.setdefault("min_total_chars", 120)
+    eg.setdefault("required_keys", [])
+
+    sec = cfg.setdefault("security", {})
+    sec.setdefault("scrub_urls", True)
+    sec.setdefault("allowed_domains", ["sportsync.ai"])  # للسماح بروابط محدّدة فقط
+
+    # sinks افتراضات للتليمتري (api/event_pipeline.py يقرأها من هنا)
+    cfg["sinks"] = cfg.get("sinks") or {
+        "disk": {"enabled": True, "path": "./data/events.jsonl"},
+        "sqlite": {"enabled": False, "path": "./data/sportsync.db"},
+        "webhook": {"enabled": False, "url": ""},
+        "gsheets": {"enabled": False, "sheet_id": "", "service_account_json": ""}
+    }
+    return cfg
+
+def _freeze(value: Any) -> Any:
+    """نسخة read-only متداخلة: dict -> MappingProxyType، list -> tuple"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def _build_snapshot() -> Mapping[str, Any]:
+    cfg = copy.deepcopy(_deep_merge(_local_cfg, _remote_cfg))
+    return _freeze(_apply_defaults(_env_overrides(cfg)))
+
+def refresh_config(force: bool = False, remote: bool = True) -> bool:
+    """
+    دورة تحديث واحدة (يستدعيها خيط الخلفية)؛ ترجع True لو تبدّلت الـ snapshot
+    force: أعد القراءة/الجلب حتى لو ما تغيّر mtime أو ما انتهى الـ TTL
+    """
+    global _snapshot, _local_cfg, _local_sig, _remote_cfg, _remote_etag, _remote_url, _next_remote
     with _LOCK:
-        need_local = (now - _last_read_local) > _TTL_SECS or not _cache
-        if need_local:
+        changed = _snapshot is None
+
+        sig = _local_signature()
+        if force or sig != _local_sig:
             local_cfg = _read_local()
-            _cache = local_cfg
-            _last_read_local = now
-
-        # remote merge (لو مضبوط)
-        remote = (_cache.get("remote") or {})
-        url = remote.get("config_url")
-        refresh = int(remote.get("refresh_secs", _REMOTE_TTL_SECS))
-        if url and ((now - _last_read_remote) > max(30, refresh)):
-            remote_cfg = _fetch_remote(url)
-            if remote_cfg:
-                _cache = _deep_merge(_cache, remote_cfg)
-            _last_read_remote = now
-
-        _cache = _env_overrides(_cache)
-
-        # Defaults
-        _cache.setdefault("app_version", "dev")
-        _cache.setdefault("llm", {}).setdefault("model", "gpt-4o")
-
-        rec = _cache.setdefault("recommendations", {})
-        rec.setdefault("allow_sport_names", True)
-        rec.setdefault("min_chars", 220)
-        rec.setdefault("require_win_condition", True)
-        rec.setdefault("min_core_skills", 3)
-
-        ana = _cache.setdefault("analysis", {})
-        eg  = ana.setdefault("egate", {})
-        eg.setdefault("min_answered", 3)
-        eg.setdefault("min_total_chars", 120)
-        eg.setdefault("required_keys", [])
-
-        sec = _cache.setdefault("security", {})
-        sec.setdefault("scrub_urls", True)
-        sec.setdefault("allowed_domains", ["sportsync.ai"])  # للسماح بروابط محدّدة فقط
-
-        # sinks افتراضات للتليمتري
-        _cache["sinks"] = _cache.get("sinks") or {
-            "disk": {"enabled": True, "path": "./data/events.jsonl"},
-            "webhook": {"enabled": False, "url": ""},
-            "gsheets": {"enabled": False, "sheet_id": "", "service_account_json": ""}
-        }
-        return _cache
+            if local_cfg is not None and local_cfg != _local_cfg:
+                _local_cfg = local_cfg
+                changed = True
+            _local_sig = sig
+
+        remote_opts = _local_cfg.get("remote") or {}
+        url = remote_opts.get("config_url")
+        if url != _remote_url:
+            # رابط جديد/محذوف: لا نخلط إعدادات مصدر قديم
+            _remote_url, _remote_cfg, _remote_etag, _next_remote = url, {}, None, 0.0
+            changed = True
+        now = time.time()
+        if remote and url and (force or now >= _next_remote):
+            remote_cfg, _remote_etag = _fetch_remote(url, _remote_etag)
+            if remote_cfg is not None and remote_cfg != _remote_cfg:
+                _remote_cfg = remote_cfg
+                changed = True
+            _next_remote = now + max(30, int(remote_opts.get("refresh_secs", _REMOTE_TTL_SECS)))
+
+        if changed:
+            _snapshot = _build_snapshot()  # تبديل ذري للمرجع
+        return changed
+
+def _refresh_loop():
+    while True:
+        try:
+            refresh_config()
+        except Exception as e:
+            print(f"⚠️ app_config refresh failed, keeping last good config: {e}")
+        time.sleep(_CHECK_SECS)
+
+def _ensure_refresher():
+    global _refresher
+    if _refresher is None:
+        with _LOCK:
+            if _refresher is None:
+                _refresher = threading.Thread(target=_refresh_loop, name="app-config-refresher", daemon=True)
+                _refresher.start()
+
+def get_config() -> Mapping[str, Any]:
+    """آخر snapshot سليمة (مجمّدة، للقراءة فقط) — بدون I/O بعد أول استدعاء"""
+    snapshot = _snapshot
+    if snapshot is None:
+        # أول استدعاء: الملف المحلي فقط، والنسخة البعيدة تُجلب في الخلفية
+        with _LOCK:
+            if _snapshot is None:
+                refresh_config(remote=False)
+        snapshot = _snapshot
+    _ensure_refresher()
+    return snapshot
@@ -0,0 +1,226 @@
+"""
+Compiled Sports Database
+Memory-mapped binary form of data/sports_database.json
+
+FILE LAYOUT (data/sports_database.bin):
+    8 bytes   magic b"SSDBv1\\0\\0"
+    8 bytes   header length (little-endian uint64)
+    N bytes   header JSON (format version, source version, counts,
+              categories, section offsets, SHA-256 of the body)
+    body      64-byte aligned sections:
+              z           float32 (n_sports, 7)   z-scores in Z_AXES order
+              mask        uint8   (n_sports, 7)   1 where the sport defines the axis
+              category    int32   (n_sports,)     index into header["categories"]
+              str_offsets uint64  (n_sports + 1,) byte offsets into strings
+              strings     UTF-8 compact JSON of each sport record
+
+Arrays are views on one shared mmap, so every worker process shares the
+same OS page-cache pages. Sport records (names, descriptions) are decoded
+lazily, one sport at a time, only when a recommendation needs them.
+
+USAGE:
+    python compiled_sports_db.py data/sports_database.json [data/sports_database.bin]
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from functools import lru_cache
+from typing import Any, Dict, List
+
+import numpy as np
+
+from local_sports_db import Z_AXES
+
+MAGIC = b"SSDBv1\0\0"
+FORMAT_VERSION = 1
+ALIGN = 64
+
+
+def default_compiled_path(json_path: str) -> str:
+    root, _ = os.path.splitext(json_path)
+    return root + ".bin"
+
+
+def _pad(buf: bytearray) -> None:
+    buf.extend(b"\0" * (-len(buf) % ALIGN))
+
+
+def compile_database(json_path: str, out_path: str = None) -> str:
+    """Compile the JSON catalog into the binary format; returns the output path"""
+    out_path = out_path or default_compiled_path(json_path)
+    with open(json_path, "r", encoding="utf-8") as f:
+        database = json.load(f)
+
+    sports = database["sports"]
+    categories = list(database.get("categories") or [])
+    for sport in sports:
+        if sport.get("category") not in categories:
+            categories.append(sport.get("category"))
+    category_ids = {c: i for i, c in enumerate(categories)}
+
+    z = np.zeros((len(sports), len(Z_AXES)), dtype="<f4")
+    mask = np.zeros((len(sports), len(Z_AXES)), dtype=np.uint8)
+    codes = np.zeros(len(sports), dtype="<i4")
+    offsets = np.zeros(len(sports) + 1, dtype="<u8")
+    strings = bytearray()
+    for row, sport in enumerate(sports):
+        scores = sport.get("z_scores", {})
+        for col, axis in enumerate(Z_AXES):
+            if axis in scores:
+                z[row, col] = scores[axis]
+                mask[row, col] = 1
+        codes[row] = category_ids[sport.get("category")]
+        strings.extend(json.dumps(sport, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        offsets[row + 1] = len(strings)
+
+    body = bytearray()
+    sections = {}
+    for name, data in (
+        ("z", z.tobytes()),
+        ("mask", mask.tobytes()),
+        ("category", codes.tobytes()),
+        ("str_offsets", offsets.tobytes()),
+        ("strings", bytes(strings)),
+    ):
+        _pad(body)
+        sections[name] = [len(body), len(data)]
+        body.extend(data)
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "source_version": database.get("version"),
+        "total_sports": len(sports),
+        "axes": Z_AXES,
+        "categories": categories,
+        "category_counts": database.get("category_counts", {}),
+        "sections": sections,
+        "body_sha256": hashlib.sha256(body).hexdigest(),
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    prefix = MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes
+    prefix += b"\0" * (-len(prefix) % ALIGN)
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(prefix)
+        f.write(body)
+    os.replace(tmp_path, out_path)
+    print(f"✓ Compiled {len(sports)} sports → {out_path} ({len(prefix) + len(body)} bytes)")
+    return out_path
+
+
+class LazySportList:
+    """Sequence of sport dicts decoded on demand from the string table"""
+
+    def __init__(self, strings, offsets):
+        self._strings = strings
+        self._offsets = offsets
+        self._decode = lru_cache(maxsize=4096)(self._decode_uncached)
+
+    def _decode_uncached(self, index: int) -> Dict[str, Any]:
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        return json.loads(bytes(self._strings[start:end]).decode("utf-8"))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = int(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._decode(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class CompiledSportsDatabase:
+    """Read-only, memory-mapped view of a compiled catalog"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compiled sports database")
+        (header_len,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        self.header = json.loads(self._mmap[header_start:header_start + header_len].decode("utf-8"))
+        if self.header.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled format {self.header.get('format_version')}")
+        if self.header.get("axes") != Z_AXES:
+            raise ValueError("Compiled axes do not match Z_AXES; recompile the database")
+
+        self.body_offset = header_start + header_len + (-(header_start + header_len) % ALIGN)
+        n = self.header["total_sports"]
+        self.z_matrix = self._array("z", "<f4").reshape(n, len(Z_AXES))
+        self.z_mask = self._array("mask", np.bool_).reshape(n, len(Z_AXES))
+        self.category_codes = self._array("category", "<i4")
+        self.sports = LazySportList(self._section("strings"), self._array("str_offsets", "<u8"))
+
+    def _section(self, name: str) -> memoryview:
+        offset, size = self.header["sections"][name]
+        start = self.body_offset + offset
+        return memoryview(self._mmap)[start:start + size]
+
+    def _array(self, name: str, dtype) -> np.ndarray:
+        return np.frombuffer(self._section(name), dtype=dtype)
+
+    def verify(self) -> bool:
+        """Recompute the body checksum (reads the whole file)"""
+        body = memoryview(self._mmap)[self.body_offset:]
+        sections = self.header["sections"]
+        body_len = max(offset + size for offset, size in sections.values())
+        return hashlib.sha256(body[:body_len]).hexdigest() == self.header["body_sha256"]
+
+    def as_database(self) -> Dict[str, Any]:
+        """Same shape as the parsed JSON catalog (sports decoded lazily)"""
+        return {
+            "version": self.header.get("source_version"),
+            "total_sports": self.header["total_sports"],
+            "categories": self.header["categories"],
+            "category_counts": self.header.get("category_counts", {}),
+            "sports": self.sports,
+        }
+
+    def category_rows(self) -> Dict[str, np.ndarray]:
+        categories = self.header["categories"]
+        order = np.argsort(self.category_codes, kind="stable")
+        bounds = np.searchsorted(self.category_codes[order], np.arange(len(categories) + 1))
+        return {
+            categories[code]: order[bounds[code]:bounds[code + 1]].astype(np.intp)
+            for code in range(len(categories))
+            if bounds[code + 1] > bounds[code]
+        }
+
+
+def is_fresh(json_path: str, compiled_path: str) -> bool:
+    """Compiled file exists and is at least as new as the JSON source"""
+    if not os.path.exists(compiled_path):
+        return False
+    if not os.path.exists(json_path):
+        return True
+    return os.path.getmtime(compiled_path) >= os.path.getmtime(json_path)
+
+
+def main(argv: List[str]) -> None:
+    if not argv:
+        print("Usage: python compiled_sports_db.py <sports_database.json> [out.bin]")
+        sys.exit(1)
+    out = compile_database(argv[0], argv[1] if len(argv) > 1 else None)
+    db = CompiledSportsDatabase(out)
+    print(f"✓ Checksum {'OK' if db.verify() else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -5,5 +5,6 @@ Components Package
 
 from . import session_manager
 from . import ui_components
+from . import background_tasks
 
-__all__ = ['session_manager', 'ui_components']
+__all__ = ['session_manager', 'ui_components', 'background_tasks']
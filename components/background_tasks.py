@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Background Tasks - SportSync AI v2
+تشغيل المهام الثقيلة خارج خيط Streamlit
+
+- One process-wide thread pool runs analyses / video jobs keyed by
+  (session_id, kind). Reruns only poll; they never restart or block on work.
+- submit() is idempotent: a running or finished task for the same key is
+  returned as-is, so double clicks and page navigation do not restart it.
+- Jobs receive a TaskContext: ctx.progress(stage, completed, total) for the
+  UI and ctx.cancelled() / ctx.cancel_event for cooperative cancellation.
+  Code that cannot check it (e.g. the video pipeline) runs through
+  run_cancellable(), which executes it in a child process and kills that
+  process on cancel, so the pool worker is freed.
+- Every script run calls heartbeat(session_id), which also remembers the
+  Streamlit connection. A reaper cancels tasks of sessions that are neither
+  seen for abandon_secs nor still connected, and forgets finished ones
+  after ttl_secs.
+"""
+
+import importlib
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+ACTIVE_STATES = ("pending", "running")
+
+
+class TaskContext:
+    """Handed to the job function (runs in a worker thread, no Streamlit calls)"""
+
+    def __init__(self, task: Dict[str, Any], lock: threading.Lock):
+        self._task = task
+        self._lock = lock
+        self._cancel = threading.Event()
+
+    def progress(self, stage: str, completed: int, total: int) -> None:
+        with self._lock:
+            self._task["progress"] = {"stage": stage, "completed": completed, "total": total}
+
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def cancel_event(self) -> threading.Event:
+        """Set when the task is cancelled (pass it to code that can stop early)"""
+        return self._cancel
+
+
+def _streamlit_session_id() -> Optional[str]:
+    """Id of the Streamlit connection running this script, if any"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        return None
+    return ctx.session_id if ctx else None
+
+
+def _streamlit_session_active(runtime_id: str) -> bool:
+    try:
+        from streamlit.runtime import Runtime
+        return Runtime.exists() and Runtime.instance().is_active_session(runtime_id)
+    except Exception:
+        return False
+
+
+class BackgroundTasks:
+    """Session-keyed background jobs with server-side results"""
+
+    def __init__(self, max_workers: int = 4, abandon_secs: float = 300, ttl_secs: float = 3600,
+                 is_connected: Callable[[str], bool] = _streamlit_session_active):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bg-task")
+        self._lock = threading.Lock()
+        self._tasks: Dict[tuple, Dict[str, Any]] = {}
+        self._contexts: Dict[str, TaskContext] = {}
+        self._futures: Dict[str, Any] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._connections: Dict[str, str] = {}
+        self._is_connected = is_connected
+        self.abandon_secs = abandon_secs
+        self.ttl_secs = ttl_secs
+        self._reaper = threading.Thread(target=self._reap_loop, name="bg-task-reaper", daemon=True)
+        self._reaper.start()
+
+    # ---------- submission ----------
+
+    def submit(self, session_id: str, kind: str, fn: Callable[..., Any], *args,
+               restart: bool = False, **kwargs) -> Dict[str, Any]:
+        """Start fn(ctx, *args, **kwargs) unless (session_id, kind) already has a live/finished task"""
+        key = (session_id, kind)
+        with self._lock:
+            self._last_seen[session_id] = time.monotonic()
+            existing = self._tasks.get(key)
+            if existing and not restart and existing["state"] not in ("error", "cancelled"):
+                return dict(existing)
+            if existing and existing["state"] in ACTIVE_STATES:
+                self._cancel_locked(existing)
+
+            task = {
+                "id": uuid.uuid4().hex[:12],
+                "session_id": session_id,
+                "kind": kind,
+                "state": "pending",
+                "progress": None,
+                "result": None,
+                "error": None,
+                "submitted_at": time.time(),
+                "finished_at": None
+            }
+            ctx = TaskContext(task, self._lock)
+            self._tasks[key] = task
+            self._contexts[task["id"]] = ctx
+            self._futures[task["id"]] = self._pool.submit(self._run, task, ctx, fn, args, kwargs)
+            return dict(task)
+
+    def _run(self, task, ctx, fn, args, kwargs):
+        with self._lock:
+            if ctx.cancelled():
+                return
+            task["state"] = "running"
+        try:
+            result = fn(ctx, *args, **kwargs)
+            outcome = ("cancelled", None, None) if ctx.cancelled() else ("done", result, None)
+        except Exception as e:
+            outcome = ("cancelled", None, None) if ctx.cancelled() else ("error", None, str(e))
+        with self._lock:
+            if task["state"] != "cancelled":
+                task["state"], task["result"], task["error"] = outcome
+            task["finished_at"] = time.time()
+            self._contexts.pop(task["id"], None)
+            self._futures.pop(task["id"], None)
+
+    # ---------- polling ----------
+
+    def status(self, session_id: str, kind: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of the task (None if never submitted / expired); counts as a heartbeat"""
+        with self._lock:
+            self._last_seen[session_id] = time.monotonic()
+            task = self._tasks.get((session_id, kind))
+            return dict(task) if task else None
+
+    def heartbeat(self, session_id: str, connection_id: Optional[str] = None) -> None:
+        """
+        Mark the session as alive; call on every script run, whatever the page
+        The Streamlit connection is remembered so tasks survive while the
+        browser stays connected without rerunning (e.g. reading results).
+        """
+        connection_id = connection_id or _streamlit_session_id()
+        with self._lock:
+            self._last_seen[session_id] = time.monotonic()
+            if connection_id:
+                self._connections[session_id] = connection_id
+
+    def _abandoned(self, session_id: str, now: float) -> bool:
+        if now - self._last_seen.get(session_id, now) <= self.abandon_secs:
+            return False
+        connection_id = self._connections.get(session_id)
+        return not (connection_id and self._is_connected(connection_id))
+
+    # ---------- cancellation / cleanup ----------
+
+    def _cancel_locked(self, task: Dict[str, Any]) -> None:
+        ctx = self._contexts.pop(task["id"], None)
+        if ctx:
+            ctx._cancel.set()
+        future = self._futures.pop(task["id"], None)
+        if future:
+            future.cancel()
+        task["state"] = "cancelled"
+        task["finished_at"] = time.time()
+
+    def cancel(self, session_id: str, kind: Optional[str] = None) -> int:
+        """Cancel the session's active tasks (all kinds when kind is None)"""
+        cancelled = 0
+        with self._lock:
+            for (sid, k), task in self._tasks.items():
+                if sid == session_id and (kind is None or k == kind) and task["state"] in ACTIVE_STATES:
+                    self._cancel_locked(task)
+                    cancelled += 1
+        return cancelled
+
+    def reap(self) -> None:
+        now, wall = time.monotonic(), time.time()
+        with self._lock:
+            for key, task in list(self._tasks.items()):
+                if task["state"] in ACTIVE_STATES and self._abandoned(task["session_id"], now):
+                    self._cancel_locked(task)
+                    print(f"⚠️ Cancelled abandoned {task['kind']} task for session {task['session_id']}")
+                elif task["finished_at"] and wall - task["finished_at"] > self.ttl_secs:
+                    del self._tasks[key]
+            live_sessions = {sid for sid, _ in self._tasks}
+            for sid in list(self._last_seen):
+                if sid not in live_sessions:
+                    del self._last_seen[sid]
+                    self._connections.pop(sid, None)
+
+    def _reap_loop(self) -> None:
+        while True:
+            time.sleep(min(30.0, self.abandon_secs / 2))
+            try:
+                self.reap()
+            except Exception as e:
+                print(f"❌ Background task reaper error: {e}")
+
+
+_tasks: Optional[BackgroundTasks] = None
+_tasks_lock = threading.Lock()
+
+
+def get_background_tasks() -> BackgroundTasks:
+    """Process-wide executor shared by every Streamlit session"""
+    global _tasks
+    if _tasks is None:
+        with _tasks_lock:
+            if _tasks is None:
+                _tasks = BackgroundTasks()
+    return _tasks
+
+
+def _child_entry(conn, spec: str, args: tuple, kwargs: dict) -> None:
+    module_name, _, func_name = spec.partition(":")
+    try:
+        result = getattr(importlib.import_module(module_name), func_name)(*args, **kwargs)
+        conn.send(("done", result))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def run_cancellable(ctx: TaskContext, spec: str, *args, poll_secs: float = 0.5, **kwargs) -> Any:
+    """
+    Run "module:function"(*args, **kwargs) in a child process; terminate it
+    as soon as the task is cancelled (returns None then)
+    The function, its arguments and its result must be picklable.
+    """
+    parent, child = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.get_context("spawn").Process(
+        target=_child_entry, args=(child, spec, args, kwargs), daemon=True
+    )
+    proc.start()
+    child.close()
+    try:
+        while not parent.poll(poll_secs):
+            if ctx.cancelled():
+                return None
+            if not proc.is_alive():
+                raise RuntimeError(f"{spec} exited with code {proc.exitcode}")
+        status, value = parent.recv()
+        if status == "error":
+            raise RuntimeError(value)
+        return value
+    finally:
+        if proc.is_alive():
+            proc.terminate()
+        proc.join(timeout=5)
+        parent.close()
+
+
+def poll_every(seconds: float):
+    """
+    Decorator: re-run a UI function every `seconds` without rerunning the page
+    (st.fragment / st.experimental_fragment) until it returns False.
+
+    Fragments ignore return values, so a False return records a per-session
+    flag and reruns the app once; while the flag is set the function is
+    rendered as plain (non-polling) output. If it stops returning False
+    (e.g. a new task was submitted) polling resumes. On older Streamlit the
+    whole page reruns after `seconds` instead.
+    """
+    import streamlit as st
+    fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+    def decorator(fn):
+        if fragment is None:
+            def wrapper(*args, **kwargs):
+                if fn(*args, **kwargs) is not False:
+                    time.sleep(seconds)
+                    st.rerun()
+            return wrapper
+
+        stopped_key = f"_poll_stopped_{fn.__module__}.{fn.__qualname__}"
+
+        def rerun_app():
+            try:
+                st.rerun(scope="app")
+            except TypeError:  # st.experimental_fragment: no scope argument
+                st.rerun()
+
+        @fragment(run_every=seconds)
+        def polling(*args, **kwargs):
+            if fn(*args, **kwargs) is False:
+                st.session_state[stopped_key] = True
+                rerun_app()
+
+        def wrapper(*args, **kwargs):
+            if not st.session_state.get(stopped_key):
+                return polling(*args, **kwargs)
+            if fn(*args, **kwargs) is not False:
+                del st.session_state[stopped_key]
+                rerun_app()
+        return wrapper
+    return decorator
@@ -64,8 +64,17 @@ def init_session():
     if 'layer_z_result' not in st.session_state:
         st.session_state.layer_z_result = None
 
+    # Keep this session's background tasks alive on every page, not only while polling
+    from components.background_tasks import get_background_tasks
+    get_background_tasks().heartbeat(st.session_state.session_id)
+
 def reset_session():
     """إعادة تعيين الجلسة"""
+    # Stop background work that belonged to the old session
+    from components.background_tasks import get_background_tasks
+    if st.session_state.get('session_id'):
+        get_background_tasks().cancel(st.session_state.session_id)
+
     keys_to_keep = ['user_id', 'language']
     keys_to_remove = [key for key in st.session_state.keys() if key not in keys_to_keep]
     
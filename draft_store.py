@@ -0,0 +1,223 @@
+"""
+SportSync AI - Draft Store
+Quiz drafts for every user in one SQLite table, written only when they change
+
+- save() hashes the answers (canonical JSON); an unchanged draft is a
+  no-op in memory, so Streamlit reruns cost nothing on disk.
+- Changed drafts are buffered and written by one background thread at most
+  every DEBOUNCE_SECS, all users in a single transaction (atomic: a crash
+  leaves the previous committed drafts, never a half-written one).
+- load() prefers the buffered draft, then the batch being written, then the
+  table, then a legacy data/drafts/<user_id>.json file (imported on first
+  read; the file is removed once the import is committed).
+
+USAGE:
+    store = get_draft_store()
+    store.save(user_id, answers)   # every rerun, cheap
+    store.load(user_id)
+    store.delete(user_id)          # once the result is ready
+"""
+
+import atexit
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+DEBOUNCE_SECS = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    user_id TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    answers TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+UPSERT_DRAFT = (
+    "INSERT INTO drafts (user_id, digest, answers, updated_at) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(user_id) DO UPDATE SET digest = excluded.digest, "
+    "answers = excluded.answers, updated_at = excluded.updated_at"
+)
+
+_DELETED = object()
+
+
+def encode_answers(answers: Dict[str, Any]) -> Tuple[str, str]:
+    """(compact canonical JSON, sha256 digest)"""
+    raw = json.dumps(answers or {}, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return raw, hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DraftStore:
+    """Debounced, hash-diffed draft persistence"""
+
+    def __init__(self, db_path: str = "data/drafts.db", legacy_dir: Optional[str] = "data/drafts",
+                 debounce_secs: float = DEBOUNCE_SECS):
+        self.db_path = db_path
+        self.legacy_dir = Path(legacy_dir) if legacy_dir else None
+        self.debounce_secs = debounce_secs
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+
+        self._cond = threading.Condition()
+        self._digests: Dict[str, str] = {}   # last saved or pending digest per user
+        self._pending: Dict[str, Any] = {}   # user_id -> (raw, digest) | _DELETED
+        self._inflight: Dict[str, Any] = {}  # batch of the running flush, readable until it commits
+        self._legacy_imported: Set[str] = set()
+        self._flush_lock = threading.Lock()
+        self._first_pending_at: Optional[float] = None
+        self._closed = False
+        self.writes = 0
+
+        self._thread = threading.Thread(target=self._flush_loop, name="draft-store", daemon=True)
+        self._thread.start()
+
+    # ---------- API ----------
+
+    def save(self, user_id: str, answers: Dict[str, Any]) -> bool:
+        """Buffer the draft if it changed; returns False for an unchanged draft"""
+        raw, digest = encode_answers(answers)
+        with self._cond:
+            if user_id not in self._digests:
+                self._digests[user_id] = self._stored_digest(user_id)
+            if self._digests[user_id] == digest:
+                return False
+            self._digests[user_id] = digest
+            self._pending[user_id] = (raw, digest)
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+                self._cond.notify()
+        return True
+
+    def load(self, user_id: str) -> Dict[str, Any]:
+        with self._cond:
+            pending = self._pending.get(user_id, self._inflight.get(user_id))
+        if pending is _DELETED:
+            return {}
+        if pending is not None:
+            return json.loads(pending[0])
+
+        with self._db_lock:
+            row = self._conn.execute("SELECT answers FROM drafts WHERE user_id = ?", (user_id,)).fetchone()
+        if row:
+            return json.loads(row[0])
+        return self._import_legacy(user_id)
+
+    def delete(self, user_id: str) -> None:
+        with self._cond:
+            self._digests[user_id] = None
+            self._pending[user_id] = _DELETED
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+                self._cond.notify()
+        if self.legacy_dir:
+            (self.legacy_dir / f"{user_id}.json").unlink(missing_ok=True)
+
+    # ---------- persistence ----------
+
+    def _stored_digest(self, user_id: str) -> Optional[str]:
+        with self._db_lock:
+            row = self._conn.execute("SELECT digest FROM drafts WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def _import_legacy(self, user_id: str) -> Dict[str, Any]:
+        if not self.legacy_dir:
+            return {}
+        path = self.legacy_dir / f"{user_id}.json"
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                answers = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        with self._cond:
+            self._legacy_imported.add(user_id)
+        self.save(user_id, answers)
+        return answers
+
+    def flush(self) -> int:
+        """Write every buffered change in one transaction; returns rows written"""
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        with self._cond:
+            batch, self._pending = self._pending, {}
+            self._inflight = batch
+            self._first_pending_at = None
+        if not batch:
+            return 0
+
+        now = time.time()
+        upserts = [(uid, v[1], v[0], now) for uid, v in batch.items() if v is not _DELETED]
+        deletes = [(uid,) for uid, v in batch.items() if v is _DELETED]
+        try:
+            with self._db_lock, self._conn:
+                if upserts:
+                    self._conn.executemany(UPSERT_DRAFT, upserts)
+                if deletes:
+                    self._conn.executemany("DELETE FROM drafts WHERE user_id = ?", deletes)
+        except sqlite3.Error as e:
+            print(f"❌ Draft flush failed ({len(batch)} drafts kept for retry): {e}")
+            with self._cond:
+                for uid, value in batch.items():
+                    self._pending.setdefault(uid, value)
+                self._inflight = {}
+                if self._first_pending_at is None:
+                    self._first_pending_at = time.monotonic()
+            return 0
+        with self._cond:
+            self._inflight = {}
+            imported = self._legacy_imported & batch.keys()
+            self._legacy_imported -= imported
+        for uid in imported:
+            # Committed: the legacy file must never be imported over a newer draft again
+            (self.legacy_dir / f"{uid}.json").unlink(missing_ok=True)
+        self.writes += 1
+        return len(batch)
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._first_pending_at is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # Coalesce: everything saved within the window goes in one write
+                remaining = self._first_pending_at + self.debounce_secs - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+            self.flush()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+
+_store: Optional[DraftStore] = None
+_store_lock = threading.Lock()
+
+
+def get_draft_store(db_path: str = "data/drafts.db") -> DraftStore:
+    """Process-wide draft store (flushed on interpreter exit)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DraftStore(db_path)
+            atexit.register(_store.close)
+        return _store
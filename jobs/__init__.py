@@ -0,0 +1,37 @@
+"""
+Jobs Package
+Durable job queue + worker pool for long-running analyses
+"""
+
+from typing import Any, Dict, Optional
+
+from jobs.progress import ProgressReporter, read_progress, clear_progress
+from jobs.store import FileJobStore, SQLiteJobStore, get_job_store
+from jobs.notify import ResultWatcher, get_result_watcher
+
+
+def submit_to_queue(user_id: str, answers: Dict[str, Any], lang: str, store=None) -> Dict[str, Any]:
+    """Enqueue an analysis for user_id (idempotent: same answers -> same job)"""
+    store = store or get_job_store()
+    return store.enqueue(user_id, {"user_id": user_id, "answers": answers, "lang": lang})
+
+
+def check_result(user_id: str, store=None) -> Optional[Dict[str, Any]]:
+    """Finished result for user_id, or None while it is still queued/running"""
+    store = store or get_job_store()
+    return store.get_result(user_id)
+
+
+def job_status(user_id: str, store=None) -> Optional[str]:
+    """"pending" | "leased" | "done" | "failed" | None"""
+    store = store or get_job_store()
+    job = store.get(user_id)
+    return job["status"] if job else None
+
+
+__all__ = [
+    'FileJobStore', 'SQLiteJobStore', 'get_job_store',
+    'ProgressReporter', 'read_progress', 'clear_progress',
+    'ResultWatcher', 'get_result_watcher',
+    'submit_to_queue', 'check_result', 'job_status',
+]
@@ -0,0 +1,170 @@
+"""
+SportSync AI - Job Readiness Notifications
+Tells waiting views the moment a result or progress record is written
+
+- One ResultWatcher per process watches data/ready_results and
+  data/job_progress (the SQLite store mirrors results to ready_results too).
+- File-system cost is bounded by the number of directories, not the number
+  of waiting users: each tick stats the directory and rescans it only when
+  its mtime moved. With the optional `watchdog` package installed, inotify
+  (or the platform equivalent) wakes the scanner immediately.
+- Waiters read in-memory state: version(kind, job_id) is a counter that
+  changes whenever that job's file appears, changes or disappears, and
+  wait() long-polls until it does.
+
+USAGE:
+    watcher = get_result_watcher()
+    seen = watcher.version("done", user_id)
+    if watcher.wait("done", user_id, since=seen, timeout=1.0):
+        result = check_result(user_id)
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None  # Optional: native file-system events
+
+POLL_SECS = 0.5
+# Directory mtimes can be coarse on some file systems; keep rescanning for
+# a moment after a change so a second write in the same tick is not missed
+SETTLE_SECS = 2.0
+
+WATCHED = {"done": "ready_results", "progress": "job_progress"}
+
+
+class ResultWatcher:
+    """Process-wide watcher over the result/progress directories"""
+
+    def __init__(self, root: str = "data", poll_secs: float = POLL_SECS):
+        self.root = Path(root)
+        self.dirs = {kind: self.root / name for kind, name in WATCHED.items()}
+        for d in self.dirs.values():
+            d.mkdir(parents=True, exist_ok=True)
+        self.poll_secs = poll_secs
+        self._cond = threading.Condition()
+        self._files: Dict[str, Dict[str, int]] = {kind: {} for kind in self.dirs}
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._dir_state: Dict[str, Tuple[int, float]] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._observer = None
+
+        self.scan()
+        self._start_observer()
+        self._thread = threading.Thread(target=self._loop, name="result-watcher", daemon=True)
+        self._thread.start()
+
+    # ---------- scanning ----------
+
+    def _scan_dir(self, kind: str, force: bool = False) -> None:
+        path = self.dirs[kind]
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        now = time.monotonic()
+        last_mtime, changed_at = self._dir_state.get(kind, (None, 0.0))
+        if not force and mtime == last_mtime and now - changed_at > SETTLE_SECS:
+            return
+        if mtime != last_mtime:
+            changed_at = now
+        self._dir_state[kind] = (mtime, changed_at)
+
+        current = {}
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name.endswith(".json") and not entry.name.startswith("."):
+                    try:
+                        current[entry.name[:-5]] = entry.stat().st_mtime_ns
+                    except FileNotFoundError:
+                        pass
+
+        with self._cond:
+            previous = self._files[kind]
+            changed = [k for k in current.keys() | previous.keys() if current.get(k) != previous.get(k)]
+            self._files[kind] = current
+            for job_id in changed:
+                key = (kind, job_id)
+                self._versions[key] = self._versions.get(key, 0) + 1
+            if changed:
+                self._cond.notify_all()
+
+    def scan(self, force: bool = False) -> None:
+        for kind in self.dirs:
+            self._scan_dir(kind, force)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_secs)
+            self._wake.clear()
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"❌ Result watcher scan error: {e}")
+
+    def _start_observer(self) -> None:
+        if Observer is None:
+            return
+        wake = self._wake
+
+        class _Wake(FileSystemEventHandler):
+            def on_any_event(self, event):
+                wake.set()
+
+        try:
+            self._observer = Observer()
+            for d in self.dirs.values():
+                self._observer.schedule(_Wake(), str(d), recursive=False)
+            self._observer.daemon = True
+            self._observer.start()
+        except Exception as e:
+            print(f"⚠️ File-system events unavailable, polling every {self.poll_secs}s: {e}")
+            self._observer = None
+
+    # ---------- waiter side ----------
+
+    def version(self, kind: str, job_id: str) -> int:
+        """Change counter for the job's file (0 = never seen)"""
+        with self._cond:
+            return self._versions.get((kind, job_id), 0)
+
+    def exists(self, kind: str, job_id: str) -> bool:
+        with self._cond:
+            return job_id in self._files[kind]
+
+    def is_ready(self, job_id: str) -> bool:
+        return self.exists("done", job_id)
+
+    def wait(self, kind: str, job_id: str, since: int = 0, timeout: Optional[float] = None) -> int:
+        """Block until version(kind, job_id) != since; returns the new version or 0 on timeout"""
+        key = (kind, job_id)
+        with self._cond:
+            self._cond.wait_for(lambda: self._versions.get(key, 0) != since, timeout)
+            version = self._versions.get(key, 0)
+            return version if version != since else 0
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
+
+
+_watchers: Dict[str, ResultWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def get_result_watcher(root: str = "data") -> ResultWatcher:
+    """Shared watcher for root (one scanner thread per process, however many waiters)"""
+    key = str(Path(root).resolve())
+    with _watchers_lock:
+        if key not in _watchers:
+            _watchers[key] = ResultWatcher(root)
+        return _watchers[key]
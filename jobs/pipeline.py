@@ -0,0 +1,85 @@
+"""
+SportSync AI - Dual-AI Job Handler
+Runs the same pipeline as /api/analyze inside a queue worker
+"""
+
+from typing import Any, Callable, Dict, List
+
+
+def normalize_answers(answers: Any, questions: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """
+    Convert quiz answers to the API format [{"question_key", "answer_text"}]
+    Accepts the API list format as-is, or the Streamlit dict format
+    {question key or question text: answer or [answers]}.
+    """
+    if isinstance(answers, list):
+        return answers
+
+    by_text = {}
+    for q in questions or []:
+        for field in ("key", "question_ar", "question_en"):
+            if q.get(field):
+                by_text[q[field]] = q["key"]
+
+    normalized = []
+    for question, value in (answers or {}).items():
+        q_key = by_text.get(question, question)
+        values = value if isinstance(value, list) else [value]
+        for v in values:
+            if isinstance(v, dict):
+                v = v.get("answer_text") or v.get("answer") or ""
+            if v:
+                normalized.append({"question_key": q_key, "answer_text": str(v)})
+    return normalized
+
+
+def run_dual_ai_job(payload: Dict[str, Any], report: Callable[[str, int, str], None]) -> Dict[str, Any]:
+    """
+    Job handler: scores -> Reasoning AI -> Intelligence AI
+    Returns the result document written to ready_results/<job_id>.json
+    """
+    from api.index import (
+        QUESTIONS_DATA,
+        calculate_personality_scores,
+        analyze_personality_with_reasoning_ai,
+        generate_unique_sports_with_ai,
+        determine_profile_type,
+    )
+
+    lang = payload.get("lang", "ar")
+    lang = "ar" if lang in ("ar", "العربية") else "en"
+    answers = normalize_answers(payload.get("answers", {}), QUESTIONS_DATA)
+
+    report("scoring", 10, "Calculating personality scores")
+    z_scores = calculate_personality_scores(answers)
+
+    report("reasoning_ai", 30, "Deep personality analysis")
+    reasoning = analyze_personality_with_reasoning_ai(z_scores, answers, lang)
+
+    report("intelligence_ai", 65, "Generating unique sports")
+    sports = generate_unique_sports_with_ai(z_scores, lang, reasoning)
+
+    name_key = "name_ar" if lang == "ar" else "name_en"
+    desc_key = "description_ar" if lang == "ar" else "description_en"
+    recommendations = [
+        {
+            "sport": sport.get(name_key, sport.get("name_en", "Unknown")),
+            "description": sport.get(desc_key, ""),
+            "match_score": sport.get("match_score", 0.85),
+            "psychological_match": sport.get("psychological_match", "")
+        }
+        for sport in sports
+    ]
+
+    report("done", 100, "Analysis complete")
+    return {
+        "user_id": payload.get("user_id"),
+        "personality_scores": z_scores,
+        "recommendations": recommendations,
+        "reasoning_analysis": reasoning,
+        "analysis_summary": {
+            "total_questions_answered": len(answers),
+            "language": lang,
+            "profile_type": reasoning.get("personality_type", determine_profile_type(z_scores))
+        }
+    }
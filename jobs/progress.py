@@ -0,0 +1,44 @@
+"""
+SportSync AI - Job Progress Records
+Small per-job JSON files the Streamlit waiting view can poll cheaply
+"""
+
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from jobs.store import atomic_write_json, read_json
+
+PROGRESS_DIR = Path("data") / "job_progress"
+
+
+class ProgressReporter:
+    """
+    Writes the latest stage of a job to data/job_progress/<job_id>.json
+    Handlers receive an instance and call it as report(stage, percent, message).
+    """
+
+    def __init__(self, job_id: str, progress_dir: Path = PROGRESS_DIR):
+        self.job_id = job_id
+        self.path = Path(progress_dir) / f"{job_id}.json"
+
+    def __call__(self, stage: str, percent: int, message: str = "") -> None:
+        atomic_write_json(self.path, {
+            "job_id": self.job_id,
+            "stage": stage,
+            "percent": max(0, min(100, int(percent))),
+            "message": message,
+            "updated_at": time.time()
+        })
+
+
+def read_progress(job_id: str, progress_dir: Path = PROGRESS_DIR) -> Optional[Dict[str, Any]]:
+    """Latest progress record for a job, or None if nothing was reported yet"""
+    return read_json(Path(progress_dir) / f"{job_id}.json")
+
+
+def clear_progress(job_id: str, progress_dir: Path = PROGRESS_DIR) -> None:
+    try:
+        (Path(progress_dir) / f"{job_id}.json").unlink()
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,521 @@
+"""
+SportSync AI - Job Stores
+Durable queue backends for long-running analyses
+
+BACKENDS:
+1. FileJobStore: one JSON file per job, state = directory (atomic os.replace)
+2. SQLiteJobStore: single jobs table, claims inside BEGIN IMMEDIATE
+
+SEMANTICS (both backends):
+- Idempotent job IDs: re-enqueueing the same id + payload is a no-op
+- Leases: a claimed job belongs to one worker until its lease expires;
+  workers extend it with heartbeat(), expired leases are re-claimable
+- Retries: failed attempts are rescheduled with exponential backoff
+  until max_attempts, then moved to "failed"
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_LEASE_SECS = 60
+DEFAULT_MAX_ATTEMPTS = 3
+BACKOFF_BASE_SECS = 5
+BACKOFF_MAX_SECS = 300
+
+STATUSES = ("pending", "leased", "done", "failed")
+
+
+def payload_digest(payload: Dict[str, Any]) -> str:
+    """Stable hash of a job payload (used for idempotent enqueue)"""
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff for the given number of failed attempts"""
+    return min(BACKOFF_MAX_SECS, BACKOFF_BASE_SECS * (2 ** max(0, attempts - 1)))
+
+
+def atomic_write_json(path: Path, data: Any) -> None:
+    """Write JSON to a temp file in the same directory, then os.replace it"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _new_job(job_id: str, payload: Dict[str, Any], max_attempts: int) -> Dict[str, Any]:
+    now = time.time()
+    return {
+        "id": job_id,
+        "payload": payload,
+        "digest": payload_digest(payload),
+        "status": "pending",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "not_before": 0.0,
+        "lease_owner": None,
+        "lease_expires": 0.0,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+class FileJobStore:
+    """
+    File-based job queue
+
+    Layout (job_id.json in exactly one state directory):
+        pending_requests/   waiting to be claimed (also retries with not_before)
+        leased_requests/    claimed by a worker
+        failed_requests/    out of attempts
+        ready_results/      result payloads (what apps/app.py reads), plus a
+                            <id>.meta sidecar (digest, attempts) so finished
+                            jobs stay idempotent
+
+    A claim publishes the full leased record (owner + lease) by hard-linking
+    a temp file to leased/<id>.json (fails if the target exists), so only
+    one worker can win it, even across processes, and the reaper never sees
+    an unowned lease. The winner then takes the pending file by renaming it.
+    """
+
+    def __init__(self, root: str = "data"):
+        self.root = Path(root)
+        self.dirs = {
+            "pending": self.root / "pending_requests",
+            "leased": self.root / "leased_requests",
+            "failed": self.root / "failed_requests",
+            "done": self.root / "ready_results",
+        }
+        for d in self.dirs.values():
+            d.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, status: str, job_id: str) -> Path:
+        return self.dirs[status] / f"{job_id}.json"
+
+    def _meta_path(self, job_id: str) -> Path:
+        return self.dirs["done"] / f"{job_id}.meta"
+
+    def _locate(self, job_id: str) -> Optional[str]:
+        for status in ("leased", "pending", "failed"):
+            if self._path(status, job_id).exists():
+                return status
+        if self._path("done", job_id).exists():
+            return "done"
+        return None
+
+    # ---------- producer side ----------
+
+    def enqueue(
+        self,
+        job_id: str,
+        payload: Dict[str, Any],
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ) -> Dict[str, Any]:
+        """
+        Add a job (idempotent on job_id + payload)
+        A changed payload replaces a pending/failed/done job; a job that is
+        currently leased keeps running and the new payload is queued behind it.
+        """
+        existing = self.get(job_id)
+        digest = payload_digest(payload)
+        if existing and existing.get("digest") == digest and existing["status"] != "failed":
+            return existing
+
+        job = _new_job(job_id, payload, max_attempts)
+        if existing and existing["status"] == "leased":
+            # Run again once the current attempt finishes
+            job["not_before"] = existing.get("lease_expires", 0.0)
+        for path in (self._path("failed", job_id), self._path("done", job_id), self._meta_path(job_id)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        atomic_write_json(self._path("pending", job_id), job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job record (with "status") or None"""
+        status = self._locate(job_id)
+        if status is None:
+            return None
+        if status == "done":
+            meta = read_json(self._meta_path(job_id)) or {}
+            return {**meta, "id": job_id, "status": "done"}
+        job = read_json(self._path(status, job_id))
+        if job is None:
+            return None
+        job["status"] = status
+        return job
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return read_json(self._path("done", job_id))
+
+    # ---------- worker side ----------
+
+    def claim(self, worker_id: str, lease_secs: float = DEFAULT_LEASE_SECS) -> Optional[Dict[str, Any]]:
+        """Claim the oldest runnable pending job, or None"""
+        now = time.time()
+        candidates = []
+        for path in self.dirs["pending"].glob("*.json"):
+            job = read_json(path)
+            if job and job.get("not_before", 0.0) <= now:
+                candidates.append((job.get("created_at", 0.0), path, job))
+        candidates.sort(key=lambda c: c[0])
+
+        for _, path, job in candidates:
+            leased_path = self._path("leased", job["id"])
+            fd, tmp = tempfile.mkstemp(dir=str(self.dirs["leased"]), prefix=f".{job['id']}.", suffix=".claim")
+            os.close(fd)
+            try:
+                atomic_write_json(Path(tmp), self._leased_record(job, worker_id, lease_secs, now))
+                # link() fails if the destination exists, so a job that is
+                # still leased (re-enqueued while running) is never overwritten
+                os.link(tmp, leased_path)
+            except OSError:
+                continue  # another worker won this one
+            finally:
+                try:
+                    os.unlink(tmp)
+                except FileNotFoundError:
+                    pass
+
+            # We own the lease; now consume the pending file we claimed
+            taken = Path(tmp).with_suffix(".taken")
+            try:
+                os.rename(path, taken)
+            except FileNotFoundError:
+                leased_path.unlink()  # already claimed and finished by another worker
+                continue
+            current = read_json(taken) or job
+            if current.get("not_before", 0.0) > now:
+                os.replace(taken, path)  # re-enqueued meanwhile; not runnable yet
+                leased_path.unlink()
+                continue
+            taken.unlink()
+            record = self._leased_record(current, worker_id, lease_secs, now)
+            if current.get("digest") != job.get("digest"):
+                atomic_write_json(leased_path, record)
+            return record
+        return None
+
+    @staticmethod
+    def _leased_record(job: Dict[str, Any], worker_id: str, lease_secs: float, now: float) -> Dict[str, Any]:
+        record = dict(job)
+        record["status"] = "leased"
+        record["attempts"] = job.get("attempts", 0) + 1
+        record["lease_owner"] = worker_id
+        record["lease_expires"] = now + lease_secs
+        record["updated_at"] = now
+        return record
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_secs: float = DEFAULT_LEASE_SECS) -> bool:
+        """Extend a lease; False means the lease was lost"""
+        path = self._path("leased", job_id)
+        job = read_json(path)
+        if not job or job.get("lease_owner") != worker_id:
+            return False
+        job["lease_expires"] = time.time() + lease_secs
+        job["updated_at"] = time.time()
+        atomic_write_json(path, job)
+        return True
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        path = self._path("leased", job_id)
+        job = read_json(path)
+        if not job or job.get("lease_owner") != worker_id:
+            return False
+        # Meta first: once the result exists, get() must already report its digest
+        atomic_write_json(self._meta_path(job_id), {
+            "digest": job.get("digest"),
+            "attempts": job.get("attempts", 0),
+            "completed_at": time.time(),
+        })
+        atomic_write_json(self._path("done", job_id), result)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        return True
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> str:
+        """Record a failed attempt; returns the new status ("pending" or "failed")"""
+        path = self._path("leased", job_id)
+        job = read_json(path)
+        if not job or job.get("lease_owner") != worker_id:
+            return "lost"
+        return self._retry_or_bury(path, job, error)
+
+    def _retry_or_bury(self, leased_path: Path, job: Dict[str, Any], error: str) -> str:
+        now = time.time()
+        job["error"] = error
+        job["lease_owner"] = None
+        job["lease_expires"] = 0.0
+        job["updated_at"] = now
+        if job.get("attempts", 0) >= job.get("max_attempts", DEFAULT_MAX_ATTEMPTS):
+            status = "failed"
+        else:
+            status = "pending"
+            job["not_before"] = now + backoff_delay(job.get("attempts", 0))
+        job["status"] = status
+        atomic_write_json(leased_path, job)
+        os.replace(leased_path, self._path(status, job["id"]))
+        return status
+
+    def requeue_expired(self) -> int:
+        """Return jobs whose lease expired (crashed worker) to the queue"""
+        now = time.time()
+        count = 0
+        for path in self.dirs["leased"].glob("*.json"):
+            job = read_json(path)
+            if job and job.get("lease_expires", 0.0) < now:
+                self._retry_or_bury(path, job, "lease expired")
+                count += 1
+        return count
+
+    def list_jobs(self, status: str) -> List[str]:
+        return sorted(p.stem for p in self.dirs[status].glob("*.json"))
+
+
+class SQLiteJobStore:
+    """
+    SQLite job queue (one table, WAL mode)
+    Better than the file store when many workers poll the same queue.
+    Results are kept in the table and mirrored to ready_results/ so
+    existing readers keep working.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        payload TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 3,
+        not_before REAL NOT NULL DEFAULT 0,
+        lease_owner TEXT,
+        lease_expires REAL NOT NULL DEFAULT 0,
+        result TEXT,
+        error TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, not_before, created_at);
+    """
+
+    def __init__(self, db_path: str = "data/jobs.db", results_dir: str = "data/ready_results"):
+        self.db_path = db_path
+        self.results_dir = Path(results_dir)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job.pop("result", None)
+        return job
+
+    def enqueue(
+        self,
+        job_id: str,
+        payload: Dict[str, Any],
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ) -> Dict[str, Any]:
+        digest = payload_digest(payload)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row and row["digest"] == digest and row["status"] != "failed":
+                conn.execute("COMMIT")
+                return self._row_to_job(row)
+            not_before = row["lease_expires"] if row and row["status"] == "leased" else 0.0
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs "
+                "(id, payload, digest, status, attempts, max_attempts, not_before, "
+                " lease_owner, lease_expires, result, error, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'pending', 0, ?, ?, NULL, 0, NULL, NULL, ?, ?)",
+                (job_id, json.dumps(payload, ensure_ascii=False), digest,
+                 max_attempts, not_before, now, now)
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        try:
+            (self.results_dir / f"{job_id}.json").unlink()
+        except FileNotFoundError:
+            pass
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._row_to_job(row) if row else None
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT result FROM jobs WHERE id = ? AND status = 'done'", (job_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row["result"]) if row and row["result"] else None
+
+    def claim(self, worker_id: str, lease_secs: float = DEFAULT_LEASE_SECS) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'pending' AND not_before <= ? "
+                "ORDER BY created_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if not row:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, "
+                "lease_owner = ?, lease_expires = ?, updated_at = ? WHERE id = ?",
+                (worker_id, now + lease_secs, now, row["id"])
+            )
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return self._row_to_job(row)
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_secs: float = DEFAULT_LEASE_SECS) -> bool:
+        now = time.time()
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (now + lease_secs, now, job_id, worker_id)
+            )
+            return cur.rowcount == 1
+        finally:
+            conn.close()
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, lease_owner = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (json.dumps(result, ensure_ascii=False), time.time(), job_id, worker_id)
+            )
+            ok = cur.rowcount == 1
+        finally:
+            conn.close()
+        if ok:
+            atomic_write_json(self.results_dir / f"{job_id}.json", result)
+        return ok
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> str:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (job_id, worker_id)
+            ).fetchone()
+            if not row:
+                conn.execute("COMMIT")
+                return "lost"
+            status = "failed" if row["attempts"] >= row["max_attempts"] else "pending"
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires = 0, "
+                "not_before = ?, updated_at = ? WHERE id = ?",
+                (status, error, now + backoff_delay(row["attempts"]), now, job_id)
+            )
+            conn.execute("COMMIT")
+            return status
+        finally:
+            conn.close()
+
+    def requeue_expired(self) -> int:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            failed = conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired', lease_owner = NULL "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+                (now,)
+            ).rowcount
+            retried = conn.execute(
+                "UPDATE jobs SET status = 'pending', error = 'lease expired', lease_owner = NULL, "
+                "not_before = ? WHERE status = 'leased' AND lease_expires < ?",
+                (now + BACKOFF_BASE_SECS, now)
+            ).rowcount
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return failed + retried
+
+    def list_jobs(self, status: str) -> List[str]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY id", (status,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [r["id"] for r in rows]
+
+
+def get_job_store(backend: str = None, root: str = "data"):
+    """
+    Build the configured job store
+    backend: "file" (default) or "sqlite"; falls back to $SPORTSYNC_JOB_BACKEND
+    """
+    backend = (backend or os.getenv("SPORTSYNC_JOB_BACKEND", "file")).lower()
+    if backend == "sqlite":
+        return SQLiteJobStore(
+            db_path=str(Path(root) / "jobs.db"),
+            results_dir=str(Path(root) / "ready_results")
+        )
+    return FileJobStore(root)
@@ -0,0 +1,190 @@
+"""
+SportSync AI - Job Worker Pool
+Multi-process workers that drain the job queue
+
+USAGE:
+    python -m jobs.worker --workers 4 --backend sqlite
+"""
+
+import argparse
+import importlib
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Callable, Optional
+
+from jobs.progress import PROGRESS_DIR, ProgressReporter
+from jobs.store import DEFAULT_LEASE_SECS, get_job_store
+
+DEFAULT_HANDLER = "jobs.pipeline:run_dual_ai_job"
+POLL_SECS = 1.0
+REAPER_SECS = 30.0
+
+
+def resolve_handler(spec: str) -> Callable:
+    """Resolve "module:function" (kept as a string so it pickles across processes)"""
+    module_name, _, func_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def _heartbeat_loop(store, job_id: str, worker_id: str, lease_secs: float, done: threading.Event):
+    while not done.wait(lease_secs / 3):
+        if not store.heartbeat(job_id, worker_id, lease_secs):
+            print(f"⚠️  [{worker_id}] lost lease on {job_id}")
+            return
+
+
+def process_one(
+    store,
+    handler: Callable,
+    worker_id: str,
+    lease_secs: float = DEFAULT_LEASE_SECS,
+    progress_dir: Path = PROGRESS_DIR
+) -> bool:
+    """Claim and run a single job; returns False when the queue is empty"""
+    job = store.claim(worker_id, lease_secs)
+    if not job:
+        return False
+
+    job_id = job["id"]
+    report = ProgressReporter(job_id, progress_dir)
+    report("started", 0, f"attempt {job['attempts']}")
+
+    done = threading.Event()
+    beat = threading.Thread(
+        target=_heartbeat_loop,
+        args=(store, job_id, worker_id, lease_secs, done),
+        daemon=True
+    )
+    beat.start()
+    error = None
+    try:
+        result = handler(job["payload"], report)
+    except Exception as e:
+        error = e
+        traceback.print_exc()
+    finally:
+        # Stop heartbeating before touching the lease: a heartbeat still in
+        # flight could otherwise re-create leased/<id>.json after completion
+        done.set()
+        beat.join()
+
+    if error is None:
+        if store.complete(job_id, worker_id, result):
+            print(f"✓ [{worker_id}] completed {job_id}")
+    else:
+        status = store.fail(job_id, worker_id, f"{type(error).__name__}: {error}")
+        report("retrying" if status == "pending" else "failed", 0, str(error))
+        print(f"❌ [{worker_id}] {job_id} failed ({status})")
+    return True
+
+
+def run_worker(
+    worker_id: str,
+    backend: str = None,
+    root: str = "data",
+    handler_spec: str = DEFAULT_HANDLER,
+    stop_event=None,
+    lease_secs: float = DEFAULT_LEASE_SECS,
+    poll_secs: float = POLL_SECS,
+    max_jobs: Optional[int] = None
+) -> int:
+    """Worker loop: claim -> run -> complete/fail, until stopped; returns jobs processed"""
+    store = get_job_store(backend, root)
+    handler = resolve_handler(handler_spec)
+    progress_dir = Path(root) / "job_progress"
+    processed = 0
+    last_reap = 0.0
+
+    while not (stop_event and stop_event.is_set()):
+        if time.time() - last_reap > REAPER_SECS:
+            store.requeue_expired()
+            last_reap = time.time()
+
+        if process_one(store, handler, worker_id, lease_secs, progress_dir):
+            processed += 1
+            if max_jobs is not None and processed >= max_jobs:
+                break
+        elif stop_event:
+            stop_event.wait(poll_secs)
+        else:
+            time.sleep(poll_secs)
+    return processed
+
+
+class WorkerPool:
+    """Runs N worker processes against the same store"""
+
+    def __init__(
+        self,
+        num_workers: int = None,
+        backend: str = None,
+        root: str = "data",
+        handler_spec: str = DEFAULT_HANDLER,
+        lease_secs: float = DEFAULT_LEASE_SECS
+    ):
+        self.num_workers = num_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.backend = backend
+        self.root = root
+        self.handler_spec = handler_spec
+        self.lease_secs = lease_secs
+        self.stop_event = multiprocessing.Event()
+        self.processes = []
+
+    def start(self):
+        host = socket.gethostname()
+        for i in range(self.num_workers):
+            worker_id = f"{host}-{os.getpid()}-w{i}"
+            p = multiprocessing.Process(
+                target=run_worker,
+                kwargs={
+                    "worker_id": worker_id,
+                    "backend": self.backend,
+                    "root": self.root,
+                    "handler_spec": self.handler_spec,
+                    "stop_event": self.stop_event,
+                    "lease_secs": self.lease_secs
+                },
+                name=worker_id,
+                daemon=True
+            )
+            p.start()
+            self.processes.append(p)
+        print(f"✓ Started {len(self.processes)} workers ({self.backend or 'default'} backend)")
+
+    def stop(self, timeout: float = 30.0):
+        """Ask workers to finish their current job and exit"""
+        self.stop_event.set()
+        for p in self.processes:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+        self.processes = []
+
+    def join(self):
+        try:
+            for p in self.processes:
+                p.join()
+        except KeyboardInterrupt:
+            self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SportSync job workers")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--backend", choices=["file", "sqlite"], default=None)
+    parser.add_argument("--root", default="data")
+    parser.add_argument("--handler", default=DEFAULT_HANDLER)
+    args = parser.parse_args()
+
+    pool = WorkerPool(args.workers, args.backend, args.root, args.handler)
+    pool.start()
+    pool.join()
+
+
+if __name__ == "__main__":
+    main()
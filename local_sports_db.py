@@ -2,6 +2,13 @@
 Local Sports Database
 Offline fallback for sports recommendations
 Uses Z-score matching to find best sports from local database
+
+Matching runs on a precomputed (n_sports x 7) float32 matrix when NumPy
+is installed, and falls back to the pure-Python loop otherwise.
+Large catalogs also get a KD-tree (SciPy, optional) for k-nearest and
+radius queries. If a compiled data/sports_database.bin is present and up
+to date (see compiled_sports_db.py), it is memory-mapped instead of
+parsing the JSON.
 """
 
 import json
@@ -9,16 +16,50 @@ import os
 from typing import Dict, List
 import math
 
+try:
+    import numpy as np
+except ImportError:  # Optional: pure-Python matching still works
+    np = None
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # Optional: brute-force matrix scan still works
+    cKDTree = None
+
+# Fixed axis order for the matrix columns
+Z_AXES = [
+    "calm_adrenaline",
+    "solo_group",
+    "technical_intuitive",
+    "control_freedom",
+    "repeat_variety",
+    "compete_enjoy",
+    "sensory_sensitivity"
+]
+
+# Below this size a brute-force scan is as fast as a tree lookup
+SPATIAL_INDEX_MIN_SPORTS = 512
+
 class LocalSportsDatabase:
     """Local sports database for offline recommendations"""
 
     def __init__(self, db_path: str = "data/sports_database.json"):
         self.db_path = db_path
         self.database = None
+        self.z_matrix = None        # (n_sports, 7) float32, missing axes = 0
+        self.z_mask = None          # (n_sports, 7) bool, True where the sport defines the axis
+        self.category_rows = {}     # category -> row indices into z_matrix
+        self.category_codes = None  # (n_sports,) int category id per row
+        self.spatial_index = {}     # None (whole catalog) / category -> cKDTree
+        self.compiled = None        # CompiledSportsDatabase when loaded from the .bin
         self.load_database()
 
     def load_database(self):
-        """Load sports database from file"""
+        """Load sports database from file (compiled .bin when available)"""
+        if self.load_compiled():
+            self.build_spatial_index()
+            return
+
         try:
             if os.path.exists(self.db_path):
                 with open(self.db_path, 'r', encoding='utf-8') as f:
@@ -30,6 +71,94 @@ class LocalSportsDatabase:
         except Exception as e:
             print(f"❌ Error loading database: {e}")
             self.database = None
+        self.build_matrix()
+        self.build_spatial_index()
+
+    def load_compiled(self) -> bool:
+        """Memory-map the compiled catalog if it exists and is not older than the JSON"""
+        self.compiled = None
+        if np is None:
+            return False
+
+        from compiled_sports_db import CompiledSportsDatabase, default_compiled_path, is_fresh
+
+        compiled_path = self.db_path if self.db_path.endswith(".bin") else default_compiled_path(self.db_path)
+        if not is_fresh(self.db_path, compiled_path):
+            return False
+        try:
+            compiled = CompiledSportsDatabase(compiled_path)
+        except Exception as e:
+            print(f"⚠️  Ignoring compiled database {compiled_path}: {e}")
+            return False
+
+        self.compiled = compiled
+        self.database = compiled.as_database()
+        self.z_matrix = compiled.z_matrix
+        self.z_mask = compiled.z_mask
+        self.category_rows = compiled.category_rows()
+        self.category_codes = compiled.category_codes.astype(np.intp)
+        print(f"✓ Mapped {self.database['total_sports']} sports from compiled database")
+        return True
+
+    def build_matrix(self):
+        """Precompute the z-score matrix, axis-presence mask and category rows"""
+        self.z_matrix = None
+        self.z_mask = None
+        self.category_rows = {}
+        self.category_codes = None
+        if np is None or not self.database:
+            return
+
+        sports = self.database['sports']
+        matrix = np.zeros((len(sports), len(Z_AXES)), dtype=np.float32)
+        mask = np.zeros((len(sports), len(Z_AXES)), dtype=bool)
+        categories = {}
+        for row, sport in enumerate(sports):
+            z = sport.get('z_scores', {})
+            for col, axis in enumerate(Z_AXES):
+                if axis in z:
+                    matrix[row, col] = z[axis]
+                    mask[row, col] = True
+            categories.setdefault(sport.get('category'), []).append(row)
+
+        self.z_matrix = matrix
+        self.z_mask = mask
+        self.category_rows = {cat: np.asarray(rows, dtype=np.intp) for cat, rows in categories.items()}
+        self.category_codes = np.empty(len(sports), dtype=np.intp)
+        for code, rows in enumerate(self.category_rows.values()):
+            self.category_codes[rows] = code
+
+    def build_spatial_index(self, min_sports: int = SPATIAL_INDEX_MIN_SPORTS):
+        """
+        KD-trees over the 7-D z-space: one for the whole catalog and one per category
+        Only built for dense catalogs (every sport defines every axis) - with
+        missing axes the masked distance is not a metric the tree can answer.
+        """
+        self.spatial_index = {}
+        if cKDTree is None or self.z_matrix is None:
+            return
+        if len(self.z_matrix) < min_sports or not self.z_mask.all():
+            return
+
+        self.spatial_index[None] = cKDTree(self.z_matrix)
+        for category, rows in self.category_rows.items():
+            if len(rows) >= min_sports:
+                self.spatial_index[category] = cKDTree(self.z_matrix[rows])
+
+    def _index_for(self, user_z_scores: Dict[str, float], category_filter: str = None):
+        """(tree, rows) when the index can answer this query exactly, else (None, None)"""
+        if not self.spatial_index or not all(axis in user_z_scores for axis in Z_AXES):
+            return None, None
+        tree = self.spatial_index.get(category_filter)
+        if tree is None:
+            return None, None
+        return tree, (self.category_rows[category_filter] if category_filter else None)
+
+    def user_vector(self, user_z_scores: Dict[str, float]):
+        """User z-scores as (values, mask) arrays in Z_AXES order"""
+        values = np.array([user_z_scores.get(axis, 0.0) for axis in Z_AXES], dtype=np.float32)
+        mask = np.array([axis in user_z_scores for axis in Z_AXES], dtype=bool)
+        return values, mask
 
     def calculate_z_score_distance(self, z1: Dict[str, float], z2: Dict[str, float]) -> float:
         """
@@ -56,6 +185,13 @@ class LocalSportsDatabase:
             print("⚠️  Database not loaded, cannot find matches")
             return []
 
+        tree, rows = self._index_for(user_z_scores, category_filter)
+        if tree is not None:
+            return self._find_best_matches_indexed(tree, rows, user_z_scores, num_matches)
+
+        if self.z_matrix is not None:
+            return self._find_best_matches_vectorized(user_z_scores, num_matches, category_filter)
+
         sports = self.database['sports']
 
         # Filter by category if specified
@@ -72,16 +208,96 @@ class LocalSportsDatabase:
         sport_distances.sort(key=lambda x: x[1])
 
         # Return top N matches
-        best_matches = []
-        for sport, distance in sport_distances[:num_matches]:
-            match_score = max(0, 100 - (distance * 20))  # Convert distance to match score
-            best_matches.append({
-                "sport": sport,
-                "distance": round(distance, 3),
-                "match_score": round(match_score, 1)
-            })
+        return [self._match_entry(sport, distance) for sport, distance in sport_distances[:num_matches]]
+
+    @staticmethod
+    def _match_entry(sport: Dict, distance: float) -> Dict:
+        match_score = max(0, 100 - (distance * 20))  # Convert distance to match score
+        return {
+            "sport": sport,
+            "distance": round(distance, 3),
+            "match_score": round(match_score, 1)
+        }
+
+    def _find_best_matches_vectorized(
+        self,
+        user_z_scores: Dict[str, float],
+        num_matches: int,
+        category_filter: str = None
+    ) -> List[Dict]:
+        """Masked Euclidean distances over the whole matrix + argpartition top-k"""
+        if category_filter:
+            rows = self.category_rows.get(category_filter)
+            if rows is None or len(rows) == 0:
+                return []
+            matrix, mask = self.z_matrix[rows], self.z_mask[rows]
+        else:
+            rows = None
+            matrix, mask = self.z_matrix, self.z_mask
+
+        values, user_mask = self.user_vector(user_z_scores)
+        diff = (matrix - values) * (mask & user_mask)
+        distances = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+
+        k = min(num_matches, len(distances))
+        if k <= 0:
+            return []
+        if k < len(distances):
+            top = np.argpartition(distances, k - 1)[:k]
+        else:
+            top = np.arange(len(distances))
+        top = top[np.argsort(distances[top], kind='stable')]
+
+        sports = self.database['sports']
+        return [
+            self._match_entry(sports[rows[i] if rows is not None else i], float(distances[i]))
+            for i in top
+        ]
+
+    def _find_best_matches_indexed(self, tree, rows, user_z_scores: Dict[str, float], num_matches: int) -> List[Dict]:
+        k = min(num_matches, tree.n)
+        if k <= 0:
+            return []
+        values, _ = self.user_vector(user_z_scores)
+        distances, indices = tree.query(values, k=k)
+        distances, indices = np.atleast_1d(distances), np.atleast_1d(indices)
+
+        sports = self.database['sports']
+        return [
+            self._match_entry(sports[rows[i] if rows is not None else i], float(d))
+            for d, i in zip(distances, indices)
+        ]
+
+    def find_sports_within(
+        self,
+        user_z_scores: Dict[str, float],
+        radius: float,
+        category_filter: str = None
+    ) -> List[Dict]:
+        """All sports within `radius` z-distance of the user, closest first"""
+        if not self.database:
+            return []
 
-        return best_matches
+        tree, rows = self._index_for(user_z_scores, category_filter)
+        if tree is not None:
+            values, _ = self.user_vector(user_z_scores)
+            hits = tree.query_ball_point(values, r=radius)
+            if not hits:
+                return []
+            hits = np.asarray(hits, dtype=np.intp)
+            global_rows = rows[hits] if rows is not None else hits
+            diff = self.z_matrix[global_rows] - values
+            distances = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+            order = np.argsort(distances, kind='stable')
+            sports = self.database['sports']
+            return [self._match_entry(sports[global_rows[i]], float(distances[i])) for i in order]
+
+        # Brute force: rank everything, keep what is inside the radius
+        total = len(self.database['sports'])
+        return [
+            m for m in self.find_best_matches(user_z_scores, num_matches=total, category_filter=category_filter)
+            if m['distance'] <= radius
+        ]
 
     def generate_recommendations(
         self,
@@ -113,23 +329,7 @@ class LocalSportsDatabase:
             if category in used_categories and len(recommendations) < num_recommendations:
                 continue
 
-            # Build recommendation
-            rec = {
-                "sport_name": sport['name_ar'] if lang == 'ar' else sport['name_en'],
-                "sport_name_en": sport['name_en'],
-                "sport_name_ar": sport['name_ar'],
-                "category": category,
-                "z_scores": sport['z_scores'],
-                "match_score": match['match_score'],
-                "difficulty": sport.get('difficulty', 'intermediate'),
-                "physical_intensity": sport.get('physical_intensity', 'medium'),
-                "mental_demand": sport.get('mental_demand', 'medium'),
-                "source": "local_database",
-                "confidence": "HIGH" if match['match_score'] > 80 else "MEDIUM",
-                "is_offline": True
-            }
-
-            recommendations.append(rec)
+            recommendations.append(self._recommendation_entry(match, lang))
             used_categories.add(category)
 
             if len(recommendations) >= num_recommendations:
@@ -146,21 +346,7 @@ class LocalSportsDatabase:
                 if any(r['sport_name_en'] == sport['name_en'] for r in recommendations):
                     continue
 
-                rec = {
-                    "sport_name": sport['name_ar'] if lang == 'ar' else sport['name_en'],
-                    "sport_name_en": sport['name_en'],
-                    "sport_name_ar": sport['name_ar'],
-                    "category": sport['category'],
-                    "z_scores": sport['z_scores'],
-                    "match_score": match['match_score'],
-                    "difficulty": sport.get('difficulty', 'intermediate'),
-                    "physical_intensity": sport.get('physical_intensity', 'medium'),
-                    "mental_demand": sport.get('mental_demand', 'medium'),
-                    "source": "local_database",
-                    "confidence": "HIGH" if match['match_score'] > 80 else "MEDIUM",
-                    "is_offline": True
-                }
-                recommendations.append(rec)
+                recommendations.append(self._recommendation_entry(match, lang))
 
         print(f"✓ Generated {len(recommendations)} recommendations from local database")
         for i, rec in enumerate(recommendations, 1):
@@ -168,6 +354,148 @@ class LocalSportsDatabase:
 
         return recommendations
 
+    @staticmethod
+    def _recommendation_entry(match: Dict, lang: str) -> Dict:
+        sport = match['sport']
+        return {
+            "sport_name": sport['name_ar'] if lang == 'ar' else sport['name_en'],
+            "sport_name_en": sport['name_en'],
+            "sport_name_ar": sport['name_ar'],
+            "category": sport['category'],
+            "z_scores": sport['z_scores'],
+            "match_score": match['match_score'],
+            "difficulty": sport.get('difficulty', 'intermediate'),
+            "physical_intensity": sport.get('physical_intensity', 'medium'),
+            "mental_demand": sport.get('mental_demand', 'medium'),
+            "source": "local_database",
+            "confidence": "HIGH" if match['match_score'] > 80 else "MEDIUM",
+            "is_offline": True
+        }
+
+    # ═══════════════════════════════════════════════════════════════
+    # BATCH MATCHING (many users at once)
+    # ═══════════════════════════════════════════════════════════════
+
+    def users_to_matrix(self, users):
+        """
+        (n_users, 7) float32 values + bool mask from a list of z-score dicts,
+        or from an array where NaN marks a missing axis
+        """
+        if isinstance(users, np.ndarray):
+            users = np.atleast_2d(users).astype(np.float32)
+            mask = ~np.isnan(users)
+            return np.where(mask, users, 0.0).astype(np.float32), mask
+
+        values = np.zeros((len(users), len(Z_AXES)), dtype=np.float32)
+        mask = np.zeros((len(users), len(Z_AXES)), dtype=bool)
+        for row, z in enumerate(users):
+            for col, axis in enumerate(Z_AXES):
+                if axis in z:
+                    values[row, col] = z[axis]
+                    mask[row, col] = True
+        return values, mask
+
+    def batch_topk(self, user_matrix, k: int, category_filter: str = None, block_size: int = 1024):
+        """
+        Per-user top-k over the whole catalog
+        Returns (rows, distances), both (n_users, k), closest first.
+        The masked squared distance is expanded so each block of users is
+        a single BLAS call:
+            sum_a ms*mu*(z - u)^2 = mu@(ms*z^2).T - 2 (mu*u)@(ms*z).T + (mu*u^2)@ms.T
+        """
+        values, user_mask = self.users_to_matrix(user_matrix)
+
+        if category_filter:
+            rows = self.category_rows.get(category_filter, np.empty(0, dtype=np.intp))
+            matrix, mask = self.z_matrix[rows], self.z_mask[rows]
+        else:
+            rows = np.arange(len(self.z_matrix), dtype=np.intp)
+            matrix, mask = self.z_matrix, self.z_mask
+
+        k = min(k, len(rows))
+        n_users = len(values)
+        top_rows = np.empty((n_users, k), dtype=np.intp)
+        top_dist = np.empty((n_users, k), dtype=np.float32)
+        if k <= 0:
+            return top_rows, top_dist
+
+        # float64 here: the expanded form cancels terms, float32 would blur near-ties
+        ms = mask.astype(np.float64)
+        sport_side = np.hstack([ms * matrix * matrix, ms * matrix, ms]).T   # (21, n_sports)
+
+        for start in range(0, n_users, block_size):
+            end = min(start + block_size, n_users)
+            mu = user_mask[start:end].astype(np.float64)
+            u = values[start:end] * mu
+            d2 = np.hstack([mu, -2.0 * u, u * u]) @ sport_side               # (block, n_sports)
+            np.maximum(d2, 0.0, out=d2)
+
+            if k < d2.shape[1]:
+                part = np.argpartition(d2, k - 1, axis=1)[:, :k]
+            else:
+                part = np.broadcast_to(np.arange(d2.shape[1]), (end - start, d2.shape[1]))
+            part_d2 = np.take_along_axis(d2, part, axis=1)
+            order = np.argsort(part_d2, axis=1, kind='stable')
+            top_rows[start:end] = rows[np.take_along_axis(part, order, axis=1)]
+            top_dist[start:end] = np.sqrt(np.take_along_axis(part_d2, order, axis=1))
+
+        return top_rows, top_dist
+
+    def find_best_matches_batch(self, user_matrix, k: int = 3, category_filter: str = None) -> List[List[Dict]]:
+        """
+        find_best_matches for many users at once
+        user_matrix: list of z-score dicts, or (n_users, 7) array in Z_AXES order (NaN = missing)
+        """
+        if not self.database:
+            return []
+        if self.z_matrix is None:
+            return [self.find_best_matches(z, k, category_filter) for z in user_matrix]
+
+        top_rows, top_dist = self.batch_topk(user_matrix, k, category_filter)
+        sports = self.database['sports']
+        return [
+            [self._match_entry(sports[r], float(d)) for r, d in zip(row_ids, row_dist)]
+            for row_ids, row_dist in zip(top_rows, top_dist)
+        ]
+
+    def diverse_selection(self, top_rows, num_recommendations: int):
+        """
+        Vectorized form of the category-diversity rule in generate_recommendations:
+        first take the best sport of each category (in rank order), then fill
+        with the best remaining ones. Returns column indices into top_rows.
+        """
+        codes = self.category_codes[top_rows]                          # (n_users, K)
+        same = codes[:, :, None] == codes[:, None, :]                  # (n_users, K, K)
+        earlier = np.tril(np.ones(same.shape[1:], dtype=bool), k=-1)   # j < i
+        repeat = (same & earlier).any(axis=2)
+        return np.argsort(repeat, axis=1, kind='stable')[:, :num_recommendations]
+
+    def generate_recommendations_batch(
+        self,
+        user_matrix,
+        num_recommendations: int = 3,
+        lang: str = "ar"
+    ) -> List[List[Dict]]:
+        """generate_recommendations for many users (same selection rules, no per-user printing)"""
+        if not self.database:
+            return []
+        if self.z_matrix is None:
+            return [self.generate_recommendations(z, num_recommendations, lang) for z in user_matrix]
+
+        top_rows, top_dist = self.batch_topk(user_matrix, num_recommendations * 3)
+        picks = self.diverse_selection(top_rows, num_recommendations)
+        rows = np.take_along_axis(top_rows, picks, axis=1)
+        dists = np.take_along_axis(top_dist, picks, axis=1)
+
+        sports = self.database['sports']
+        return [
+            [
+                self._recommendation_entry(self._match_entry(sports[r], float(d)), lang)
+                for r, d in zip(row_ids, row_dist)
+            ]
+            for row_ids, row_dist in zip(rows, dists)
+        ]
+
     def get_sports_by_category(self, category: str) -> List[Dict]:
         """Get all sports in a specific category"""
         if not self.database:
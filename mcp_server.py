@@ -10,15 +10,22 @@ ARCHITECTURE:
 - MCP Protocol: Standard communication interface
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, List, Any
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
+from typing import Dict, List, Any, Optional, Sequence, Union
 import json
 import asyncio
 from datetime import datetime
 import openai
 import os
 
+try:
+    import msgpack  # Optional: compact binary encoding for mobile clients
+except ImportError:
+    msgpack = None
+
 # Import research engine
 from mcp_research import MCPResearchEngine
 
@@ -38,6 +45,9 @@ mcp_app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compressed JSON/MessagePack for clients that send Accept-Encoding: gzip
+mcp_app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Initialize research engine
 research_engine = MCPResearchEngine()
 
@@ -146,14 +156,111 @@ We need 2-3 targeted follow-up questions to fill these gaps.
             }
         ]
 
+# ═══════════════════════════════════════════════════════════════
+# RESPONSE PROJECTION & ENCODING
+# ═══════════════════════════════════════════════════════════════
+
+DETAIL_LEVELS = ("minimal", "summary", "full")
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# Top-level keys kept at every detail level
+_ENVELOPE_KEYS = ("success", "session_id", "protocol", "timestamp", "status", "error",
+                  "follow_up_required", "follow_up_questions")
+
+
+def _summarize_research(research: Dict[str, Any]) -> Dict[str, Any]:
+    """research_details without page bodies and raw search result lists"""
+    search = research.get("search_results", {}) or {}
+    return {
+        "analysis_type": research.get("analysis_type"),
+        "total_sources_consulted": research.get("total_sources_consulted", 0),
+        "pages_browsed": [
+            {"title": page.get("title", ""), "url": page.get("url", "")}
+            for page in research.get("browsed_pages", [])
+        ],
+        "search_result_counts": {name: len(results or []) for name, results in search.items()},
+        "specific_sports": [s.get("sport") for s in research.get("specific_sport_research", [])],
+        "confidence_level": research.get("confidence_level"),
+    }
+
+
+def _pick_path(source: Any, path: List[str]) -> Any:
+    for key in path:
+        if not isinstance(source, dict) or key not in source:
+            raise KeyError(key)
+        source = source[key]
+    return source
+
+
+def project_response(payload: Dict[str, Any], detail: Optional[str] = None,
+                     fields: Union[str, Sequence[str], None] = None) -> Dict[str, Any]:
+    """
+    Shrink an /mcp/analyze payload
+
+    detail:
+    - "full" (default): unchanged
+    - "summary": research_details reduced to titles/urls/counts
+    - "minimal": envelope + recommendations only
+    fields: dotted paths, comma-separated (e.g. "status,data.recommendations")
+            or a list (["status", "data.recommendations"]);
+            applied after detail, missing paths are skipped
+    """
+    detail = (detail or "full").lower()
+    if detail not in DETAIL_LEVELS:
+        detail = "full"
+
+    out = payload
+    data = payload.get("data")
+    if detail != "full" and isinstance(data, dict):
+        out = {k: v for k, v in payload.items() if k != "data"}
+        if detail == "summary":
+            out["data"] = dict(data)
+            if "research_details" in data:
+                out["data"]["research_details"] = _summarize_research(data["research_details"])
+        else:
+            out = {k: v for k, v in out.items() if k in _ENVELOPE_KEYS}
+            out["data"] = {"recommendations": data.get("recommendations", [])}
+
+    if fields:
+        projected: Dict[str, Any] = {}
+        names = fields.split(",") if isinstance(fields, str) else fields
+        for field in (f.strip() for f in names):
+            if not field:
+                continue
+            path = field.split(".")
+            try:
+                value = _pick_path(out, path)
+            except KeyError:
+                continue
+            target = projected
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+        out = projected
+
+    return out
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    return bool(msgpack) and any(t in (accept or "") for t in MSGPACK_TYPES)
+
+
+def encode_response(payload: Dict[str, Any], accept: Optional[str] = None) -> Response:
+    """MessagePack if the client asks for it (and msgpack is installed), else JSON"""
+    if wants_msgpack(accept):
+        return Response(msgpack.packb(payload, use_bin_type=True), media_type="application/msgpack")
+    return JSONResponse(payload)
+
+
 # Connection manager for WebSocket
 class MCPConnectionManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
         self.session_data: Dict[str, Any] = {}
 
-    async def connect(self, websocket: WebSocket, client_id: str):
+    async def connect(self, websocket: WebSocket, client_id: str, encoding: str = "json"):
         await websocket.accept()
+        websocket.state.encoding = "msgpack" if encoding == "msgpack" and msgpack else "json"
         self.active_connections.append(websocket)
         self.session_data[client_id] = {
             "connected_at": datetime.utcnow().isoformat(),
@@ -166,11 +273,14 @@ class MCPConnectionManager:
             del self.session_data[client_id]
 
     async def send_message(self, websocket: WebSocket, message: Dict[str, Any]):
-        await websocket.send_json(message)
+        if getattr(websocket.state, "encoding", "json") == "msgpack":
+            await websocket.send_bytes(msgpack.packb(message, use_bin_type=True))
+        else:
+            await websocket.send_json(message)
 
     async def broadcast(self, message: Dict[str, Any]):
         for connection in self.active_connections:
-            await connection.send_json(message)
+            await self.send_message(connection, message)
 
 manager = MCPConnectionManager()
 chat_engine = AdaptiveChatEngine()
@@ -208,14 +318,21 @@ async def mcp_capabilities():
             },
             "dual_ai_orchestration": True,
             "real_time_communication": True,
-            "websocket_support": True
+            "websocket_support": True,
+            "response_detail_levels": list(DETAIL_LEVELS),
+            "response_encodings": ["json", "gzip"] + (["msgpack"] if msgpack else [])
         },
         "supported_languages": ["ar", "en"],
         "max_concurrent_sessions": 100
     }
 
 @mcp_app.post("/mcp/analyze")
-async def mcp_analyze(request: dict):
+async def mcp_analyze(
+    request: dict,
+    http_request: Request,
+    detail: Optional[str] = None,
+    fields: Optional[str] = None
+):
     """
     MCP Analyze Endpoint with INTERNET RESEARCH
 
@@ -224,7 +341,27 @@ async def mcp_analyze(request: dict):
     3. Check if data is sufficient
     4. If not sufficient → return follow-up questions for chat
     5. If sufficient → return evidence-based recommendations
+
+    Payload shaping (query string or request body):
+    - detail=minimal|summary|full, fields=a.b,c or a JSON list (see project_response);
+      anything else is a 422
+    - Accept: application/msgpack → MessagePack body
+    - Accept-Encoding: gzip → compressed body
     """
+    detail = detail or request.get("detail")
+    fields = fields or request.get("fields")
+    if detail is not None and not isinstance(detail, str):
+        raise HTTPException(status_code=422, detail="detail must be a string")
+    if fields is not None and not (
+        isinstance(fields, str) or (isinstance(fields, list) and all(isinstance(f, str) for f in fields))
+    ):
+        raise HTTPException(status_code=422, detail="fields must be a string or a list of strings")
+    accept = http_request.headers.get("accept")
+    result = await _run_mcp_analysis(request)
+    return encode_response(project_response(result, detail, fields), accept)
+
+
+async def _run_mcp_analysis(request: dict) -> Dict[str, Any]:
     try:
         answers = request.get("answers", [])
         language = request.get("language", "ar")
@@ -307,8 +444,11 @@ async def mcp_websocket(websocket: WebSocket, client_id: str):
     MCP WebSocket Streaming
 
     Real-time communication with dual-AI system
+    Connect with ?encoding=msgpack to receive binary MessagePack frames;
+    frames are compressed with permessage-deflate when the client offers it.
     """
-    await manager.connect(websocket, client_id)
+    encoding = websocket.query_params.get("encoding", "json")
+    await manager.connect(websocket, client_id, encoding)
 
     try:
         # Send connection confirmation
@@ -416,4 +556,4 @@ def mcp_root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(mcp_app, host="0.0.0.0", port=8000)
+    uvicorn.run(mcp_app, host="0.0.0.0", port=8000, ws_per_message_deflate=True)
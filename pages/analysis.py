@@ -9,69 +9,96 @@ import sys
 from pathlib import Path
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
 
 # Add project root
 project_root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(project_root))
 
 from components import session_manager, ui_components
+from components.background_tasks import get_background_tasks, poll_every
 
-def run_analysis():
-    """تشغيل التحليل الفعلي"""
-    
+# Independent stages: (key, progress label); run concurrently
+ANALYSIS_STAGES = [
+    ("layer_z", "🧠 محرك Layer-Z"),
+    ("user_profile", "📊 141 طبقة نفسية"),
+    ("recommendations", "✨ التوصيات النهائية"),
+]
+
+def _run_layer_z(answers):
+    from src.analysis.layer_z_enhanced import LayerZEnhanced
+    answers_text = "\n".join([f"{k}: {v}" for k, v in answers.items()])
+    return LayerZEnhanced().analyze({"answers": answers_text})
+
+def _run_user_profile(answers):
+    from src.analysis.user_analysis import analyze_user
+    return analyze_user(answers)
+
+def _run_recommendations(answers, lang, user_id, job_id):
+    from src.core.backend_gpt import generate_sport_recommendation
+    return generate_sport_recommendation(
+        answers=answers,
+        lang=lang,
+        user_id=user_id,
+        job_id=job_id
+    )
+
+def run_analysis(answers, lang='ar', user_id=None, job_id=None,
+                 on_stage_complete: Callable[[str, int, int], None] = None,
+                 cancelled: Callable[[], bool] = None):
+    """
+    تشغيل التحليل الفعلي
+    Layer-Z, user profile and recommendations run in parallel threads;
+    on_stage_complete(stage_key, completed, total) is called as each
+    stage finishes. No Streamlit calls: this runs in a background task.
+    """
+    if not answers:
+        return None, "لا توجد إجابات للتحليل"
+
+    stage_args = {
+        "layer_z": (_run_layer_z, (answers,)),
+        "user_profile": (_run_user_profile, (answers,)),
+        "recommendations": (_run_recommendations, (answers, lang, user_id, job_id)),
+    }
+
+    pool = ThreadPoolExecutor(max_workers=len(ANALYSIS_STAGES), thread_name_prefix="analysis")
     try:
-        # Import analysis modules
-        from src.analysis.layer_z_enhanced import LayerZEnhanced
-        from src.analysis.user_analysis import analyze_user
-        
-        # Get answers
-        answers = st.session_state.get('answers', {})
-        
-        if not answers:
-            return None, "لا توجد إجابات للتحليل"
-        
-        # Step 1: Layer-Z Analysis
-        st.session_state.analysis_step = "Layer-Z Analysis"
-        layer_z = LayerZEnhanced()
-        
-        # Convert answers to format
-        answers_text = "\n".join([f"{k}: {v}" for k, v in answers.items()])
-        
-        z_result = layer_z.analyze({"answers": answers_text})
-        
-        time.sleep(1)  # Simulate processing
-        
-        # Step 2: User Analysis (141 layers)
-        st.session_state.analysis_step = "141 Layer Analysis"
-        
-        user_profile = analyze_user(answers)
-        
-        time.sleep(1)
-        
-        # Step 3: Generate Recommendations
-        st.session_state.analysis_step = "Generating Recommendations"
-        
-        from src.core.backend_gpt import generate_sport_recommendation
-        
-        recommendations = generate_sport_recommendation(
-            answers=answers,
-            lang=st.session_state.get('language', 'ar'),
-            user_id=st.session_state.get('user_id'),
-            job_id=st.session_state.get('session_id')
-        )
-        
-        # Combine results
-        result = {
-            'layer_z': z_result,
-            'user_profile': user_profile,
-            'recommendations': recommendations,
-            'timestamp': time.time()
-        }
-        
+        futures = {pool.submit(fn, *args): key for key, (fn, args) in stage_args.items()}
+        result = {}
+        for completed, future in enumerate(as_completed(futures), start=1):
+            if cancelled and cancelled():
+                return None, "تم إلغاء التحليل"
+            key = futures[future]
+            result[key] = future.result()
+            if on_stage_complete:
+                on_stage_complete(key, completed, len(futures))
+
+        result['timestamp'] = time.time()
         return result, None
-        
+
     except Exception as e:
         return None, f"خطأ في التحليل: {str(e)}"
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def _analysis_task(ctx, answers, lang, user_id, job_id):
+    """Background task body: the result is kept server-side until polled"""
+    result, error = run_analysis(answers, lang, user_id, job_id,
+                                 on_stage_complete=ctx.progress, cancelled=ctx.cancelled)
+    if error:
+        raise RuntimeError(error)
+    return result
+
+def _submit_analysis(restart=False):
+    get_background_tasks().submit(
+        st.session_state.session_id, "analysis", _analysis_task,
+        dict(st.session_state.get('answers', {})),
+        st.session_state.get('language', 'ar'),
+        st.session_state.get('user_id'),
+        st.session_state.get('session_id'),
+        restart=restart
+    )
 
 def show():
     """صفحة التحليل"""
@@ -105,54 +132,55 @@ def show():
     # Show analysis steps
     show_analysis_progress()
     
-    # Run analysis
-    if not st.session_state.get('analysis_started', False):
+    # Run analysis in the background (idempotent: reruns/double clicks reuse the task)
+    task = get_background_tasks().status(st.session_state.session_id, "analysis")
+    if task is None or task["state"] == "cancelled":
+        if not st.session_state.get('answers'):
+            ui_components.show_error_message("لا توجد إجابات للتحليل")
+            return
+        _submit_analysis()
         st.session_state.analysis_started = True
-        
-        # Progress placeholder
-        progress_placeholder = st.empty()
-        status_placeholder = st.empty()
-        
-        # Simulate analysis steps
-        steps = [
-            ("🔍 تحليل الإجابات", 10),
-            ("🧠 محرك Layer-Z", 25),
-            ("📊 141 طبقة نفسية", 50),
-            ("🎯 المطابقة الذكية", 75),
-            ("✨ التوصيات النهائية", 90),
-        ]
-        
-        for step_name, progress_value in steps:
-            status_placeholder.markdown(f"### {step_name}")
-            progress_placeholder.progress(progress_value / 100)
-            time.sleep(1.5)
-        
-        # Final progress
-        progress_placeholder.progress(1.0)
-        status_placeholder.markdown("### ✅ اكتمل التحليل!")
-        
-        time.sleep(1)
-        
-        # Run actual analysis
-        with st.spinner("جارٍ معالجة النتائج..."):
-            result, error = run_analysis()
-            
-            if error:
-                ui_components.show_error_message(error)
-                st.session_state.analysis_started = False
-                return
-            
-            # Save results
-            st.session_state.analysis_result = result
-            st.session_state.layer_z_result = result.get('layer_z')
-            st.session_state.recommendations = result.get('recommendations')
-            st.session_state.analysis_completed = True
-        
+
+    show_task_progress()
+
+@poll_every(1.0)
+def show_task_progress():
+    """Poll the background analysis; progress follows real stage completion"""
+    task = get_background_tasks().status(st.session_state.session_id, "analysis")
+    if task is None:
+        return False
+
+    if task["state"] == "error":
+        ui_components.show_error_message(task["error"])
+        if st.button("🔄 إعادة المحاولة"):
+            _submit_analysis(restart=True)
+            st.rerun()
+        return False
+
+    if task["state"] == "done":
+        result = task["result"]
+        st.markdown("### ✅ اكتمل التحليل!")
+
+        # Save results
+        st.session_state.analysis_result = result
+        st.session_state.layer_z_result = result.get('layer_z')
+        st.session_state.recommendations = result.get('recommendations')
+        st.session_state.analysis_completed = True
+
         # Redirect to results
-        time.sleep(1)
         st.session_state.current_page = 'results'
         st.rerun()
 
+    progress = task["progress"]
+    if progress:
+        labels = dict(ANALYSIS_STAGES)
+        st.progress(progress["completed"] / progress["total"])
+        st.markdown(f"### ✓ {labels.get(progress['stage'], progress['stage'])} "
+                    f"({progress['completed']}/{progress['total']})")
+    else:
+        st.progress(0.05)
+        st.markdown("### 🔍 تحليل الإجابات")
+
 def show_analysis_progress():
     """عرض تقدم التحليل"""
     
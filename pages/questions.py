@@ -14,9 +14,10 @@ project_root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(project_root))
 
 from components import session_manager, ui_components
+from question_bank import first_existing, load_question_bank
 
-def load_questions():
-    """تحميل الأسئلة"""
+def load_bank():
+    """QuestionBank for the current language (cached per process; no disk I/O on reruns)"""
     lang = st.session_state.get('language', 'ar')
 
     # Try v2 questions first (10 deep questions with explicit scoring)
@@ -28,22 +29,19 @@ def load_questions():
     questions_file_old = project_root / 'data' / 'questions' / file_name_old
 
     try:
-        # Try v2 first (in root directory)
-        if questions_file_v2.exists():
-            with open(questions_file_v2, 'r', encoding='utf-8') as f:
-                questions = json.load(f)
-                print(f"[QUESTIONS] ✅ Loaded v2 questions: {len(questions)} questions")
-                return questions  # v2 has exactly 10 questions
-        else:
-            # Fallback to old format
-            with open(questions_file_old, 'r', encoding='utf-8') as f:
-                questions = json.load(f)
-                print(f"[QUESTIONS] ⚠️ Using old format questions (fallback)")
-                # Take first 20 questions
-                return questions[:20]
+        path = first_existing([questions_file_v2, questions_file_old])
+        return load_question_bank(path) if path else None
     except Exception as e:
         st.error(f"خطأ في تحميل الأسئلة: {e}")
+        return None
+
+def load_questions():
+    """تحميل الأسئلة"""
+    bank = load_bank()
+    if bank is None:
         return []
+    # v2 has exactly 10 questions; old format: take first 20
+    return bank.questions if bank.path.endswith('_v2.json') else bank.questions[:20]
 
 def show():
     """صفحة الأسئلة"""
@@ -107,14 +105,9 @@ def show():
     # Choices
     st.markdown("### اختر إجابتك:")
 
-    # Handle both v2 format (options with text_ar/text_en) and old format (multiple_choices)
-    if 'options' in q:
-        # V2 format: extract text based on language
-        lang_key = 'text_ar' if lang == 'ar' else 'text_en'
-        choices = [opt.get(lang_key, opt.get('text_ar', '')) for opt in q['options']]
-    else:
-        # Old format: direct array of strings
-        choices = q.get('multiple_choices', [])
+    # Precomputed per-language projection (v2 options or old multiple_choices)
+    lang = st.session_state.get('language', 'ar')
+    choices = load_bank().for_language(lang)[current_idx]['options']
 
     # Display choices as buttons
     cols = st.columns(1)
@@ -0,0 +1,121 @@
+"""
+SportSync AI - Question Bank
+One cached, compiled source of question data for the API and Streamlit apps
+
+- load_question_bank(path) parses a question file once per process and
+  keeps it until the file's mtime/size change (checked at most every
+  STAT_INTERVAL_SECS), so Streamlit reruns never touch disk.
+- QuestionBank compiles the questions once:
+    by_key           {question key: question}
+    for_language()   per-language projection (question text + option texts),
+                     precomputed for "ar" and "en"
+    match_option()   answer text -> option (exact lookup, then the scorer's
+                     substring rule), used by the FastAPI personality scorer
+- Handles both formats: v2 (options with text_ar/text_en/scores) and the
+  old one (multiple_choices).
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+STAT_INTERVAL_SECS = 2.0
+LANGUAGES = ("ar", "en")
+
+
+def lang_code(lang: str) -> str:
+    """"ar" / "en" from any of the language labels used across the apps"""
+    return "en" if str(lang).strip().lower() in ("en", "english", "eng") else "ar"
+
+
+class QuestionBank:
+    """Immutable, compiled view of one question file"""
+
+    def __init__(self, questions: List[Dict[str, Any]], path: Optional[str] = None):
+        self.questions = questions
+        self.path = path
+        self.by_key = {q.get("key"): q for q in questions if q.get("key")}
+        self._exact = {
+            key: {
+                text: option
+                for option in reversed(q.get("options", []))
+                for text in (option.get("text_ar"), option.get("text_en"))
+                if text
+            }
+            for key, q in self.by_key.items()
+        }
+        self._projections = {lang: [self._project(q, lang) for q in questions] for lang in LANGUAGES}
+
+    @staticmethod
+    def _project(q: Dict[str, Any], lang: str) -> Dict[str, Any]:
+        other = "en" if lang == "ar" else "ar"
+        if "options" in q:
+            options = [o.get(f"text_{lang}") or o.get(f"text_{other}", "") for o in q["options"]]
+        else:
+            options = list(q.get("multiple_choices", []))
+        return {
+            "key": q.get("key"),
+            "question": q.get(f"question_{lang}") or q.get(f"question_{other}", ""),
+            "type": q.get("type", "single"),
+            "options": options,
+            "allow_custom": q.get("allow_custom", False)
+        }
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def for_language(self, lang: str) -> List[Dict[str, Any]]:
+        return self._projections[lang_code(lang)]
+
+    def question(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.by_key.get(key)
+
+    def match_option(self, key: str, answer_text: str) -> Optional[Dict[str, Any]]:
+        """The option the answer refers to (exact text first, then substring)"""
+        option = self._exact.get(key, {}).get(answer_text)
+        if option is not None:
+            return option
+        question = self.by_key.get(key)
+        for option in (question or {}).get("options", []):
+            if answer_text in option.get("text_ar", "") or answer_text in option.get("text_en", ""):
+                return option
+        return None
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROCESS-WIDE CACHE
+# ═══════════════════════════════════════════════════════════════
+
+_cache: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def load_question_bank(path) -> QuestionBank:
+    """Cached QuestionBank for path; recompiled only when the file changes"""
+    key = str(Path(path).resolve())
+    now = time.monotonic()
+    entry = _cache.get(key)
+    if entry and now - entry["checked_at"] < STAT_INTERVAL_SECS:
+        return entry["bank"]
+
+    with _lock:
+        stat = Path(key).stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        entry = _cache.get(key)
+        if entry is None or entry["signature"] != signature:
+            with open(key, "r", encoding="utf-8") as f:
+                bank = QuestionBank(json.load(f), key)
+            print(f"[QUESTIONS] ✅ Compiled {len(bank)} questions from {Path(key).name}")
+            entry = {"bank": bank, "signature": signature}
+            _cache[key] = entry
+        entry["checked_at"] = now
+        return entry["bank"]
+
+
+def first_existing(paths: Iterable) -> Optional[Path]:
+    for path in paths:
+        if Path(path).exists():
+            return Path(path)
+    return None
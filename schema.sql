@@ -131,6 +131,7 @@ CREATE INDEX idx_users_language ON users(language);
 CREATE INDEX idx_sessions_user_id ON user_sessions(user_id);
 CREATE INDEX idx_sessions_created_at ON user_sessions(created_at);
 CREATE INDEX idx_sessions_completed ON user_sessions(completed);
+CREATE INDEX idx_sessions_completed_created_user ON user_sessions(completed, created_at, user_id);
 
 -- Recommendations indexes
 CREATE INDEX idx_recommendations_user_id ON recommendations(user_id);
@@ -138,6 +139,7 @@ CREATE INDEX idx_recommendations_session_id ON recommendations(session_id);
 CREATE INDEX idx_recommendations_sport_label ON recommendations(sport_label);
 CREATE INDEX idx_recommendations_created_at ON recommendations(created_at);
 CREATE INDEX idx_recommendations_match_score ON recommendations(match_score DESC);
+CREATE INDEX idx_recommendations_created_user ON recommendations(created_at, user_id);
 
 -- Blacklist indexes
 CREATE INDEX idx_blacklist_label ON blacklist(sport_label);
@@ -146,6 +148,7 @@ CREATE INDEX idx_blacklist_label ON blacklist(sport_label);
 CREATE INDEX idx_analytics_user_id ON analytics_events(user_id);
 CREATE INDEX idx_analytics_event_name ON analytics_events(event_name);
 CREATE INDEX idx_analytics_created_at ON analytics_events(created_at);
+CREATE INDEX idx_analytics_user_created ON analytics_events(user_id, created_at);
 
 -- A/B Testing indexes
 CREATE INDEX idx_ab_experiments_name ON ab_experiments(experiment_name);
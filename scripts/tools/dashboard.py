@@ -1,9 +1,13 @@
 import streamlit as st
-from agents.marketing.video_pipeline.full_video_pipeline import generate_ai_video
 import os
+import sys
 from datetime import datetime
+from pathlib import Path
 import uuid
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from components.background_tasks import get_background_tasks, poll_every, run_cancellable
+
 st.set_page_config(page_title="SportSync Dashboard", layout="centered")
 
 # =========================
@@ -29,28 +33,58 @@ lang = st.selectbox("🌍 اختر اللغة:", ["en", "arabic"])
 video_type = st.radio("🎬 نوع الفيديو:", ["🎞 مقطع طويل", "🎯 اقتباس قصير", "📢 إعلان تجريبي"])
 
 # =========================
-# 🚀 توليد الفيديو
+# 🚀 توليد الفيديو (في الخلفية: إعادة التشغيل أو التنقل لا يوقفان العمل)
 # =========================
+tasks = get_background_tasks()
+if "dashboard_session" not in st.session_state:
+    st.session_state.dashboard_session = uuid.uuid4().hex
+session_key = st.session_state.dashboard_session
+tasks.heartbeat(session_key)
+
+# Runs in a child process so "cancel" really stops it and frees the worker
+VIDEO_PIPELINE = "agents.marketing.video_pipeline.full_video_pipeline:generate_ai_video"
+
+def _video_task(ctx, user_data, lang):
+    ctx.progress("video", 0, 1)
+    return run_cancellable(ctx, VIDEO_PIPELINE, user_data, lang=lang)
+
 if st.button("🚀 توليد الفيديو الآن"):
     if not user_input or not str(user_input).strip():
         st.warning("الرجاء إدخال الفكرة أو بيانات المستخدم أولاً.")
     else:
-        with st.spinner("جاري تحليل البيانات وتوليد الفيديو... ⏳"):
-            full_text = user_input if isinstance(user_input, str) else str(user_input)
+        full_text = user_input if isinstance(user_input, str) else str(user_input)
+
+        user_data = {
+            "full_text": full_text,
+            "answers": {},
+            "video_type": video_type  # ✅ تم الإضافة هنا
+        }
+        # restart only when the previous video is finished (double clicks keep the running job)
+        previous = tasks.status(session_key, "video")
+        tasks.submit(session_key, "video", _video_task, user_data, lang,
+                     restart=bool(previous and previous["state"] == "done"))
 
-            user_data = {
-                "full_text": full_text,
-                "answers": {},
-                "video_type": video_type  # ✅ تم الإضافة هنا
-            }
+@poll_every(2.0)
+def show_video_task():
+    task = tasks.status(session_key, "video")
+    if task is None:
+        return False
+    if task["state"] in ("pending", "running"):
+        st.info("جاري تحليل البيانات وتوليد الفيديو... ⏳")
+        if st.button("⏹ إلغاء"):
+            tasks.cancel(session_key, "video")
+        return True
+    if task["state"] == "done":
+        st.success("✅ تم توليد الفيديو بنجاح!")
+        st.video(task["result"])
+        st.markdown(f"📁 المسار: {task['result']}")
+    elif task["state"] == "error":
+        st.error(f"❌ حصل خطأ أثناء التوليد: {task['error']}")
+    else:
+        st.warning("تم إلغاء التوليد.")
+    return False
 
-            try:
-                video_path = generate_ai_video(user_data, lang=lang)
-                st.success("✅ تم توليد الفيديو بنجاح!")
-                st.video(video_path)
-                st.markdown(f"📁 المسار: {video_path}")
-            except Exception as e:
-                st.error(f"❌ حصل خطأ أثناء التوليد: {e}")
+show_video_task()
 
 # =========================
 # 📈 ملاحظات الأداء
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+كاش الصور المولّدة
+==================
+Content-addressed, size-bounded LRU disk cache for generated images
+
+- Key = sha256 of (backend, model, workflow, prompt, negative prompt, seed,
+  width, height) plus every other generation param (steps, cfg_scale,
+  sampler...); anything else (overlay text, titles) is applied after the
+  cache, so re-rendering a video after a text tweak reuses every image.
+- Layout: <root>/<key[:2]>/<key>.png + <key>.json (seed, params, timestamps)
+- Writes are atomic (temp file + os.replace), so parallel workers and
+  interrupted runs never leave a half-written image.
+- Hits refresh the file mtime; when the cache grows past max_bytes the
+  least recently used entries are evicted.
+
+USAGE:
+    cache = ImageCache()                       # $SPORTSYNC_IMAGE_CACHE
+    key = image_key("runpod", "flux", prompt, seed=7341, width=1080, height=1920)
+    cache.get(key) / cache.put(key, png_bytes, {"seed": 7341})
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_DIR = os.getenv("SPORTSYNC_IMAGE_CACHE", "content_studio/ai_video/image_cache")
+DEFAULT_MAX_BYTES = int(float(os.getenv("SPORTSYNC_IMAGE_CACHE_MB", "2048")) * 1024 * 1024)
+
+
+def image_key(backend: str, model: Any, prompt: str, negative_prompt: str = None,
+              seed: Any = None, width: int = None, height: int = None, **params) -> str:
+    """Stable content address for one generation request (extra kwargs = other generate_image params)"""
+    if isinstance(model, (dict, list)):
+        # ComfyUI workflows: hash the graph itself
+        model = hashlib.sha256(
+            json.dumps(model, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+    raw = json.dumps(
+        [backend, model, prompt, negative_prompt or "", seed, width, height, params],
+        ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class ImageCache:
+    """Disk LRU keyed by image_key()"""
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._size = sum(p.stat().st_size for p in self.root.glob("*/*.png"))
+
+    def _paths(self, key: str):
+        folder = self.root / key[:2]
+        return folder / f"{key}.png", folder / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Path of the cached image (and mark it recently used), or None"""
+        image, _ = self._paths(key)
+        try:
+            os.utime(image)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return image
+
+    def meta(self, key: str) -> Dict[str, Any]:
+        _, meta = self._paths(key)
+        try:
+            with open(meta, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def put(self, key: str, data: bytes, meta: Dict[str, Any] = None) -> Path:
+        image, meta_path = self._paths(key)
+        previous = image.stat().st_size if image.exists() else 0
+        _atomic_write(meta_path, json.dumps({**(meta or {}), "cached_at": time.time()},
+                                            ensure_ascii=False).encode("utf-8"))
+        _atomic_write(image, data)
+        with self._lock:
+            self._size += len(data) - previous
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+        return image
+
+    def evict(self) -> int:
+        """Drop least recently used images until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for image in self.root.glob("*/*.png"):
+                try:
+                    st = image.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, image))
+            entries.sort()
+            self._size = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, image in entries:
+                if self._size <= self.max_bytes:
+                    break
+                for path in (image, image.with_suffix(".json")):
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+                self._size -= size
+                removed += 1
+            return removed
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
@@ -9,7 +9,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from PIL import Image, ImageDraw, ImageFont
-from moviepy import ImageClip, concatenate_videoclips
+from video_render import render_slideshow, print_render_progress
 from gtts import gTTS
 import os
 
@@ -99,32 +99,17 @@ except Exception as e:
 print("\n🎞  تجميع الفيديو...")
 
 try:
-    # إنشاء كليبات الصور
-    clips = []
     duration_per_image = 4  # 4 ثواني لكل صورة
     
-    for img_path in image_paths:
-        clip = ImageClip(img_path).with_duration(duration_per_image)
-        clips.append(clip)
-    
-    # دمج الكليبات
-    final_video = concatenate_videoclips(clips, method="compose")
-    
-    # إضافة الصوت إذا كان متاحاً
-    if has_audio and voice_path.exists():
-        from moviepy import AudioFileClip
-        audio = AudioFileClip(str(voice_path))
-        final_video = final_video.with_audio(audio)
-    
-    # حفظ الفيديو
+    # تجميع الصور + الصوت (إن وجد) مباشرة عبر ffmpeg
     output_path = OUTPUT_DIR / "sportsync_demo.mp4"
-    final_video.write_videofile(
-        str(output_path),
+    render_slideshow(
+        image_paths,
+        output_path,
+        durations=duration_per_image,
+        audio=voice_path if has_audio and voice_path.exists() else None,
         fps=24,
-        codec='libx264',
-        audio_codec='aac' if has_audio else None,
-        preset='medium',
-        threads=4
+        on_progress=print_render_progress
     )
     
     print("\n" + "=" * 60)
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+توليد صور المشاهد بالتوازي
+==========================
+Reusable scene-image stage for the video scripts
+
+- Scenes are submitted to the image backend concurrently (bounded by
+  max_workers), so a long video takes about as long as its slowest image
+  instead of the sum of all of them.
+- Each scene is retried with exponential backoff + jitter; a scene that
+  still fails gets a placeholder (fallback) instead of failing the video.
+- on_progress(done, total, result) is called as scenes finish; results
+  are returned in scene order.
+- With an ImageCache, scenes whose (backend, model, prompt, negative
+  prompt, seed, size) were generated before are copied from the cache
+  instead of calling the backend.
+
+Backend: any object with generate_image(prompt=..., width=..., height=...,
+**params) -> {"success", "image_b64", "seed", "error"} - RunPodFluxClient,
+or RunPodHTTPClient below (RunPod serverless /runsync, also works against
+a local stand-in server).
+
+USAGE:
+    python scripts/tools/scene_images.py --prompts tmp/scenes.use --out outputs/gha_short_work
+"""
+import argparse
+import base64
+import os
+import random
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from image_cache import DEFAULT_CACHE_DIR, ImageCache, image_key
+
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 30.0
+# generate_image params that only steer the request, not the pixels: kept out of the cache key
+NON_OUTPUT_PARAMS = frozenset({"timeout", "webhook"})
+
+# =====================================================
+# RunPod HTTP client
+# =====================================================
+
+class RunPodHTTPClient:
+    """RunPod serverless endpoint: POST /runsync, then poll /status/{id} if still queued"""
+
+    name = "runpod"
+
+    def __init__(self, base_url: str = None, api_key: str = None, endpoint_id: str = None,
+                 model: str = "flux", workflow: Dict[str, Any] = None,
+                 timeout: float = 120, poll_secs: float = 2.0):
+        endpoint_id = endpoint_id or os.getenv("RUNPOD_ENDPOINT_ID", "")
+        base_url = base_url or os.getenv("RUNPOD_BASE_URL") or f"https://api.runpod.ai/v2/{endpoint_id}"
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.workflow = workflow
+        self.timeout = timeout
+        self.poll_secs = poll_secs
+        self.session = requests.Session()
+        api_key = api_key or os.getenv("RUNPOD_API_KEY")
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+    @staticmethod
+    def _parse_output(output: Any) -> Dict[str, Any]:
+        if isinstance(output, list) and output:
+            output = output[0]
+        if not isinstance(output, dict):
+            return {"success": False, "error": "empty output"}
+        image_b64 = output.get("image_b64") or output.get("image")
+        if not image_b64 and output.get("images"):
+            first = output["images"][0]
+            image_b64 = first.get("data") if isinstance(first, dict) else first
+        if not image_b64:
+            return {"success": False, "error": output.get("error", "no image in output")}
+        if "," in image_b64[:64]:
+            image_b64 = image_b64.split(",", 1)[1]  # data URI
+        return {"success": True, "image_b64": image_b64, "seed": output.get("seed")}
+
+    def generate_image(self, prompt: str, width: int = 1080, height: int = 1920, **params) -> Dict[str, Any]:
+        payload = {"prompt": prompt, "width": width, "height": height, **params}
+        if self.workflow is not None:
+            payload["workflow"] = self.workflow
+        r = self.session.post(f"{self.base_url}/runsync", json={"input": payload}, timeout=self.timeout)
+        r.raise_for_status()
+        job = r.json()
+
+        deadline = time.time() + self.timeout
+        while job.get("status") in ("IN_QUEUE", "IN_PROGRESS") and time.time() < deadline:
+            time.sleep(self.poll_secs)
+            r = self.session.get(f"{self.base_url}/status/{job['id']}", timeout=self.timeout)
+            r.raise_for_status()
+            job = r.json()
+
+        if job.get("status") != "COMPLETED":
+            return {"success": False, "error": job.get("error") or f"status {job.get('status')}"}
+        return self._parse_output(job.get("output"))
+
+# =====================================================
+# Concurrent stage
+# =====================================================
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE) -> float:
+    """Exponential backoff with jitter for the given (1-based) failed attempt"""
+    return min(BACKOFF_MAX, base * (2 ** (attempt - 1))) * random.uniform(0.5, 1.0)
+
+
+def generate_scene_images(
+    scenes: List[Dict[str, Any]],
+    backend,
+    out_dir: Path,
+    prompt_fn: Callable[[Dict[str, Any]], str] = None,
+    params: Dict[str, Any] = None,
+    max_workers: int = DEFAULT_WORKERS,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = BACKOFF_BASE,
+    fallback: Callable[[int, Dict[str, Any]], Any] = None,
+    postprocess: Callable[[Path, int, Dict[str, Any]], Any] = None,
+    on_progress: Callable[[int, int, Dict[str, Any]], None] = None,
+    cache: Optional[ImageCache] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Generate one image per scene (index is 1-based, files are scene_XX.png)
+
+    prompt_fn(scene)            -> prompt (default: scene["image_prompt"])
+    params                      -> extra generate_image kwargs (width, height, steps, seed...);
+                                   a scene's own "seed" / "negative_prompt" override them
+    fallback(index, scene)      -> path of a placeholder when every attempt failed
+    postprocess(path, index, scene) -> final path (e.g. text overlay)
+
+    Returns [{"index", "path", "source": "backend"|"cache"|"placeholder", "seed",
+              "attempts", "error", "elapsed"}] in scene order.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    params = dict(params or {})
+    prompt_fn = prompt_fn or (lambda scene: scene["image_prompt"])
+    total = len(scenes)
+    backend_name = getattr(backend, "name", type(backend).__name__)
+    backend_model = getattr(backend, "workflow", None) or getattr(backend, "model", None)
+    done = [0]
+    lock = threading.Lock()
+
+    def run(index: int, scene: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.time()
+        result = {"index": index, "path": None, "source": "backend", "seed": None,
+                  "attempts": 0, "error": None}
+        prompt = prompt_fn(scene)
+        scene_params = dict(params)
+        for name in ("seed", "negative_prompt"):
+            if scene.get(name) is not None:
+                scene_params[name] = scene[name]
+        path = out_dir / f"scene_{index:02d}.png"
+
+        key = cached = None
+        if cache is not None:
+            key = image_key(backend_name, backend_model, prompt, **{
+                name: value for name, value in scene_params.items() if name not in NON_OUTPUT_PARAMS
+            })
+            cached = cache.get(key)
+        if cached is not None:
+            # Copy: postprocess draws on the scene file, the cached image stays clean
+            try:
+                shutil.copyfile(cached, path)
+                result.update(path=path, source="cache", seed=cache.meta(key).get("seed"))
+            except FileNotFoundError:
+                pass  # evicted meanwhile -> generate
+
+        for attempt in range(1, retries + 1):
+            if result["path"] is not None:
+                break
+            result["attempts"] = attempt
+            try:
+                response = backend.generate_image(prompt=prompt, **scene_params)
+                if not response.get("success"):
+                    raise RuntimeError(response.get("error", "Unknown"))
+                data = base64.b64decode(response["image_b64"])
+                path.write_bytes(data)
+                if cache is not None:
+                    cache.put(key, data, {"seed": response.get("seed"), "prompt": prompt})
+                result.update(path=path, seed=response.get("seed"), error=None)
+            except Exception as e:
+                result["error"] = str(e)
+                if attempt < retries:
+                    time.sleep(backoff_delay(attempt, backoff))
+
+        if result["path"] is None:
+            result["source"] = "placeholder"
+            result["path"] = Path(fallback(index, scene)) if fallback else None
+        elif postprocess:
+            result["path"] = Path(postprocess(result["path"], index, scene))
+        result["elapsed"] = time.time() - start
+
+        with lock:
+            done[0] += 1
+            if on_progress:
+                on_progress(done[0], total, result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total or 1)),
+                            thread_name_prefix="scene-image") as pool:
+        futures = [pool.submit(run, i, scene) for i, scene in enumerate(scenes, 1)]
+        return [f.result() for f in futures]
+
+
+def print_progress(done: int, total: int, result: Dict[str, Any]) -> None:
+    """Default console progress callback"""
+    if result["source"] == "backend":
+        status = f"✅ (seed: {result.get('seed', 'N/A')}, {result['elapsed']:.1f}s)"
+    elif result["source"] == "cache":
+        status = f"♻️ من الكاش (seed: {result.get('seed', 'N/A')})"
+    else:
+        status = f"⚠️ placeholder ({result['error']})"
+    print(f"   [{done}/{total}] المشهد {result['index']}: {status}")
+
+# =====================================================
+# CLI (GitHub workflow)
+# =====================================================
+
+if __name__ == "__main__":
+    import json
+
+    parser = argparse.ArgumentParser(description="Generate scene images concurrently")
+    parser.add_argument("--prompts", required=True,
+                        help="text file (one prompt per line) or prompts/*.json preset(s)")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--workflow", help="ComfyUI workflow JSON sent with each request")
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=1920)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--cache", default=None, help="image cache dir (default $SPORTSYNC_IMAGE_CACHE)")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.prompts, "r", encoding="utf-8") as f:
+        if args.prompts.endswith(".json"):
+            presets = json.load(f)
+            presets = presets if isinstance(presets, list) else [presets]
+            scenes = [{"image_prompt": p["prompt"], "negative_prompt": p.get("negative_prompt"),
+                       "seed": p.get("seed")} for p in presets]
+        else:
+            scenes = [{"image_prompt": line.strip()} for line in f if line.strip()]
+    workflow = None
+    if args.workflow:
+        with open(args.workflow, "r", encoding="utf-8") as f:
+            workflow = json.load(f)
+
+    results = generate_scene_images(
+        scenes, RunPodHTTPClient(workflow=workflow), Path(args.out),
+        params={"width": args.width, "height": args.height},
+        max_workers=args.workers, retries=args.retries, on_progress=print_progress,
+        cache=None if args.no_cache else ImageCache(args.cache or DEFAULT_CACHE_DIR)
+    )
+    failed = [r["index"] for r in results if r["path"] is None]
+    if failed:
+        raise SystemExit(f"❌ No image for scenes {failed}")
@@ -9,8 +9,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from PIL import Image, ImageDraw, ImageFont
-from moviepy import ImageClip, concatenate_videoclips, AudioFileClip
-from gtts import gTTS
+from video_render import render_slideshow, print_render_progress
+from voiceover import synthesize_voiceover, print_tts_progress
 import time
 
 # =====================================================
@@ -372,19 +372,18 @@ if __name__ == "__main__":
         print(f"   ✅ المشهد {i+1}: {scene['title'][:50]}...")
     
     # 3. إنشاء الصوت
-    print("\n🔊 توليد الصوت...")
-    print("   ⏳ هذه الخطوة قد تستغرق دقيقة...")
+    print("\n🔊 توليد الصوت (لكل مشهد، بالتوازي + كاش)...")
     
     try:
-        # تحضير النص للصوت (بدون عناوين)
-        voice_text = ""
-        for scene in scenes:
-            voice_text += " ".join(scene['content']) + " ... "
-        
-        tts = gTTS(text=voice_text.strip(), lang='ar', slow=False)
-        voice_path = OUTPUT_DIR / "long_demo_voice.mp3"
-        tts.save(str(voice_path))
-        print(f"   ✅ تم حفظ الصوت ({voice_path.stat().st_size / 1024:.0f} KB)")
+        # نص كل مشهد بدون العنوان
+        voice = synthesize_voiceover(
+            [" ".join(scene['content']) for scene in scenes],
+            OUTPUT_DIR / "long_demo_voice.m4a",
+            lang='ar',
+            on_progress=print_tts_progress
+        )
+        voice_path = voice["path"]
+        print(f"   ✅ تم حفظ الصوت ({voice_path.stat().st_size / 1024:.0f} KB، {voice['cached']} مشهد من الكاش)")
         has_audio = True
     except Exception as e:
         print(f"   ⚠️  فشل إنشاء الصوت: {e}")
@@ -392,45 +391,29 @@ if __name__ == "__main__":
     
     # 4. إنشاء الفيديو
     print("\n🎞  تجميع الفيديو...")
-    print("   ⏳ هذه الخطوة قد تستغرق 2-3 دقائق...")
     
     start_time = time.time()
     
     try:
-        # حساب مدة كل صورة بناءً على طول الصوت
-        if has_audio and voice_path.exists():
-            from moviepy import AudioFileClip
-            audio = AudioFileClip(str(voice_path))
-            audio_duration = audio.duration
-            duration_per_image = audio_duration / len(scenes)
+        # مدة كل صورة = مدة كلام مشهدها بالضبط
+        if has_audio:
+            durations = voice["durations"]
+            audio_duration = voice["total"]
             print(f"   📊 مدة الصوت: {audio_duration:.1f} ثانية")
-            print(f"   📊 مدة كل صورة: {duration_per_image:.1f} ثانية")
+            print(f"   📊 مدة المشاهد: {min(durations):.1f}-{max(durations):.1f} ثانية")
         else:
-            duration_per_image = 25  # 25 ثانية لكل مشهد بدون صوت
-            audio_duration = duration_per_image * len(scenes)
-        
-        # إنشاء كليبات الصور
-        clips = []
-        for img_path in image_paths:
-            clip = ImageClip(img_path).with_duration(duration_per_image)
-            clips.append(clip)
-        
-        # دمج الكليبات
-        final_video = concatenate_videoclips(clips, method="compose")
-        
-        # إضافة الصوت
-        if has_audio and voice_path.exists():
-            final_video = final_video.with_audio(audio)
+            durations = 25  # 25 ثانية لكل مشهد بدون صوت
+            audio_duration = durations * len(scenes)
         
-        # حفظ الفيديو
+        # تجميع الفيديو مع الصوت مباشرة عبر ffmpeg
         output_path = OUTPUT_DIR / "sportsync_long_demo.mp4"
-        final_video.write_videofile(
-            str(output_path),
+        render_slideshow(
+            image_paths,
+            output_path,
+            durations=durations,
+            audio=voice_path if has_audio else None,
             fps=24,
-            codec='libx264',
-            audio_codec='aac' if has_audio else None,
-            preset='medium',
-            threads=4
+            on_progress=print_render_progress
         )
         
         elapsed_time = time.time() - start_time
@@ -8,15 +8,17 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from PIL import Image, ImageDraw, ImageFont
-from moviepy import ImageClip, concatenate_videoclips, AudioFileClip
-from gtts import gTTS
+from PIL import Image
+from text_overlay import draw_scene_overlay, render_placeholder
+from video_render import render_slideshow, print_render_progress
+from voiceover import synthesize_voiceover, print_tts_progress
 import time
 import io
-import base64
 
 # استيراد RunPod client
 from src.core.runpod_flux_client import RunPodFluxClient, enhance_prompt_for_sport
+from scene_images import generate_scene_images, print_progress
+from image_cache import ImageCache
 
 # =====================================================
 # السكربت الكامل - محتوى غني لـ 5 دقائق
@@ -98,9 +100,9 @@ IMAGES_DIR.mkdir(parents=True, exist_ok=True)
 # توليد الصور باستخدام RunPod
 # =====================================================
 
-def generate_runpod_images(scenes: list):
-    """توليد صور RunPod لكل مشهد"""
-    print("\n🎨 توليد صور RunPod Flux (هذه الخطوة قد تستغرق 10-15 دقيقة)...")
+def generate_runpod_images(scenes: list, max_workers: int = 4):
+    """توليد صور RunPod لكل مشهد (بالتوازي، مع إعادة المحاولة و placeholder عند الفشل)"""
+    print("\n🎨 توليد صور RunPod Flux بالتوازي...")
     print("=" * 70)
     
     try:
@@ -111,65 +113,24 @@ def generate_runpod_images(scenes: list):
         print("💡 راح نستخدم صور placeholder بديلة")
         return generate_placeholder_images(scenes)
     
-    image_paths = []
-    
-    for i, scene in enumerate(scenes, 1):
-        print(f"\n[{i}/{len(scenes)}] {scene['title']}")
-        print(f"   Prompt: {scene['image_prompt'][:60]}...")
-        
-        try:
-            # تحسين البرومبت
-            enhanced_prompt = enhance_prompt_for_sport(
-                scene['image_prompt'],
-                lang='en'
-            )
-            
-            # توليد الصورة
-            result = client.generate_image(
-                prompt=enhanced_prompt,
-                width=1080,
-                height=1920,  # Portrait
-                steps=25,
-                cfg_scale=7.5
-            )
-            
-            if result.get('success'):
-                # حفظ الصورة
-                img_data = base64.b64decode(result['image_b64'])
-                img_path = IMAGES_DIR / f"scene_{i:02d}.png"
-                
-                with open(img_path, 'wb') as f:
-                    f.write(img_data)
-                
-                # إضافة النص على الصورة
-                img_path = add_text_overlay(
-                    img_path,
-                    scene['title'],
-                    scene['text'],
-                    i,
-                    len(scenes)
-                )
-                
-                image_paths.append(str(img_path))
-                print(f"   ✅ تم (seed: {result.get('seed', 'N/A')})")
-                
-            else:
-                print(f"   ⚠️ فشل: {result.get('error', 'Unknown')}")
-                # استخدام placeholder كبديل
-                img_path = create_placeholder(i, scene)
-                image_paths.append(str(img_path))
-            
-            # انتظار قصير بين الطلبات
-            if i < len(scenes):
-                time.sleep(2)
-                
-        except Exception as e:
-            print(f"   ❌ خطأ: {e}")
-            img_path = create_placeholder(i, scene)
-            image_paths.append(str(img_path))
+    results = generate_scene_images(
+        scenes,
+        client,
+        IMAGES_DIR,
+        prompt_fn=lambda scene: enhance_prompt_for_sport(scene['image_prompt'], lang='en'),
+        params={"width": 1080, "height": 1920, "steps": 25, "cfg_scale": 7.5},  # Portrait
+        max_workers=max_workers,
+        fallback=create_placeholder,
+        postprocess=lambda path, i, scene: add_text_overlay(path, scene['title'], scene['text'], i, len(scenes)),
+        on_progress=print_progress,
+        cache=ImageCache()  # نفس البرومبتات = نفس الصور، بدون دفع مرة ثانية
+    )
+    image_paths = [str(r["path"]) for r in results]
     
     print("\n" + "=" * 70)
-    print(f"✅ تم توليد {len(image_paths)} صورة")
+    print(f"✅ تم توليد {len(image_paths)} صورة "
+          f"({sum(r['source'] == 'cache' for r in results)} من الكاش، "
+          f"{sum(r['source'] == 'placeholder' for r in results)} placeholder)")
     return image_paths
 
 # =====================================================
@@ -179,109 +140,26 @@ def generate_runpod_images(scenes: list):
 def add_text_overlay(img_path: Path, title: str, text: str, scene_num: int, total_scenes: int):
     """إضافة نص على صورة RunPod"""
     try:
-        # فتح الصورة
-        img = Image.open(img_path)
-        draw = ImageDraw.Draw(img)
-        
-        # خطوط
-        try:
-            font_title = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial Bold.ttf", 70)
-            font_text = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial.ttf", 45)
-        except:
-            font_title = ImageFont.load_default()
-            font_text = ImageFont.load_default()
-        
-        # خلفية شبه شفافة للنص
-        overlay = Image.new('RGBA', img.size, (0, 0, 0, 0))
-        overlay_draw = ImageDraw.Draw(overlay)
-        
-        # مستطيل خلفية للعنوان
-        overlay_draw.rectangle([(0, 100), (1080, 280)], fill=(0, 0, 0, 180))
-        
-        # مستطيل خلفية للنص
-        overlay_draw.rectangle([(0, 1400), (1080, 1800)], fill=(0, 0, 0, 180))
-        
-        # دمج الخلفية مع الصورة
-        img = img.convert('RGBA')
-        img = Image.alpha_composite(img, overlay)
-        img = img.convert('RGB')
-        draw = ImageDraw.Draw(img)
-        
-        # رسم العنوان
-        draw.text((540, 190), title, fill=(255, 255, 255), 
-                 font=font_title, anchor="mm")
-        
-        # رسم النص (مختصر)
-        text_lines = wrap_text(text, 35)
-        y = 1500
-        for line in text_lines[:5]:
-            draw.text((540, y), line, fill=(255, 255, 255),
-                     font=font_text, anchor="mm")
-            y += 60
-        
-        # رقم المشهد
-        draw.text((540, 1850), f"{scene_num} / {total_scenes}",
-                 fill=(200, 200, 200), font=font_text, anchor="mm")
-        
-        # حفظ
-        img.save(img_path)
+        with Image.open(img_path) as img:
+            img = img.convert("RGB")
+        draw_scene_overlay(img, title, text, scene_num, total_scenes).save(img_path)
         return img_path
         
     except Exception as e:
         print(f"   ⚠️ فشل إضافة النص: {e}")
         return img_path
 
-def wrap_text(text: str, max_chars: int):
-    """تقسيم النص لأسطر"""
-    words = text.split()
-    lines = []
-    current_line = ""
-    
-    for word in words:
-        if len(current_line + " " + word) <= max_chars:
-            current_line += " " + word if current_line else word
-        else:
-            if current_line:
-                lines.append(current_line)
-            current_line = word
-    
-    if current_line:
-        lines.append(current_line)
-    
-    return lines
-
 # =====================================================
 # صور Placeholder (بديلة)
 # =====================================================
 
+PLACEHOLDER_COLORS = [(25, 35, 45), (35, 45, 55), (45, 55, 65),
+                      (55, 65, 75), (30, 50, 70), (40, 60, 80)]
+
 def create_placeholder(scene_num: int, scene: dict):
     """إنشاء صورة placeholder"""
-    colors = [(25, 35, 45), (35, 45, 55), (45, 55, 65), 
-              (55, 65, 75), (30, 50, 70), (40, 60, 80)]
-    color = colors[scene_num % len(colors)]
-    
-    img = Image.new("RGB", (1080, 1920), color)
-    draw = ImageDraw.Draw(img)
-    
-    try:
-        font_title = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial Bold.ttf", 70)
-        font_text = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial.ttf", 50)
-    except:
-        font_title = ImageFont.load_default()
-        font_text = ImageFont.load_default()
-    
-    draw.text((540, 200), scene['title'], fill=(180, 180, 180),
-             font=font_title, anchor="mm")
-    
-    text_lines = wrap_text(scene['text'], 30)
-    y = 600
-    for line in text_lines[:8]:
-        draw.text((540, y), line, fill=(255, 255, 255),
-                 font=font_text, anchor="mm")
-        y += 80
-    
-    draw.text((540, 1800), f"{scene_num} / {len(FULL_SCRIPT)}",
-             fill=(150, 150, 150), font=font_text, anchor="mm")
+    color = PLACEHOLDER_COLORS[scene_num % len(PLACEHOLDER_COLORS)]
+    img = render_placeholder(scene['title'], scene['text'], scene_num, len(FULL_SCRIPT), color=color)
     
     img_path = IMAGES_DIR / f"scene_{scene_num:02d}_placeholder.png"
     img.save(img_path)
@@ -306,7 +184,7 @@ def generate_placeholder_images(scenes: list):
 if __name__ == "__main__":
     print("🎬 بدء توليد فيديو 5 دقائق مع RunPod")
     print("=" * 70)
-    print("⏱️  الوقت المتوقع: 15-20 دقيقة")
+    print("⏱️  الوقت المتوقع: 5-8 دقائق")
     print("=" * 70)
     
     start_total = time.time()
@@ -320,15 +198,17 @@ if __name__ == "__main__":
     image_paths = generate_runpod_images(FULL_SCRIPT)
     
     # 3. توليد الصوت
-    print("\n🔊 توليد الصوت...")
-    print("   ⏳ هذه الخطوة قد تستغرق دقيقة...")
+    print("\n🔊 توليد الصوت (لكل مشهد، بالتوازي + كاش)...")
     
     try:
-        voice_text = " ... ".join([scene['text'] for scene in FULL_SCRIPT])
-        tts = gTTS(text=voice_text, lang='ar', slow=False)
-        voice_path = OUTPUT_DIR / "runpod_demo_voice.mp3"
-        tts.save(str(voice_path))
-        print(f"   ✅ تم ({voice_path.stat().st_size / 1024:.0f} KB)")
+        voice = synthesize_voiceover(
+            [scene['text'] for scene in FULL_SCRIPT],
+            OUTPUT_DIR / "runpod_demo_voice.m4a",
+            lang='ar',
+            on_progress=print_tts_progress
+        )
+        voice_path = voice["path"]
+        print(f"   ✅ تم ({voice_path.stat().st_size / 1024:.0f} KB، {voice['cached']} مشهد من الكاش)")
         has_audio = True
     except Exception as e:
         print(f"   ⚠️ فشل: {e}")
@@ -336,37 +216,27 @@ if __name__ == "__main__":
     
     # 4. تجميع الفيديو
     print("\n🎞  تجميع الفيديو...")
-    print("   ⏳ قد يستغرق 2-3 دقائق...")
     
     try:
         # حساب المدة
+        # كل صورة تظهر بالضبط طول كلام مشهدها
         if has_audio:
-            audio = AudioFileClip(str(voice_path))
-            audio_duration = audio.duration
-            duration_per_image = audio_duration / len(FULL_SCRIPT)
+            durations = voice["durations"]
+            audio_duration = voice["total"]
             print(f"   📊 مدة الصوت: {audio_duration:.1f}ث ({audio_duration/60:.1f} دقيقة)")
         else:
-            duration_per_image = 25
-            audio_duration = duration_per_image * len(FULL_SCRIPT)
-        
-        # إنشاء الكليبات
-        clips = [ImageClip(img).with_duration(duration_per_image) 
-                for img in image_paths]
-        
-        final_video = concatenate_videoclips(clips, method="compose")
-        
-        if has_audio:
-            final_video = final_video.with_audio(audio)
+            durations = 25
+            audio_duration = durations * len(FULL_SCRIPT)
         
-        # حفظ
+        # تجميع مباشر عبر ffmpeg (concat + scale/crop/fps + الصوت بـ -shortest)
         output_path = OUTPUT_DIR / "sportsync_runpod_5min.mp4"
-        final_video.write_videofile(
-            str(output_path),
+        render_slideshow(
+            image_paths,
+            output_path,
+            durations=durations,
+            audio=voice_path if has_audio else None,
             fps=24,
-            codec='libx264',
-            audio_codec='aac' if has_audio else None,
-            preset='medium',
-            threads=4
+            on_progress=print_render_progress
         )
         
         total_time = time.time() - start_total
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+رسم النصوص على المشاهد
+======================
+Fast text overlays and placeholder frames for the video scripts
+
+- Fonts are loaded once per process (get_font is cached per file + size).
+- Wrapping measures words in pixels with cached widths, so long Arabic
+  lines fit the frame instead of a character-count guess.
+- Arabic is shaped: natively when Pillow has libraqm, otherwise with
+  arabic-reshaper + python-bidi when installed.
+- Dark bands behind the title/body are blended only inside their
+  rectangles through a per-channel lookup table (Image.point) - no
+  full-frame RGBA overlay, alpha_composite or mode round-trips.
+- Placeholder backgrounds are rendered once per colour and copied.
+
+Layout is defined for 1080x1920 and scaled to the image width.
+
+USAGE:
+    img = draw_scene_overlay(Image.open(path).convert("RGB"), title, text, 3, 12)
+    img = render_placeholder(title, text, 3, 12, color=(25, 35, 45))
+"""
+import os
+import re
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+from PIL import Image, ImageDraw, ImageFont, features
+
+try:
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+except ImportError:
+    arabic_reshaper = None  # Optional: Arabic shaping without libraqm
+
+REFERENCE_SIZE = (1080, 1920)
+OVERLAY_BANDS = [(100, 281), (1400, 1801)]  # title / body rows (end exclusive)
+HAVE_RAQM = features.check("raqm")
+_ARABIC_RE = re.compile(r"[\u0600-\u06FF\u0750-\u077F\uFB50-\uFDFF\uFE70-\uFEFF]")
+
+FONT_CANDIDATES = {
+    "bold": [
+        os.getenv("SPORTSYNC_FONT_BOLD", ""),
+        "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
+        "/usr/share/fonts/truetype/noto/NotoNaskhArabic-Bold.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+        "C:/Windows/Fonts/arialbd.ttf",
+    ],
+    "regular": [
+        os.getenv("SPORTSYNC_FONT", ""),
+        "/System/Library/Fonts/Supplemental/Arial.ttf",
+        "/usr/share/fonts/truetype/noto/NotoNaskhArabic-Regular.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        "C:/Windows/Fonts/arial.ttf",
+    ],
+}
+
+# =====================================================
+# الخطوط + القياس
+# =====================================================
+
+@lru_cache(maxsize=None)
+def _font_path(weight: str) -> str:
+    for path in FONT_CANDIDATES[weight]:
+        if path and os.path.exists(path):
+            return path
+    return ""
+
+
+@lru_cache(maxsize=64)
+def get_font(size: int, bold: bool = False):
+    """Process-wide font cache"""
+    path = _font_path("bold" if bold else "regular")
+    if path:
+        return ImageFont.truetype(path, size)
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=4096)
+def shape_text(text: str) -> str:
+    """Visual form of a line (Arabic joined + RTL ordered) when Pillow cannot shape it"""
+    if HAVE_RAQM or arabic_reshaper is None or not _ARABIC_RE.search(text):
+        return text
+    return get_display(arabic_reshaper.reshape(text))
+
+
+@lru_cache(maxsize=16384)
+def text_width(text: str, size: int, bold: bool = False) -> float:
+    """Cached pixel width of a word/line"""
+    return get_font(size, bold).getlength(shape_text(text))
+
+
+def wrap_text_px(text: str, size: int, max_width: float, bold: bool = False) -> List[str]:
+    """Greedy wrap by rendered width (logical order; shape each line when drawing)"""
+    space = text_width(" ", size, bold)
+    lines, current, width = [], [], 0.0
+    for word in text.split():
+        w = text_width(word, size, bold)
+        if current and width + space + w > max_width:
+            lines.append(" ".join(current))
+            current, width = [word], w
+        else:
+            width += (space if current else 0.0) + w
+            current.append(word)
+    if current:
+        lines.append(" ".join(current))
+    return lines
+
+# =====================================================
+# الرسم
+# =====================================================
+
+@lru_cache(maxsize=32)
+def _blend_lut(color: Tuple[int, int, int], alpha: int) -> List[int]:
+    """RGB lookup table for "color at alpha over v" (rounded like alpha_composite)"""
+    return [(v * (255 - alpha) + c * alpha + 127) // 255 for c in color for v in range(256)]
+
+
+def shade_band(img: Image.Image, box: Tuple[int, int, int, int],
+               color: Tuple[int, int, int] = (0, 0, 0), alpha: int = 180) -> None:
+    """Blend color over box (x0, y0, x1, y1 exclusive) of an RGB image, in place"""
+    x0, y0, x1, y1 = box
+    x0, y0 = max(0, x0), max(0, y0)
+    x1, y1 = min(img.width, x1), min(img.height, y1)
+    if x1 <= x0 or y1 <= y0:
+        return
+    img.paste(img.crop((x0, y0, x1, y1)).point(_blend_lut(tuple(color), alpha)), (x0, y0))
+
+
+def _draw_lines(draw: ImageDraw.ImageDraw, lines: Sequence[str], x: float, y: float, step: float,
+                size: int, fill, bold: bool = False) -> None:
+    font = get_font(size, bold)
+    for line in lines:
+        draw.text((x, y), shape_text(line), fill=fill, font=font, anchor="mm")
+        y += step
+
+
+def draw_scene_overlay(img: Image.Image, title: str, text: str, scene_num: int, total_scenes: int,
+                       max_lines: int = 5) -> Image.Image:
+    """Title band, body band (up to max_lines) and the scene counter"""
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    s = img.width / REFERENCE_SIZE[0]
+    px = lambda v: int(round(v * s))
+
+    for top, bottom in OVERLAY_BANDS:
+        shade_band(img, (0, px(top), img.width, px(bottom)))
+
+    draw = ImageDraw.Draw(img)
+    cx = img.width / 2
+    _draw_lines(draw, [title], cx, px(190), 0, px(70), (255, 255, 255), bold=True)
+    body = wrap_text_px(text, px(45), img.width - px(120))[:max_lines]
+    _draw_lines(draw, body, cx, px(1500), px(60), px(45), (255, 255, 255))
+    _draw_lines(draw, [f"{scene_num} / {total_scenes}"], cx, px(1850), 0, px(45), (200, 200, 200))
+    return img
+
+
+@lru_cache(maxsize=32)
+def template_background(color: Tuple[int, int, int], size: Tuple[int, int] = REFERENCE_SIZE) -> Image.Image:
+    """Vertical gradient (color -> 60% color), built once per color/size; callers copy it"""
+    top = Image.new("RGB", size, color)
+    bottom = Image.new("RGB", size, tuple(int(c * 0.6) for c in color))
+    mask = Image.linear_gradient("L").resize(size)
+    return Image.composite(bottom, top, mask)
+
+
+def render_placeholder(title: str, text: str, scene_num: int, total_scenes: int,
+                       color: Tuple[int, int, int] = (25, 35, 45),
+                       size: Tuple[int, int] = REFERENCE_SIZE, max_lines: int = 8) -> Image.Image:
+    """Placeholder frame: template background + title, body and counter"""
+    img = template_background(tuple(color), tuple(size)).copy()
+    s = img.width / REFERENCE_SIZE[0]
+    px = lambda v: int(round(v * s))
+
+    draw = ImageDraw.Draw(img)
+    cx = img.width / 2
+    _draw_lines(draw, [title], cx, px(200), 0, px(70), (180, 180, 180), bold=True)
+    body = wrap_text_px(text, px(50), img.width - px(140))[:max_lines]
+    _draw_lines(draw, body, cx, px(600), px(80), px(50), (255, 255, 255))
+    _draw_lines(draw, [f"{scene_num} / {total_scenes}"], cx, px(1800), 0, px(50), (150, 150, 150))
+    return img
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+تجميع الفيديو مباشرة عبر ffmpeg
+===============================
+Slideshow renderer: still images (+ voice) -> MP4, natively in ffmpeg
+
+The scripts used to build videos with MoviePy ImageClip/concatenate, which
+decodes and re-composites every frame in Python. This module does what
+generate-shorts.yml does in shell:
+    concat demuxer list (file + duration per image)
+    -> scale/crop/fps filter graph -> libx264 (-tune stillimage)
+    -> optional audio muxed with -shortest
+Progress is parsed from `-progress pipe:1` and reported as
+on_progress(seconds_done, total_seconds).
+
+ffmpeg: $FFMPEG_BINARY, then PATH, then the binary bundled with
+imageio-ffmpeg (installed alongside MoviePy).
+
+USAGE:
+    render_slideshow(image_paths, "out.mp4", durations=4, audio="voice.mp3")
+"""
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Union
+
+try:
+    import imageio_ffmpeg
+except ImportError:
+    imageio_ffmpeg = None  # Optional: bundled ffmpeg binary
+
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def find_ffmpeg() -> str:
+    """Path of the ffmpeg executable"""
+    candidate = os.getenv("FFMPEG_BINARY") or shutil.which("ffmpeg")
+    if not candidate and imageio_ffmpeg is not None:
+        candidate = imageio_ffmpeg.get_ffmpeg_exe()
+    if not candidate:
+        raise RuntimeError("ffmpeg غير موجود - ثبّته (apt install ffmpeg) أو pip install imageio-ffmpeg")
+    return candidate
+
+
+def probe_duration(path: Union[str, Path], ffmpeg: str = None) -> float:
+    """Media duration in seconds (parsed from `ffmpeg -i`, so ffprobe is not needed)"""
+    proc = subprocess.run([ffmpeg or find_ffmpeg(), "-hide_banner", "-i", str(path)],
+                          capture_output=True, text=True, errors="replace")
+    match = _DURATION_RE.search(proc.stderr)
+    if not match:
+        raise RuntimeError(f"تعذّر قراءة مدة {path}")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def _quote(path: Path) -> str:
+    return "'" + str(path.resolve()).replace("'", "'\\''") + "'"
+
+
+def write_concat_list(images: Sequence[Union[str, Path]], durations: Sequence[float],
+                      list_path: Union[str, Path]) -> Path:
+    """ffconcat file; the last image is repeated so its duration is honoured"""
+    lines = ["ffconcat version 1.0"]
+    for image, duration in zip(images, durations):
+        lines.append(f"file {_quote(Path(image))}")
+        lines.append(f"duration {duration:.3f}")
+    lines.append(f"file {_quote(Path(images[-1]))}")
+    list_path = Path(list_path)
+    list_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return list_path
+
+
+def build_filter(width: int, height: int, fps: int) -> str:
+    """Cover-fit every image to width x height at a constant frame rate"""
+    return (f"scale={width}:{height}:force_original_aspect_ratio=increase,"
+            f"crop={width}:{height},setsar=1,fps={fps},format=yuv420p")
+
+
+def build_command(list_path: Path, output: Path, audio: Optional[Path], width: int, height: int,
+                  fps: int, preset: str, crf: int, threads: Optional[int], ffmpeg: str) -> List[str]:
+    cmd = [ffmpeg, "-y", "-hide_banner", "-nostats", "-loglevel", "error",
+           "-progress", "pipe:1",
+           "-f", "concat", "-safe", "0", "-i", str(list_path)]
+    if audio:
+        cmd += ["-i", str(audio)]
+    cmd += ["-vf", build_filter(width, height, fps), "-map", "0:v:0",
+            "-c:v", "libx264", "-preset", preset, "-tune", "stillimage", "-crf", str(crf),
+            "-pix_fmt", "yuv420p", "-movflags", "+faststart"]
+    if threads:
+        cmd += ["-threads", str(threads)]
+    if audio:
+        cmd += ["-map", "1:a:0", "-c:a", "aac", "-b:a", "192k", "-shortest"]
+    return cmd + [str(output)]
+
+
+def render_slideshow(
+    images: Sequence[Union[str, Path]],
+    output: Union[str, Path],
+    durations: Union[float, Sequence[float]] = 4.0,
+    audio: Union[str, Path, None] = None,
+    width: int = 1080,
+    height: int = 1920,
+    fps: int = 24,
+    preset: str = "medium",
+    crf: int = 20,
+    threads: Optional[int] = None,
+    on_progress: Callable[[float, float], None] = None,
+    ffmpeg: str = None,
+) -> Path:
+    """
+    Render images as a slideshow video
+    durations: seconds per image (one number for all, or one per image)
+    audio: muxed as AAC; the output stops at the shorter of video/audio
+    """
+    if not images:
+        raise ValueError("لا توجد صور للفيديو")
+    if isinstance(durations, (int, float)):
+        durations = [float(durations)] * len(images)
+    if len(durations) != len(images):
+        raise ValueError("عدد المدد لا يساوي عدد الصور")
+
+    ffmpeg = ffmpeg or find_ffmpeg()
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    total = sum(durations)
+    if audio:
+        total = min(total, probe_duration(audio, ffmpeg))
+
+    with tempfile.TemporaryDirectory(prefix="render_") as tmp:
+        list_path = write_concat_list(images, durations, Path(tmp) / "files.ffconcat")
+        cmd = build_command(list_path, output, Path(audio) if audio else None,
+                            width, height, fps, preset, crf, threads, ffmpeg)
+
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                text=True, errors="replace")
+        # Drain stderr in the background so a chatty ffmpeg never blocks on a full pipe
+        stderr_tail = deque(maxlen=40)
+        drain = threading.Thread(target=lambda: stderr_tail.extend(proc.stderr), daemon=True)
+        drain.start()
+
+        for line in proc.stdout:
+            key, _, value = line.strip().partition("=")
+            if key == "out_time_us" and on_progress and value.isdigit():
+                on_progress(min(total, int(value) / 1e6), total)
+            elif key == "progress" and value == "end" and on_progress:
+                on_progress(total, total)
+
+        returncode = proc.wait()
+        drain.join(timeout=5)
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg فشل ({returncode}):\n" + "".join(stderr_tail))
+    return output
+
+
+def print_render_progress(done: float, total: float) -> None:
+    """Default console progress callback (single updating line)"""
+    percent = 100 * done / total if total else 100
+    end = "\n" if done >= total else ""
+    print(f"\r   🎞  {percent:5.1f}% ({done:.0f}/{total:.0f}ث)", end=end, flush=True)
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+التعليق الصوتي لكل مشهد
+=======================
+Per-scene TTS: parallel, cached, stitched with ffmpeg
+
+- Each scene's text is synthesized separately (thread pool), so changing
+  one scene re-synthesizes only that scene.
+- Segments are cached by sha256(engine, engine.cache_params(), language,
+  text) under content_studio/ai_video/tts_cache ($SPORTSYNC_TTS_CACHE);
+  cache_params() lists every setting that changes the audio (voice,
+  speed...), so changing one never returns a stale segment.
+- Engines are pluggable: "gtts" (Google, needs network), "espeak"
+  (espeak-ng, offline) and "silent" (timed silence, for network-less
+  runs/CI). Pick with engine= or $SPORTSYNC_TTS_ENGINE.
+- Segments are stitched with the ffmpeg concat filter (plus an optional
+  pause after each scene) and the per-scene durations are returned, so
+  render_slideshow(durations=...) shows each image exactly while its
+  text is spoken.
+
+USAGE:
+    voice = synthesize_voiceover([s["text"] for s in scenes], OUTPUT_DIR / "voice.m4a", lang="ar")
+    render_slideshow(images, out, durations=voice["durations"], audio=voice["path"])
+"""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Union
+
+from video_render import find_ffmpeg, probe_duration
+
+DEFAULT_CACHE_DIR = os.getenv("SPORTSYNC_TTS_CACHE", "content_studio/ai_video/tts_cache")
+DEFAULT_ENGINE = os.getenv("SPORTSYNC_TTS_ENGINE", "gtts")
+DEFAULT_WORKERS = 4
+SAMPLE_RATE = 44100
+
+# =====================================================
+# المحركات
+# =====================================================
+
+class GTTSEngine:
+    """Google TTS (online)"""
+
+    name = "gtts"
+    ext = "mp3"
+
+    def __init__(self, voice: str = "com", slow: bool = False):
+        self.voice = voice  # gTTS "tld" (accent)
+        self.slow = slow
+
+    def cache_params(self) -> Dict[str, Any]:
+        return {"voice": self.voice, "slow": self.slow}
+
+    def synthesize(self, text: str, lang: str, out_path: Path) -> None:
+        from gtts import gTTS
+        gTTS(text=text, lang=lang, tld=self.voice, slow=self.slow).save(str(out_path))
+
+
+class EspeakEngine:
+    """espeak-ng / espeak (offline)"""
+
+    name = "espeak"
+    ext = "wav"
+
+    def __init__(self, voice: str = None, speed: int = 150):
+        self.voice = voice  # default: the language code
+        self.speed = speed
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def cache_params(self) -> Dict[str, Any]:
+        return {"voice": self.voice, "speed": self.speed}
+
+    def synthesize(self, text: str, lang: str, out_path: Path) -> None:
+        if not self.binary:
+            raise RuntimeError("espeak-ng غير مثبت")
+        subprocess.run([self.binary, "-v", self.voice or lang, "-s", str(self.speed),
+                        "-w", str(out_path), text], check=True, capture_output=True)
+
+
+class SilentEngine:
+    """Silence timed like speech (~2.5 words/s): offline dry runs and tests"""
+
+    name = "silent"
+    ext = "wav"
+
+    def __init__(self, voice: str = "2.5", min_secs: float = 1.0):
+        self.voice = voice  # words per second
+        self.min_secs = min_secs
+
+    def cache_params(self) -> Dict[str, Any]:
+        return {"voice": self.voice, "min_secs": self.min_secs}
+
+    def synthesize(self, text: str, lang: str, out_path: Path) -> None:
+        seconds = max(self.min_secs, len(text.split()) / float(self.voice))
+        subprocess.run([find_ffmpeg(), "-y", "-loglevel", "error", "-f", "lavfi",
+                        "-i", f"anullsrc=r={SAMPLE_RATE}:cl=mono", "-t", f"{seconds:.3f}",
+                        str(out_path)], check=True)
+
+
+ENGINES = {"gtts": GTTSEngine, "espeak": EspeakEngine, "silent": SilentEngine}
+
+
+def get_engine(engine: Union[str, Any] = None):
+    """Engine instance from a name (or pass an instance through)"""
+    engine = engine or DEFAULT_ENGINE
+    if isinstance(engine, str):
+        if engine not in ENGINES:
+            raise ValueError(f"محرك TTS غير معروف: {engine} (المتاح: {', '.join(ENGINES)})")
+        return ENGINES[engine]()
+    return engine
+
+# =====================================================
+# الكاش + التوليد
+# =====================================================
+
+def tts_key(engine_name: str, settings: Any, lang: str, text: str) -> str:
+    """settings: engine.cache_params() (or a bare voice for engines without it)"""
+    if isinstance(settings, dict):
+        settings = json.dumps(settings, sort_keys=True, ensure_ascii=False, default=str)
+    raw = "\x1f".join([engine_name, str(settings), lang, text.strip()])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def synthesize_segment(text: str, lang: str, engine, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR):
+    """(segment path, cache hit?) for one scene"""
+    cache_params = getattr(engine, "cache_params", None)
+    settings = cache_params() if cache_params else getattr(engine, "voice", None)
+    key = tts_key(engine.name, settings, lang, text)
+    path = Path(cache_dir) / key[:2] / f"{key}.{engine.ext}"
+    if path.exists():
+        os.utime(path)
+        return path, True
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{key}.", suffix=f".{engine.ext}")
+    os.close(fd)
+    try:
+        engine.synthesize(text.strip(), lang, Path(tmp))
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return path, False
+
+
+def stitch_segments(segments: Sequence[Path], output: Union[str, Path], pause: float = 0.0,
+                    ffmpeg: str = None) -> Path:
+    """Concatenate segments (any format) into one AAC track, with `pause` s of silence after each"""
+    ffmpeg = ffmpeg or find_ffmpeg()
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    cmd = [ffmpeg, "-y", "-hide_banner", "-loglevel", "error"]
+    chains = []
+    for i, segment in enumerate(segments):
+        cmd += ["-i", str(segment)]
+        pad = f",apad=pad_dur={pause:.3f}" if pause > 0 else ""
+        chains.append(f"[{i}:a]aresample={SAMPLE_RATE},aformat=channel_layouts=mono{pad}[a{i}]")
+    labels = "".join(f"[a{i}]" for i in range(len(segments)))
+    graph = ";".join(chains + [f"{labels}concat=n={len(segments)}:v=0:a=1[out]"])
+    cmd += ["-filter_complex", graph, "-map", "[out]", "-c:a", "aac", "-b:a", "160k", str(output)]
+
+    proc = subprocess.run(cmd, capture_output=True, text=True, errors="replace")
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg فشل في دمج الصوت:\n{proc.stderr[-2000:]}")
+    return output
+
+
+def synthesize_voiceover(
+    texts: Sequence[str],
+    output: Union[str, Path],
+    lang: str = "ar",
+    engine: Union[str, Any] = None,
+    cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR,
+    pause: float = 0.4,
+    max_workers: int = DEFAULT_WORKERS,
+    on_progress: Callable[[int, int, int, bool], None] = None,
+) -> Dict[str, Any]:
+    """
+    Narrate each text as its own (cached) segment and stitch them
+    on_progress(done, total, scene_index, cached) as segments finish
+
+    Returns {"path", "durations" (per scene, pause included), "total", "cached", "segments"}
+    """
+    engine = get_engine(engine)
+    ffmpeg = find_ffmpeg()
+    total = len(texts)
+    done = [0]
+    lock = threading.Lock()
+
+    def run(index: int, text: str):
+        path, hit = synthesize_segment(text, lang, engine, cache_dir)
+        duration = probe_duration(path, ffmpeg)
+        with lock:
+            done[0] += 1
+            if on_progress:
+                on_progress(done[0], total, index, hit)
+        return path, hit, duration
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total or 1)),
+                            thread_name_prefix="tts") as pool:
+        results = list(pool.map(run, range(1, total + 1), texts))
+
+    segments = [path for path, _, _ in results]
+    path = stitch_segments(segments, output, pause, ffmpeg)
+    durations = [duration + pause for _, _, duration in results]
+    return {
+        "path": path,
+        "durations": durations,
+        "total": sum(durations),
+        "cached": sum(hit for _, hit, _ in results),
+        "segments": segments,
+    }
+
+
+def print_tts_progress(done: int, total: int, index: int, cached: bool) -> None:
+    """Default console progress callback"""
+    print(f"   [{done}/{total}] المشهد {index}: {'♻️ من الكاش' if cached else '✅ تم'}")
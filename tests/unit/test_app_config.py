@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_app_config.py
+-----------------------------
+Tests for apps/app_config.py:
+snapshot swap on local changes, remote merge with ETag / If-None-Match,
+last good config kept on bad input, frozen (read-only) snapshots.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from apps import app_config
+
+
+def _reset(cfg_path: str):
+    app_config._CFG_PATH = cfg_path
+    app_config._snapshot = None
+    app_config._local_cfg, app_config._local_sig = {}, None
+    app_config._remote_cfg, app_config._remote_etag = {}, None
+    app_config._remote_url, app_config._next_remote = None, 0.0
+    app_config._refresher = object()  # tests drive refresh_config() directly
+
+
+def _write(path: str, data):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data if isinstance(data, str) else json.dumps(data))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_local_changes_swap_snapshot():
+    """Readers keep the published snapshot until a changed file is reloaded"""
+    print("\n🧪 Test 1: Local Snapshot Swap")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/app_config.json"
+        _write(path, {"app_version": "1.0"})
+        _reset(path)
+
+        first = app_config.get_config()
+        assert first["app_version"] == "1.0" and first["llm"]["model"] == "gpt-4o"
+        assert app_config.get_config() is first
+        assert not app_config.refresh_config(remote=False)   # mtime unchanged
+
+        _write(path, {"app_version": "2.0"})
+        assert app_config.refresh_config(remote=False)
+        second = app_config.get_config()
+        assert second["app_version"] == "2.0" and first["app_version"] == "1.0"
+
+        _write(path, "{ broken json")
+        app_config.refresh_config(remote=False)
+        assert app_config.get_config()["app_version"] == "2.0"   # last good config
+    print("✅ Test 1 PASSED\n")
+
+
+def test_remote_fetch_uses_etag():
+    """Remote config is merged; an unchanged remote answers 304 and is not re-parsed"""
+    print("\n🧪 Test 2: Remote ETag")
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.headers.get("If-None-Match"))
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = json.dumps({"llm": {"model": "remote-model"}}).encode()
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/app_config.json"
+            url = f"http://127.0.0.1:{server.server_port}/config.json"
+            _write(path, {"remote": {"config_url": url}})
+            _reset(path)
+
+            assert app_config.get_config()["llm"]["model"] == "gpt-4o"   # no network on read
+            assert hits == []
+
+            app_config.refresh_config()
+            assert app_config.get_config()["llm"]["model"] == "remote-model"
+            assert not app_config.refresh_config()                       # TTL not expired
+            assert not app_config.refresh_config(force=True)             # 304
+            assert hits == [None, '"v1"']
+            assert app_config.get_config()["llm"]["model"] == "remote-model"
+    finally:
+        server.shutdown()
+    print("✅ Test 2 PASSED\n")
+
+
+def test_snapshot_is_frozen():
+    """Callers share one snapshot, so no caller can mutate it (nested dicts and lists included)"""
+    print("\n🧪 Test 3: Frozen Snapshot")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/app_config.json"
+        _write(path, {"app_version": "1.0", "chat": {"tags": ["a", {"b": 1}]}})
+        _reset(path)
+        cfg = app_config.get_config()
+
+        attempts = [
+            lambda: cfg.__setitem__("app_version", "hacked"),
+            lambda: cfg["llm"].__setitem__("model", "hacked"),
+            lambda: cfg["sinks"]["disk"].__setitem__("enabled", False),
+            lambda: cfg["chat"]["tags"][1].__setitem__("b", 2),
+            lambda: cfg["chat"]["tags"].append("c"),
+            lambda: cfg["analysis"]["egate"]["required_keys"].append("q1"),
+        ]
+        for attempt in attempts:
+            try:
+                attempt()
+                raise AssertionError("snapshot was mutated")
+            except (TypeError, AttributeError):
+                pass
+        assert cfg["chat"]["tags"] == ("a", {"b": 1}) and cfg["llm"]["model"] == "gpt-4o"
+
+        # Readers that need a mutable copy build one explicitly
+        own = dict(cfg["llm"])
+        own["model"] = "mine"
+        assert app_config.get_config()["llm"]["model"] == "gpt-4o"
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 App Config Tests")
+    print("="*70)
+
+    test_local_changes_swap_snapshot()
+    test_remote_fetch_uses_etag()
+    test_snapshot_is_frozen()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_background_tasks.py
+-----------------------------------
+Tests for components/background_tasks.py: session-keyed background jobs.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from components.background_tasks import BackgroundTasks, TaskContext, run_cancellable
+
+
+def _wait(tasks, session_id, kind, state, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        task = tasks.status(session_id, kind)
+        if task and task["state"] == state:
+            return task
+        time.sleep(0.01)
+    raise AssertionError(f"task never reached {state}: {tasks.status(session_id, kind)}")
+
+
+def test_idempotent_submit_and_progress():
+    """Duplicate submissions reuse the task; progress and result are kept server-side"""
+    print("\n🧪 Test 1: Idempotent Submit")
+    tasks = BackgroundTasks(max_workers=2)
+    release = threading.Event()
+    runs = []
+
+    def job(ctx, value):
+        runs.append(value)
+        ctx.progress("stage1", 1, 2)
+        release.wait(5)
+        return value * 2
+
+    first = tasks.submit("s1", "analysis", job, 21)
+    second = tasks.submit("s1", "analysis", job, 99)
+    assert first["id"] == second["id"]
+    assert _wait(tasks, "s1", "analysis", "running")
+    time.sleep(0.05)
+    assert tasks.status("s1", "analysis")["progress"] == {"stage": "stage1", "completed": 1, "total": 2}
+
+    release.set()
+    assert _wait(tasks, "s1", "analysis", "done")["result"] == 42
+    assert tasks.submit("s1", "analysis", job, 5)["result"] == 42
+    assert runs == [21]
+
+    def failing(ctx):
+        raise ValueError("boom")
+    tasks.submit("s2", "analysis", failing)
+    assert _wait(tasks, "s2", "analysis", "error")["error"] == "boom"
+    print("✅ Test 1 PASSED\n")
+
+
+def test_cancel_and_abandon():
+    """Explicit cancel and the abandoned-session reaper both stop the job"""
+    print("\n🧪 Test 2: Cancellation")
+    tasks = BackgroundTasks(max_workers=2, abandon_secs=0.2, ttl_secs=0.1)
+
+    def cooperative(ctx):
+        while not ctx.cancelled():
+            time.sleep(0.01)
+        return "stopped"
+
+    tasks.submit("a", "video", cooperative)
+    _wait(tasks, "a", "video", "running")
+    assert tasks.cancel("a") == 1
+    assert tasks.status("a", "video")["state"] == "cancelled"
+
+    tasks.submit("b", "video", cooperative)
+    _wait(tasks, "b", "video", "running")
+    time.sleep(0.3)  # no polls from session "b"
+    tasks.reap()
+    assert tasks._tasks[("b", "video")]["state"] == "cancelled"
+    time.sleep(0.15)
+    tasks.reap()
+    assert ("b", "video") not in tasks._tasks
+    print("✅ Test 2 PASSED\n")
+
+
+def test_connected_sessions_are_not_abandoned():
+    """A session that stopped polling but is still connected keeps its task"""
+    print("\n🧪 Test 3: Session Heartbeat")
+    tasks = BackgroundTasks(max_workers=2, abandon_secs=0.1, is_connected=lambda cid: cid == "tab-open")
+
+    def cooperative(ctx):
+        while not ctx.cancel_event.wait(0.01):
+            pass
+
+    tasks.heartbeat("reading", connection_id="tab-open")
+    tasks.heartbeat("closed", connection_id="tab-closed")
+    tasks.submit("reading", "analysis", cooperative)
+    tasks.submit("closed", "analysis", cooperative)
+    _wait(tasks, "reading", "analysis", "running")
+    time.sleep(0.2)
+    tasks.reap()
+    assert tasks._tasks[("reading", "analysis")]["state"] == "running"
+    assert tasks._tasks[("closed", "analysis")]["state"] == "cancelled"
+    tasks.cancel("reading")
+    print("✅ Test 3 PASSED\n")
+
+
+def test_run_cancellable():
+    """Child-process tasks return results, surface errors and die on cancel"""
+    print("\n🧪 Test 4: run_cancellable")
+    ctx = TaskContext({}, threading.Lock())
+    assert run_cancellable(ctx, "operator:add", 2, 3, poll_secs=0.05) == 5
+    try:
+        run_cancellable(ctx, "operator:truediv", 1, 0, poll_secs=0.05)
+        raise AssertionError("expected an error")
+    except RuntimeError as e:
+        assert "ZeroDivisionError" in str(e)
+
+    threading.Timer(0.5, ctx.cancel_event.set).start()
+    started = time.time()
+    assert run_cancellable(ctx, "time:sleep", 30, poll_secs=0.05) is None
+    assert time.time() - started < 10
+    print("✅ Test 4 PASSED\n")
+
+
+def test_poll_every_stops_polling():
+    """Returning False leaves the polling fragment; a live task resumes it"""
+    print("\n🧪 Test 5: poll_every Stop")
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("⚠️  streamlit not installed - skipping")
+        return
+
+    def app():
+        import streamlit as st
+        from components.background_tasks import poll_every
+
+        @poll_every(0.5)
+        def show():
+            st.write(f"state: {st.session_state.get('state', 'done')}")
+            return st.session_state.get("state", "done") != "done"
+
+        show()
+
+    at = AppTest.from_function(app).run()
+    assert not at.exception
+    assert at.markdown[0].value == "state: done"
+    stopped = [k for k in at.session_state if str(k).startswith("_poll_stopped_")]
+    assert stopped and at.session_state[stopped[0]] is True
+
+    at.session_state["state"] = "running"
+    at.run()
+    assert not at.exception and stopped[0] not in at.session_state
+    assert at.markdown[0].value == "state: running"
+    print("✅ Test 5 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Background Tasks Tests")
+    print("="*70)
+
+    test_idempotent_submit_and_progress()
+    test_cancel_and_abandon()
+    test_connected_sessions_are_not_abandoned()
+    test_run_cancellable()
+    test_poll_every_stops_polling()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_draft_store.py
+------------------------------
+Tests for the debounced SQLite draft store:
+hash-diffed saves, coalesced writes, delete and legacy import.
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from draft_store import DraftStore
+
+
+def test_unchanged_drafts_are_not_written():
+    """Reruns with the same answers never reach the database"""
+    print("\n🧪 Test 1: Hash-Diffed Saves")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DraftStore(f"{tmp}/drafts.db", legacy_dir=None, debounce_secs=60)
+        assert store.save("u1", {"q1": "a"})
+        assert not store.save("u1", {"q1": "a"})
+        assert store.load("u1") == {"q1": "a"}     # served from the buffer
+
+        assert store.flush() == 1 and store.writes == 1
+        for _ in range(20):
+            assert not store.save("u1", {"q1": "a"})
+        assert store.flush() == 0 and store.writes == 1
+        store.close()
+
+        reopened = DraftStore(f"{tmp}/drafts.db", legacy_dir=None, debounce_secs=60)
+        assert not reopened.save("u1", {"q1": "a"})   # digest known from the table
+        assert reopened.load("u1") == {"q1": "a"}
+        reopened.close()
+    print("✅ Test 1 PASSED\n")
+
+
+def test_changes_are_coalesced():
+    """Many users clicking within the debounce window -> one transaction"""
+    print("\n🧪 Test 2: Debounced Writes")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DraftStore(f"{tmp}/drafts.db", legacy_dir=None, debounce_secs=0.2)
+        for i in range(50):
+            store.save(f"user_{i % 10}", {"q1": i})
+        time.sleep(0.6)
+        assert store.writes == 1
+        assert store.load("user_3") == {"q1": 43}
+
+        store.delete("user_3")
+        assert store.load("user_3") == {}
+        store.close()
+
+        reopened = DraftStore(f"{tmp}/drafts.db", legacy_dir=None)
+        assert reopened.load("user_3") == {} and reopened.load("user_4") == {"q1": 44}
+        reopened.close()
+    print("✅ Test 2 PASSED\n")
+
+
+def test_legacy_drafts_are_imported():
+    """Old per-user JSON drafts are read once and moved into the table"""
+    print("\n🧪 Test 3: Legacy Import")
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = Path(tmp) / "drafts"
+        legacy.mkdir()
+        (legacy / "old.json").write_text(json.dumps({"q2": ["x"]}), encoding="utf-8")
+
+        store = DraftStore(f"{tmp}/drafts.db", legacy_dir=str(legacy), debounce_secs=60)
+        assert store.load("old") == {"q2": ["x"]}
+        assert (legacy / "old.json").exists()       # kept until the import is committed
+        store.flush()
+        assert not (legacy / "old.json").exists()
+        assert store.load("old") == {"q2": ["x"]}
+
+        (legacy / "old.json").write_text(json.dumps({"q2": ["stale"]}), encoding="utf-8")
+        store.delete("old")
+        store.flush()
+        assert not (legacy / "old.json").exists()
+        assert store.load("old") == {}
+        store.close()
+    print("✅ Test 3 PASSED\n")
+
+
+def test_draft_stays_readable_while_flushing():
+    """A load() during the flush transaction sees the batch, never the legacy file"""
+    print("\n🧪 Test 4: In-Flight Batch")
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = Path(tmp) / "drafts"
+        legacy.mkdir()
+        (legacy / "u1.json").write_text(json.dumps({"q1": "legacy"}), encoding="utf-8")
+        store = DraftStore(f"{tmp}/drafts.db", legacy_dir=str(legacy), debounce_secs=60)
+        store.save("u1", {"q1": "new"})
+        store.save("u2", {"q1": "two"})
+
+        store._db_lock.acquire()   # the flush takes its batch, then blocks before committing
+        flusher = threading.Thread(target=store.flush)
+        try:
+            flusher.start()
+            deadline = time.time() + 5
+            while store._pending and time.time() < deadline:
+                time.sleep(0.01)
+            assert not store._pending
+            # served from memory: must not wait for the transaction
+            seen = {}
+            reader = threading.Thread(target=lambda: seen.update(u1=store.load("u1"), u2=store.load("u2")))
+            reader.start()
+            reader.join(2)
+            assert seen == {"u1": {"q1": "new"}, "u2": {"q1": "two"}}
+        finally:
+            store._db_lock.release()
+            flusher.join(5)
+
+        assert not store._inflight and not store._pending
+        assert store.load("u1") == {"q1": "new"}
+        assert store.flush() == 0   # no stale legacy answers were re-buffered
+        store.close()
+    print("✅ Test 4 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Draft Store Tests")
+    print("="*70)
+
+    test_unchanged_drafts_are_not_written()
+    test_changes_are_coalesced()
+    test_legacy_drafts_are_imported()
+    test_draft_stays_readable_while_flushing()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_event_pipeline.py
+---------------------------------
+Tests for api/event_pipeline.py: write-behind tracking buffer and sinks.
+"""
+
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from api import event_pipeline, track_stats
+from api.event_pipeline import EventPipeline, build_sinks
+from apps import app_config
+
+
+def _use_config(cfg_path: str):
+    app_config._CFG_PATH = cfg_path
+    app_config._snapshot = None
+    app_config._local_cfg, app_config._local_sig = {}, None
+    app_config._remote_cfg, app_config._remote_etag = {}, None
+    app_config._remote_url, app_config._next_remote = None, 0.0
+    app_config._refresher = object()  # no background refresher in tests
+
+
+class SlowSink:
+    name = "slow"
+
+    def __init__(self):
+        self.events = []
+
+    def write(self, events):
+        time.sleep(0.2)
+        self.events.extend(events)
+
+    def close(self):
+        pass
+
+
+def test_size_and_age_triggers():
+    """Full batches flush immediately; a partial batch flushes after flush_interval"""
+    print("\n🧪 Test 1: Flush Triggers")
+    with tempfile.TemporaryDirectory() as tmp:
+        sinks = build_sinks({
+            "disk": {"enabled": True, "path": str(Path(tmp) / "events.jsonl")},
+            "sqlite": {"enabled": True, "path": str(Path(tmp) / "events.db")},
+            "webhook": {"enabled": False, "url": ""},
+        })
+        assert [s.name for s in sinks] == ["disk", "sqlite"]
+        pipeline = EventPipeline(sinks, flush_size=10, flush_interval=0.3)
+
+        for i in range(25):
+            pipeline.submit({"n": i, "timestamp": "2025-01-01T00:00:00"})
+        time.sleep(0.1)
+        assert pipeline.stats()["flushed"] == 20
+        time.sleep(0.5)
+        assert pipeline.stats()["flushed"] == 25 and pipeline.stats()["buffered"] == 0
+
+        pipeline.shutdown()
+        lines = (Path(tmp) / "events.jsonl").read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["n"] for line in lines] == list(range(25))
+        conn = sqlite3.connect(str(Path(tmp) / "events.db"))
+        assert conn.execute("SELECT COUNT(*) FROM analytics_events").fetchone()[0] == 25
+        conn.close()
+    print("✅ Test 1 PASSED\n")
+
+
+def test_overload_drops_and_shutdown_drains():
+    """submit() never blocks; overflow drops the oldest events; shutdown drains the rest"""
+    print("\n🧪 Test 2: Overload + Drain")
+    sink = SlowSink()
+    pipeline = EventPipeline([sink], capacity=50, flush_size=20, flush_interval=10)
+
+    start = time.perf_counter()
+    accepted = [pipeline.submit({"n": i}) for i in range(500)]
+    assert time.perf_counter() - start < 0.1
+    assert not all(accepted)
+
+    pipeline.shutdown()
+    stats = pipeline.stats()
+    assert stats["buffered"] == 0
+    assert stats["dropped"] + len(sink.events) == 500
+    assert sink.events[-1]["n"] == 499
+    assert pipeline.submit({"n": 500}) is False
+    print("✅ Test 2 PASSED\n")
+
+
+def test_sinks_come_from_loaded_app_config():
+    """get_event_pipeline() uses the "sinks" of the file apps.app_config actually reads"""
+    print("\n🧪 Test 3: Sinks From app_config")
+    with tempfile.TemporaryDirectory() as tmp:
+        _use_config(str(Path(tmp) / "missing.json"))
+        defaults = app_config.get_config()["sinks"]
+        assert defaults["sqlite"] == {"enabled": False, "path": "./data/sportsync.db"}
+
+        cfg_path = Path(tmp) / "app_config.json"
+        cfg_path.write_text(json.dumps({"sinks": {
+            "disk": {"enabled": True, "path": str(Path(tmp) / "events.jsonl")},
+            "sqlite": {"enabled": True, "path": str(Path(tmp) / "events.db")},
+        }}), encoding="utf-8")
+        _use_config(str(cfg_path))
+        event_pipeline._pipeline, track_stats._stats = None, None
+        try:
+            pipeline = event_pipeline.get_event_pipeline()
+            assert pipeline.stats()["sinks"] == ["disk", "sqlite", "stats"]
+            pipeline.submit({"event": "quiz_tracked", "timestamp": "2025-01-01T00:00:00"})
+        finally:
+            event_pipeline.shutdown_event_pipeline()
+            track_stats._stats = None
+        conn = sqlite3.connect(str(Path(tmp) / "events.db"))
+        assert conn.execute("SELECT COUNT(*) FROM analytics_events").fetchone()[0] == 1
+        conn.close()
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Event Pipeline Tests")
+    print("="*70)
+
+    test_size_and_age_triggers()
+    test_overload_drops_and_shutdown_drains()
+    test_sinks_come_from_loaded_app_config()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_export_api.py
+-----------------------------
+Tests for the admin-only /api/export endpoint (api/index.py).
+"""
+
+import csv
+import gzip
+import io
+import os
+import sys
+import types
+from pathlib import Path
+from unittest import mock
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from fastapi.testclient import TestClient
+
+try:
+    from api import index
+except ImportError:
+    # expanded_fallback_sports.py is empty in this tree; the export route does not use it
+    fallback = types.ModuleType("expanded_fallback_sports")
+    fallback.EXPANDED_FALLBACK_SPORTS = {}
+    sys.modules.pop("api.index", None)
+    with mock.patch.dict(sys.modules, {"expanded_fallback_sports": fallback}):
+        from api import index
+
+from test_storage import SAMPLE_RESPONSES, temp_storage
+from api import storage
+
+TOKEN = "s3cret-token"
+
+
+def _client() -> TestClient:
+    return TestClient(index.app)  # no "with": startup/shutdown hooks are not needed here
+
+
+def test_export_disabled_without_secret():
+    """No $SPORTSYNC_ADMIN_TOKEN: the export is off, whatever the header says"""
+    print("\n🧪 Test 1: Export Disabled")
+    env = {k: v for k, v in os.environ.items() if k != "SPORTSYNC_ADMIN_TOKEN"}
+    with mock.patch.dict(os.environ, env, clear=True), temp_storage():
+        client = _client()
+        for headers in ({}, {"X-Admin-Token": TOKEN}, {"X-Admin-Token": ""}):
+            response = client.get("/api/export", headers=headers)
+            assert response.status_code == 403, headers
+            assert response.json()["detail"] == "Export is disabled"
+    with mock.patch.dict(os.environ, {"SPORTSYNC_ADMIN_TOKEN": ""}), temp_storage():
+        assert _client().get("/api/export", headers={"X-Admin-Token": ""}).status_code == 403
+    print("✅ Test 1 PASSED\n")
+
+
+def test_export_rejects_missing_or_wrong_token():
+    """Missing, wrong, or prefix-of-the-secret tokens get 403"""
+    print("\n🧪 Test 2: Invalid Token")
+    with mock.patch.dict(os.environ, {"SPORTSYNC_ADMIN_TOKEN": TOKEN}), temp_storage():
+        client = _client()
+        for headers in ({}, {"X-Admin-Token": "wrong"}, {"X-Admin-Token": TOKEN[:-1]},
+                        {"X-Admin-Token": TOKEN + "x"}, {"Authorization": f"Bearer {TOKEN}"}):
+            response = client.get("/api/export", headers=headers)
+            assert response.status_code == 403, headers
+            assert response.json()["detail"] == "Invalid admin token"
+        # the token is checked before the format is even looked at
+        assert client.get("/api/export?format=xml").status_code == 403
+    print("✅ Test 2 PASSED\n")
+
+
+def test_export_streams_csv_with_valid_token():
+    """The right token gets the streamed CSV (and .csv.gz) of every saved response"""
+    print("\n🧪 Test 3: Valid Token")
+    with mock.patch.dict(os.environ, {"SPORTSYNC_ADMIN_TOKEN": TOKEN}), temp_storage():
+        for resp in SAMPLE_RESPONSES:
+            assert storage.save_response(dict(resp))
+        client = _client()
+        headers = {"X-Admin-Token": TOKEN}
+
+        response = client.get("/api/export", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="sportsync_responses_' in response.headers["content-disposition"]
+        rows = list(csv.reader(io.StringIO(response.content.decode("utf-8"))))
+        assert rows[0] == list(storage.CSV_COLUMNS) and len(rows) == 1 + len(SAMPLE_RESPONSES)
+
+        compressed = client.get("/api/export?gzip=true", headers=headers)
+        assert compressed.status_code == 200 and compressed.headers["content-type"] == "application/gzip"
+        assert gzip.decompress(compressed.content) == response.content
+
+        assert client.get("/api/export?format=xml", headers=headers).status_code == 400
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Export API Tests")
+    print("="*70)
+
+    test_export_disabled_without_secret()
+    test_export_rejects_missing_or_wrong_token()
+    test_export_streams_csv_with_valid_token()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_image_cache.py
+------------------------------
+Tests for the content-addressed image cache (scripts/tools/image_cache.py)
+and its use by the scene-image stage.
+"""
+
+import base64
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2] / "scripts" / "tools"))
+
+from image_cache import ImageCache, image_key
+from scene_images import generate_scene_images
+
+
+class FakeBackend:
+    name = "fake"
+    model = "flux-test"
+
+    def __init__(self):
+        self.calls = []
+
+    def generate_image(self, prompt, **params):
+        self.calls.append(prompt)
+        return {"success": True, "image_b64": base64.b64encode(prompt.encode()).decode(),
+                "seed": params.get("seed", 1)}
+
+
+def test_key_covers_every_generation_input():
+    """Any input that changes the image changes the key"""
+    print("\n🧪 Test 1: Content Address")
+    base = dict(backend="runpod", model="flux", prompt="p", negative_prompt="n",
+                seed=7, width=1080, height=1920)
+    key = image_key(**base)
+    assert key == image_key(**base)
+    for field, value in [("backend", "other"), ("model", "sdxl"), ("prompt", "q"),
+                         ("negative_prompt", "m"), ("seed", 8), ("width", 720), ("height", 1280)]:
+        assert image_key(**{**base, field: value}) != key, field
+    for extra in [{"steps": 30}, {"cfg_scale": 7.5}, {"sampler": "euler"}]:
+        assert image_key(**base, **extra) != key, extra
+    assert image_key(**base, steps=30, cfg_scale=7.5) == image_key(**base, cfg_scale=7.5, steps=30)
+    assert image_key(**base, steps=30) != image_key(**base, steps=25)
+    workflow = {"nodes": [1, 2]}
+    assert image_key(**{**base, "model": workflow}) == image_key(**{**base, "model": {"nodes": [1, 2]}})
+    print("✅ Test 1 PASSED\n")
+
+
+def test_lru_eviction():
+    """Past max_bytes the least recently used images are dropped"""
+    print("\n🧪 Test 2: LRU Eviction")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ImageCache(tmp, max_bytes=250)
+        cache.put("a" * 64, b"x" * 100)
+        cache.put("b" * 64, b"x" * 100)
+        old = time.time() - 100
+        for name in ("a", "b"):
+            os.utime(cache.root / (name * 2) / f"{name * 64}.png", (old, old))
+        # A hit on "a" makes "b" the least recently used entry
+        assert cache.get("a" * 64) is not None
+        cache.put("c" * 64, b"x" * 100)
+
+        assert cache.get("b" * 64) is None
+        assert cache.get("a" * 64) is not None and cache.get("c" * 64) is not None
+        assert cache.size_bytes <= 250
+        assert ImageCache(tmp, max_bytes=250).size_bytes == cache.size_bytes
+    print("✅ Test 2 PASSED\n")
+
+
+def test_stage_reuses_cached_images():
+    """A second render with the same prompts does not call the backend"""
+    print("\n🧪 Test 3: Stage Uses Cache")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ImageCache(f"{tmp}/cache")
+        backend = FakeBackend()
+        scenes = [{"image_prompt": "one", "seed": 5}, {"image_prompt": "two"}]
+        params = {"width": 1080, "height": 1920}
+
+        first = generate_scene_images(scenes, backend, Path(tmp) / "run1", params=params, cache=cache)
+        assert [r["source"] for r in first] == ["backend", "backend"] and len(backend.calls) == 2
+
+        # Overlay text changes per run; the cached image must stay clean
+        overlay = lambda path, i, scene: (path.write_bytes(path.read_bytes() + b"+title"), path)[1]
+        second = generate_scene_images(scenes, backend, Path(tmp) / "run2", params=params,
+                                       cache=cache, postprocess=overlay)
+        assert [r["source"] for r in second] == ["cache", "cache"] and len(backend.calls) == 2
+        assert second[0]["seed"] == 5
+        assert second[0]["path"].read_bytes() == b"one+title"
+
+        scenes[1]["seed"] = 99
+        third = generate_scene_images(scenes, backend, Path(tmp) / "run3", params=params, cache=cache)
+        assert [r["source"] for r in third] == ["cache", "backend"] and backend.calls[-1] == "two"
+
+        # Any other generate_image param is part of the key; request plumbing is not
+        fourth = generate_scene_images(scenes, backend, Path(tmp) / "run4",
+                                       params={**params, "steps": 40}, cache=cache)
+        assert [r["source"] for r in fourth] == ["backend", "backend"] and len(backend.calls) == 5
+        fifth = generate_scene_images(scenes, backend, Path(tmp) / "run5",
+                                      params={**params, "steps": 40, "timeout": 60}, cache=cache)
+        assert [r["source"] for r in fifth] == ["cache", "cache"] and len(backend.calls) == 5
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Image Cache Tests")
+    print("="*70)
+
+    test_key_covers_every_generation_input()
+    test_lru_eviction()
+    test_stage_reuses_cached_images()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
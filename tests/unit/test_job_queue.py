@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_job_queue.py
+----------------------------
+Tests for the durable job queue (jobs package):
+idempotent enqueue, leases, retries with backoff, worker processing.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from jobs import store as store_module
+from jobs.store import FileJobStore, SQLiteJobStore
+from jobs.progress import read_progress
+from jobs.worker import process_one
+from jobs.notify import ResultWatcher
+
+
+def _stores(tmp: str):
+    return [
+        FileJobStore(tmp),
+        SQLiteJobStore(db_path=f"{tmp}/jobs.db", results_dir=f"{tmp}/ready_results"),
+    ]
+
+
+def test_idempotent_enqueue():
+    """Same id + payload is a no-op, changed payload replaces the job"""
+    print("\n🧪 Test 1: Idempotent Enqueue")
+    with tempfile.TemporaryDirectory() as tmp:
+        for store in _stores(tmp):
+            first = store.enqueue("user_1", {"answers": {"q1": "a"}})
+            again = store.enqueue("user_1", {"answers": {"q1": "a"}})
+            assert first["created_at"] == again["created_at"]
+            assert store.list_jobs("pending") == ["user_1"]
+
+            store.enqueue("user_1", {"answers": {"q1": "b"}})
+            assert store.get("user_1")["payload"] == {"answers": {"q1": "b"}}
+    print("✅ Test 1 PASSED\n")
+
+
+def test_claim_is_exclusive():
+    """A leased job cannot be claimed by a second worker"""
+    print("\n🧪 Test 2: Exclusive Claim")
+    with tempfile.TemporaryDirectory() as tmp:
+        for store in _stores(tmp):
+            store.enqueue("user_2", {"x": 1})
+            job = store.claim("w1", lease_secs=30)
+            assert job["id"] == "user_2" and job["attempts"] == 1
+            assert store.claim("w2", lease_secs=30) is None
+            assert store.heartbeat("user_2", "w1", 30)
+            assert not store.heartbeat("user_2", "w2", 30)
+            assert store.complete("user_2", "w1", {"recommendations": ["A"]})
+            assert store.get_result("user_2") == {"recommendations": ["A"]}
+    print("✅ Test 2 PASSED\n")
+
+
+def test_retry_with_backoff_then_failed():
+    """Failures are retried after a delay, then buried after max_attempts"""
+    print("\n🧪 Test 3: Retry + Backoff")
+    with tempfile.TemporaryDirectory() as tmp:
+        for store in _stores(tmp):
+            store.enqueue("user_3", {"x": 1}, max_attempts=2)
+            store.claim("w1")
+            assert store.fail("user_3", "w1", "boom") == "pending"
+            # backoff: not runnable yet
+            assert store.claim("w1") is None
+            job = store.get("user_3")
+            assert job["not_before"] > time.time()
+
+            job["not_before"] = 0  # skip the wait
+            if isinstance(store, FileJobStore):
+                from jobs.store import atomic_write_json
+                atomic_write_json(store._path("pending", "user_3"), job)
+            else:
+                conn = store._connect()
+                conn.execute("UPDATE jobs SET not_before = 0 WHERE id = 'user_3'")
+                conn.close()
+
+            assert store.claim("w1")["attempts"] == 2
+            assert store.fail("user_3", "w1", "boom again") == "failed"
+            assert store.get("user_3")["status"] == "failed"
+    print("✅ Test 3 PASSED\n")
+
+
+def test_expired_lease_is_requeued():
+    """A crashed worker's job goes back to the queue"""
+    print("\n🧪 Test 4: Expired Lease")
+    with tempfile.TemporaryDirectory() as tmp:
+        for store in _stores(tmp):
+            store.enqueue("user_4", {"x": 1})
+            store.claim("w1", lease_secs=-1)
+            assert store.requeue_expired() == 1
+            assert store.get("user_4")["status"] == "pending"
+    print("✅ Test 4 PASSED\n")
+
+
+def test_worker_runs_handler_and_reports_progress():
+    """process_one runs the handler, stores the result and writes progress"""
+    print("\n🧪 Test 5: Worker Processing")
+
+    def handler(payload, report):
+        report("working", 50, "halfway")
+        return {"recommendations": [payload["user_id"]]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FileJobStore(tmp)
+        store.enqueue("user_5", {"user_id": "user_5"})
+        progress_dir = Path(tmp) / "job_progress"
+        assert process_one(store, handler, "w1", progress_dir=progress_dir)
+        assert not process_one(store, handler, "w1", progress_dir=progress_dir)
+        assert store.get_result("user_5") == {"recommendations": ["user_5"]}
+        assert read_progress("user_5", progress_dir)["percent"] == 50
+    print("✅ Test 5 PASSED\n")
+
+
+def test_result_watcher_notifies_waiters():
+    """A completed job wakes waiters; waiters never touch the file system"""
+    print("\n🧪 Test 6: Result Watcher")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FileJobStore(tmp)
+        watcher = ResultWatcher(tmp, poll_secs=0.05)
+        try:
+            store.enqueue("user_6", {"x": 1})
+            assert not watcher.is_ready("user_6")
+            assert watcher.wait("done", "user_6", since=0, timeout=0.1) == 0
+
+            job = store.claim("w1", lease_secs=30)
+            store.complete(job["id"], "w1", {"recommendations": ["A"]})
+            version = watcher.wait("done", "user_6", since=0, timeout=5)
+            assert version > 0 and watcher.is_ready("user_6")
+
+            # Re-enqueueing removes the stale result -> version moves again
+            store.enqueue("user_6", {"x": 2})
+            assert watcher.wait("done", "user_6", since=version, timeout=5) > version
+            assert not watcher.is_ready("user_6")
+        finally:
+            watcher.stop()
+    print("✅ Test 6 PASSED\n")
+
+
+def test_claim_never_exposes_an_unowned_lease():
+    """The reaper running mid-claim, or a stale claimer, cannot run a job twice"""
+    print("\n🧪 Test 7: Claim Races (file store)")
+    real_link = os.link
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FileJobStore(tmp)
+
+        # Reaper between "leased file appears" and "claim returns"
+        def link_then_reap(src, dst):
+            real_link(src, dst)
+            assert store.requeue_expired() == 0
+            assert store_module.read_json(Path(dst))["lease_owner"] == "w1"
+        store.enqueue("user_7", {"x": 1})
+        store_module.os.link = link_then_reap
+        try:
+            assert store.claim("w1", lease_secs=30)["lease_owner"] == "w1"
+        finally:
+            store_module.os.link = real_link
+        assert store.list_jobs("leased") == ["user_7"] and store.list_jobs("pending") == []
+        store.complete("user_7", "w1", {"ok": 1})
+
+        # Stale claimer: another worker claims + completes before our link lands
+        store.enqueue("user_8", {"x": 1})
+
+        def other_worker_first(src, dst):
+            store_module.os.link = real_link
+            other = store.claim("w2", lease_secs=30)
+            store.complete(other["id"], "w2", {"by": "w2"})
+            real_link(src, dst)
+        store_module.os.link = other_worker_first
+        try:
+            assert store.claim("w1", lease_secs=30) is None
+        finally:
+            store_module.os.link = real_link
+        assert store.get_result("user_8") == {"by": "w2"}
+        assert store.list_jobs("leased") == [] and store.list_jobs("pending") == []
+    print("✅ Test 7 PASSED\n")
+
+
+def test_heartbeat_stops_before_completion():
+    """A heartbeat in flight when the handler returns cannot resurrect the lease"""
+    print("\n🧪 Test 8: Heartbeat Join")
+
+    class SlowHeartbeatStore(FileJobStore):
+        def heartbeat(self, job_id, worker_id, lease_secs=30):
+            job = store_module.read_json(self._path("leased", job_id))
+            time.sleep(0.2)  # completion happens while this heartbeat is mid-write
+            if not job:
+                return False
+            job["lease_expires"] = time.time() + lease_secs
+            store_module.atomic_write_json(self._path("leased", job_id), job)
+            return True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SlowHeartbeatStore(tmp)
+        store.enqueue("user_9", {"x": 1})
+        assert process_one(store, lambda payload, report: (time.sleep(0.15), {"ok": 1})[1], "w1",
+                           lease_secs=0.3, progress_dir=Path(tmp) / "job_progress")
+        time.sleep(0.3)
+        assert store.list_jobs("leased") == [] and store.requeue_expired() == 0
+        assert store.get_result("user_9") == {"ok": 1}
+    print("✅ Test 8 PASSED\n")
+
+
+def test_finished_job_stays_idempotent():
+    """Re-submitting a finished job's payload keeps its result; a new payload re-runs it"""
+    print("\n🧪 Test 9: Idempotent After Completion")
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(2):
+            store = _stores(f"{tmp}/{i}")[i]  # own directory: SQLite mirrors into ready_results/
+            store.enqueue("j1", {"answers": {"q1": "a"}})
+            job = store.claim("w1")
+            assert store.complete("j1", "w1", {"ok": 1})
+
+            again = store.enqueue("j1", {"answers": {"q1": "a"}})
+            assert again["status"] == "done" and store.get("j1")["status"] == "done"
+            assert store.get("j1")["digest"] == job["digest"]
+            assert store.get_result("j1") == {"ok": 1}
+            assert store.list_jobs("pending") == [] and store.list_jobs("done") == ["j1"]
+
+            store.enqueue("j1", {"answers": {"q1": "b"}})
+            assert store.get("j1")["status"] == "pending" and store.get_result("j1") is None
+    print("✅ Test 9 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Job Queue Tests")
+    print("="*70)
+
+    test_idempotent_enqueue()
+    test_claim_is_exclusive()
+    test_retry_with_backoff_then_failed()
+    test_expired_lease_is_requeued()
+    test_worker_runs_handler_and_reports_progress()
+    test_result_watcher_notifies_waiters()
+    test_claim_never_exposes_an_unowned_lease()
+    test_heartbeat_stops_before_completion()
+    test_finished_job_stays_idempotent()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_local_sports_db.py
+----------------------------------
+Tests for LocalSportsDatabase matching (offline fallback path).
+The vectorized NumPy engine must agree with the pure-Python loop.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from local_sports_db import LocalSportsDatabase, Z_AXES
+from compiled_sports_db import CompiledSportsDatabase, compile_database
+
+CATEGORIES = ["combat", "water", "mind_body", "team", "extreme"]
+
+
+def make_database(num_sports: int = 200, seed: int = 7, dense: bool = False) -> dict:
+    """Synthetic catalog; unless dense, some sports leave axes undefined"""
+    rng = random.Random(seed)
+    sports = []
+    for i in range(num_sports):
+        axes = Z_AXES if dense else rng.sample(Z_AXES, rng.randint(4, len(Z_AXES)))
+        sports.append({
+            "name_en": f"Sport {i}",
+            "name_ar": f"رياضة {i}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "z_scores": {axis: round(rng.uniform(-1, 1), 2) for axis in axes},
+        })
+    counts = {c: sum(1 for s in sports if s["category"] == c) for c in CATEGORIES}
+    return {
+        "version": "test",
+        "total_sports": num_sports,
+        "categories": CATEGORIES,
+        "category_counts": counts,
+        "sports": sports,
+    }
+
+
+def load_db(tmp: str, num_sports: int = 200, dense: bool = False) -> LocalSportsDatabase:
+    path = Path(tmp) / "sports_database.json"
+    path.write_text(json.dumps(make_database(num_sports, dense=dense), ensure_ascii=False), encoding="utf-8")
+    return LocalSportsDatabase(str(path))
+
+
+def python_matches(db: LocalSportsDatabase, z_scores: dict, k: int, category: str = None):
+    """Reference result from the pure-Python path"""
+    matrix, mask = db.z_matrix, db.z_mask
+    db.z_matrix = None
+    try:
+        return db.find_best_matches(z_scores, num_matches=k, category_filter=category)
+    finally:
+        db.z_matrix, db.z_mask = matrix, mask
+
+
+USER = {
+    "calm_adrenaline": 0.9,
+    "solo_group": -0.4,
+    "technical_intuitive": 0.5,
+    "control_freedom": 0.8,
+    "repeat_variety": 0.9,
+    "compete_enjoy": 0.4,
+}
+
+FULL_USER = dict(USER, sensory_sensitivity=0.8)
+
+
+def test_matrix_built_on_load():
+    """load_database() precomputes the matrix and mask"""
+    print("\n🧪 Test 1: Matrix Built On Load")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = load_db(tmp)
+        assert db.z_matrix.shape == (200, len(Z_AXES))
+        assert db.z_matrix.dtype.name == "float32"
+        assert db.z_mask.shape == db.z_matrix.shape
+        assert sum(len(rows) for rows in db.category_rows.values()) == 200
+    print("✅ Test 1 PASSED\n")
+
+
+def test_vectorized_matches_python_loop():
+    """Same sports, same order, same distances as the Python loop"""
+    print("\n🧪 Test 2: Vectorized == Python")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = load_db(tmp)
+        for category in (None, "water"):
+            for k in (1, 5, 15, 500):
+                fast = db.find_best_matches(USER, num_matches=k, category_filter=category)
+                slow = python_matches(db, USER, k, category)
+                assert [m["sport"]["name_en"] for m in fast] == [m["sport"]["name_en"] for m in slow]
+                for a, b in zip(fast, slow):
+                    assert abs(a["distance"] - b["distance"]) <= 0.001
+    print("✅ Test 2 PASSED\n")
+
+
+def test_unknown_category_returns_empty():
+    print("\n🧪 Test 3: Unknown Category")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = load_db(tmp)
+        assert db.find_best_matches(USER, num_matches=3, category_filter="nope") == []
+    print("✅ Test 3 PASSED\n")
+
+
+def test_spatial_index_matches_brute_force():
+    """KD-tree k-nearest and radius queries agree with the matrix scan"""
+    print("\n🧪 Test 4: Spatial Index")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = load_db(tmp, num_sports=3000, dense=True)
+        if not db.spatial_index:
+            print("⚠️  SciPy not installed - skipping")
+            return
+        assert None in db.spatial_index and "water" in db.spatial_index
+
+        for category in (None, "water"):
+            indexed = db.find_best_matches(FULL_USER, num_matches=10, category_filter=category)
+            index, db.spatial_index = db.spatial_index, {}
+            brute = db.find_best_matches(FULL_USER, num_matches=10, category_filter=category)
+            brute_radius = db.find_sports_within(FULL_USER, 0.8, category_filter=category)
+            db.spatial_index = index
+            assert [m["sport"]["name_en"] for m in indexed] == [m["sport"]["name_en"] for m in brute]
+
+            radius = db.find_sports_within(FULL_USER, 0.8, category_filter=category)
+            assert [m["sport"]["name_en"] for m in radius] == [m["sport"]["name_en"] for m in brute_radius]
+            assert all(m["distance"] <= 0.8 for m in radius)
+    print("✅ Test 4 PASSED\n")
+
+
+def test_spatial_index_skipped_for_small_or_sparse():
+    """Tiny or sparse catalogs use the brute-force path"""
+    print("\n🧪 Test 5: Index Fallback")
+    with tempfile.TemporaryDirectory() as tmp:
+        assert load_db(tmp, num_sports=50, dense=True).spatial_index == {}
+        assert load_db(tmp, num_sports=3000, dense=False).spatial_index == {}
+    print("✅ Test 5 PASSED\n")
+
+
+def random_users(n: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    users = []
+    for _ in range(n):
+        axes = rng.sample(Z_AXES, rng.randint(3, len(Z_AXES)))
+        users.append({axis: rng.uniform(-1, 1) for axis in axes})
+    return users
+
+
+def test_batch_matches_per_user():
+    """find_best_matches_batch == find_best_matches for every user"""
+    print("\n🧪 Test 6: Batch Matching")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = load_db(tmp, num_sports=400)
+        users = random_users(50)
+        for category in (None, "team"):
+            batch = db.find_best_matches_batch(users, k=7, category_filter=category)
+            assert len(batch) == len(users)
+            for z, matches in zip(users, batch):
+                single = db.find_best_matches(z, num_matches=7, category_filter=category)
+                assert [m["distance"] for m in matches] == [m["distance"] for m in single]
+    print("✅ Test 6 PASSED\n")
+
+
+def test_batch_recommendations_keep_category_diversity():
+    """generate_recommendations_batch applies the same diversity rule"""
+    print("\n🧪 Test 7: Batch Recommendations")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = load_db(tmp, num_sports=400)
+        users = random_users(30)
+        batch = db.generate_recommendations_batch(users, num_recommendations=4, lang="en")
+        for z, recs in zip(users, batch):
+            single = db.generate_recommendations(z, num_recommendations=4, lang="en")
+            assert [r["sport_name_en"] for r in recs] == [r["sport_name_en"] for r in single]
+    print("✅ Test 7 PASSED\n")
+
+
+def test_compiled_database_matches_json():
+    """The memory-mapped catalog gives the same answers as the JSON one"""
+    print("\n🧪 Test 8: Compiled Database")
+    with tempfile.TemporaryDirectory() as tmp:
+        json_db = load_db(tmp, num_sports=300)
+        out = compile_database(json_db.db_path)
+        assert CompiledSportsDatabase(out).verify()
+
+        mapped = LocalSportsDatabase(json_db.db_path)
+        assert mapped.compiled is not None
+        assert mapped.database["total_sports"] == 300
+        assert mapped.database["sports"][5] == json_db.database["sports"][5]
+
+        for category in (None, "combat"):
+            a = mapped.find_best_matches(USER, num_matches=6, category_filter=category)
+            b = json_db.find_best_matches(USER, num_matches=6, category_filter=category)
+            assert a == b
+        users = random_users(20)
+        assert mapped.generate_recommendations_batch(users, 3) == json_db.generate_recommendations_batch(users, 3)
+    print("✅ Test 8 PASSED\n")
+
+
+def test_stale_compiled_database_is_ignored():
+    """Editing the JSON after compiling falls back to the JSON"""
+    print("\n🧪 Test 9: Stale Compiled Database")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = load_db(tmp, num_sports=50)
+        out = compile_database(db.db_path)
+        stamp = Path(out).stat().st_mtime
+        os.utime(db.db_path, (stamp + 10, stamp + 10))
+        assert LocalSportsDatabase(db.db_path).compiled is None
+    print("✅ Test 9 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Local Sports Database Tests")
+    print("="*70)
+
+    test_matrix_built_on_load()
+    test_vectorized_matches_python_loop()
+    test_unknown_category_returns_empty()
+    test_spatial_index_matches_brute_force()
+    test_spatial_index_skipped_for_small_or_sparse()
+    test_batch_matches_per_user()
+    test_batch_recommendations_keep_category_diversity()
+    test_compiled_database_matches_json()
+    test_stale_compiled_database_is_ignored()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
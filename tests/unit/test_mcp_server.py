@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_mcp_server.py
+-----------------------------
+Tests for mcp_server.py: /mcp/analyze payload projection and encoding.
+"""
+
+import copy
+import json
+import sys
+from pathlib import Path
+from unittest import mock
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from fastapi.testclient import TestClient
+
+import mcp_server
+from mcp_server import encode_response, msgpack, project_response, wants_msgpack
+
+PAYLOAD = {
+    "success": True,
+    "session_id": "s-1",
+    "protocol": "mcp",
+    "timestamp": "2025-01-01T00:00:00",
+    "status": "complete",
+    "debug": {"trace": "x" * 100},
+    "data": {
+        "recommendations": [{"sport": "Yoga", "match": 0.87, "tags": ["calm", "solo"]}],
+        "personality": {"type": "Calm Solo Explorer", "z": {"calm": 0.8, "social": -0.2}},
+        "research_details": {
+            "analysis_type": "bulletproof",
+            "total_sources_consulted": 4,
+            "browsed_pages": [{"title": "Yoga", "url": "https://example.com/yoga", "content": "..." * 50}],
+            "search_results": {"brave": [{"url": "a"}, {"url": "b"}], "wiki": None},
+            "specific_sport_research": [{"sport": "Yoga", "body": "..."}],
+            "confidence_level": "high",
+        },
+    },
+}
+
+
+def test_detail_levels():
+    """full is untouched, summary trims research, minimal keeps envelope + recommendations"""
+    print("\n🧪 Test 1: Detail Levels")
+    original = copy.deepcopy(PAYLOAD)
+    assert project_response(PAYLOAD) is PAYLOAD
+    assert project_response(PAYLOAD, "bogus") is PAYLOAD
+
+    summary = project_response(PAYLOAD, "SUMMARY")
+    research = summary["data"]["research_details"]
+    assert research["pages_browsed"] == [{"title": "Yoga", "url": "https://example.com/yoga"}]
+    assert research["search_result_counts"] == {"brave": 2, "wiki": 0}
+    assert research["specific_sports"] == ["Yoga"]
+    assert summary["data"]["personality"] == PAYLOAD["data"]["personality"]
+
+    minimal = project_response(PAYLOAD, "minimal")
+    assert "debug" not in minimal and minimal["status"] == "complete"
+    assert minimal["data"] == {"recommendations": PAYLOAD["data"]["recommendations"]}
+
+    # errors carry no "data": nothing to shrink
+    error = {"success": False, "error": "boom"}
+    assert project_response(error, "minimal") == error
+    assert PAYLOAD == original  # projection never mutates the cached payload
+    print("✅ Test 1 PASSED\n")
+
+
+def test_field_projection():
+    """Dotted paths rebuild nested dicts; missing or non-dict paths are skipped"""
+    print("\n🧪 Test 2: Field Projection")
+    projected = project_response(PAYLOAD, fields="status, data.personality.z.calm,,data.recommendations")
+    assert projected == {
+        "status": "complete",
+        "data": {"personality": {"z": {"calm": 0.8}}, "recommendations": PAYLOAD["data"]["recommendations"]},
+    }
+    assert project_response(PAYLOAD, fields=["status", " data.personality.z.calm", ""]) == {
+        "status": "complete", "data": {"personality": {"z": {"calm": 0.8}}}
+    }
+    assert project_response(PAYLOAD, fields="missing,data.nope,status.inner,data.recommendations.0") == {}
+    assert project_response(PAYLOAD, "minimal", "data.personality,session_id") == {"session_id": "s-1"}
+    assert project_response(PAYLOAD, "summary", "data.research_details.confidence_level") == {
+        "data": {"research_details": {"confidence_level": "high"}}
+    }
+    print("✅ Test 2 PASSED\n")
+
+
+def test_encoding_round_trip():
+    """JSON by default; MessagePack when asked for and installed; both decode to the payload"""
+    print("\n🧪 Test 3: Encoding Round-Trip")
+    payload = project_response(PAYLOAD, "summary")
+    response = encode_response(payload)
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == payload
+    assert json.loads(encode_response(payload, "text/html, */*").body) == payload
+
+    arabic = {"message": "أفضل رياضة لك: اليوغا", "score": 0.5}
+    assert json.loads(encode_response(arabic).body.decode("utf-8")) == arabic
+
+    if msgpack is None:
+        assert not wants_msgpack("application/msgpack")
+        assert encode_response(payload, "application/msgpack").media_type == "application/json"
+        print("⚠️  msgpack not installed - skipping MessagePack round-trip")
+    else:
+        for accept in ("application/msgpack", "application/x-msgpack;q=0.9, application/json"):
+            response = encode_response(payload, accept)
+            assert response.media_type == "application/msgpack"
+            assert msgpack.unpackb(response.body, raw=False) == payload
+        assert msgpack.unpackb(encode_response(arabic, "application/msgpack").body, raw=False) == arabic
+        assert len(encode_response(payload, "application/msgpack").body) < len(encode_response(payload).body)
+    print("✅ Test 3 PASSED\n")
+
+
+def test_analyze_endpoint_shaping_params():
+    """/mcp/analyze takes fields as a string or JSON list; other types are a 422, not a 500"""
+    print("\n🧪 Test 4: Endpoint Shaping Params")
+    analysis = mock.AsyncMock(return_value=copy.deepcopy(PAYLOAD))
+    with mock.patch.object(mcp_server, "_run_mcp_analysis", analysis):
+        client = TestClient(mcp_server.mcp_app)
+        body = {"answers": [], "fields": ["status", "data.recommendations"]}
+        response = client.post("/mcp/analyze", json=body)
+        assert response.status_code == 200
+        assert response.json() == {"status": "complete", "data": {"recommendations": PAYLOAD["data"]["recommendations"]}}
+
+        response = client.post("/mcp/analyze?fields=session_id", json={"fields": ["status"]})
+        assert response.json() == {"session_id": "s-1"}   # query string wins
+        assert client.post("/mcp/analyze", json={"detail": "minimal", "fields": "status"}).json() == {"status": "complete"}
+
+        calls = analysis.await_count
+        for bad in ({"fields": 5}, {"fields": {"status": True}}, {"fields": ["status", 1]}, {"detail": ["full"]}):
+            response = client.post("/mcp/analyze", json=bad)
+            assert response.status_code == 422, bad
+        assert analysis.await_count == calls   # rejected before the (slow) analysis runs
+    print("✅ Test 4 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 MCP Server Response Tests")
+    print("="*70)
+
+    test_detail_levels()
+    test_field_projection()
+    test_encoding_round_trip()
+    test_analyze_endpoint_shaping_params()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
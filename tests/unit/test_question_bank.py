@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_question_bank.py
+--------------------------------
+Tests for question_bank.py: cached, compiled question loading.
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import question_bank
+from question_bank import load_question_bank
+
+
+QUESTIONS = [
+    {
+        "key": "q1",
+        "question_ar": "سؤال",
+        "question_en": "Question",
+        "options": [
+            {"text_ar": "هدوء تام", "text_en": "Total calm", "scores": {"calm_adrenaline": -0.9}},
+            {"text_ar": "سرعة", "text_en": "Speed", "scores": {"calm_adrenaline": 0.8}},
+        ],
+    },
+    {"key": "q2", "question_ar": "قديم", "multiple_choices": ["أ", "ب"]},
+]
+
+
+def test_cached_until_file_changes():
+    """Reruns reuse the compiled bank; a modified file is recompiled"""
+    print("\n🧪 Test 1: Cache + Invalidation")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "questions.json"
+        path.write_text(json.dumps(QUESTIONS, ensure_ascii=False), encoding="utf-8")
+
+        bank = load_question_bank(path)
+        assert load_question_bank(str(path)) is bank
+
+        path.write_text(json.dumps(QUESTIONS[:1], ensure_ascii=False), encoding="utf-8")
+        os.utime(path, ns=(1, 1))
+        assert load_question_bank(path) is bank  # stat not re-checked within the interval
+
+        question_bank._cache[str(path.resolve())]["checked_at"] -= question_bank.STAT_INTERVAL_SECS
+        reloaded = load_question_bank(path)
+        assert reloaded is not bank and len(reloaded) == 1
+    print("✅ Test 1 PASSED\n")
+
+
+def test_projection_and_matching():
+    """Per-language projections and the scorer's option matching"""
+    print("\n🧪 Test 2: Projection + Matching")
+    bank = question_bank.QuestionBank(QUESTIONS)
+    assert bank.for_language("English")[0] == {
+        "key": "q1", "question": "Question", "type": "single",
+        "options": ["Total calm", "Speed"], "allow_custom": False
+    }
+    assert bank.for_language("العربية")[1]["options"] == ["أ", "ب"]
+    assert bank.for_language("en")[1]["question"] == "قديم"
+
+    assert bank.match_option("q1", "Speed")["scores"] == {"calm_adrenaline": 0.8}
+    assert bank.match_option("q1", "هدوء")["text_en"] == "Total calm"  # substring rule
+    assert bank.match_option("q1", "nothing") is None
+    assert bank.match_option("missing", "Speed") is None
+    print("✅ Test 2 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Question Bank Tests")
+    print("="*70)
+
+    test_cached_until_file_changes()
+    test_projection_and_matching()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
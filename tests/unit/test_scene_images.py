@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_scene_images.py
+-------------------------------
+Tests for the concurrent scene-image stage (scripts/tools/scene_images.py)
+against a local stand-in for the RunPod /runsync endpoint.
+"""
+
+import base64
+import json
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2] / "scripts" / "tools"))
+
+from scene_images import RunPodHTTPClient, generate_scene_images
+
+IMAGE_SECS = 0.3
+
+
+def _stand_in_server():
+    """Fake RunPod: 0.3 s per image; "flaky" fails once, "broken" always fails"""
+    calls = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            prompt = body["input"]["prompt"]
+            with lock:
+                calls[prompt] = calls.get(prompt, 0) + 1
+                attempt = calls[prompt]
+            time.sleep(IMAGE_SECS)
+            if prompt == "broken" or (prompt == "flaky" and attempt == 1):
+                reply = {"id": "x", "status": "FAILED", "error": "GPU hiccup"}
+            else:
+                image = base64.b64encode(prompt.encode()).decode()
+                reply = {"id": "x", "status": "COMPLETED", "output": {"image_b64": image, "seed": 42}}
+            data = json.dumps(reply).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, calls
+
+
+def test_scenes_run_concurrently_in_order():
+    """Eight scenes take about one image's time and come back in scene order"""
+    print("\n🧪 Test 1: Concurrent Generation")
+    server, _ = _stand_in_server()
+    try:
+        client = RunPodHTTPClient(base_url=f"http://127.0.0.1:{server.server_port}")
+        scenes = [{"image_prompt": f"scene {i}"} for i in range(1, 9)]
+        progress = []
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.time()
+            results = generate_scene_images(scenes, client, Path(tmp), max_workers=8,
+                                            on_progress=lambda d, t, r: progress.append((d, t)))
+            elapsed = time.time() - start
+
+            assert elapsed < IMAGE_SECS * 4, elapsed
+            assert [r["index"] for r in results] == list(range(1, 9))
+            assert all(r["source"] == "backend" and r["seed"] == 42 for r in results)
+            assert results[2]["path"].read_bytes() == b"scene 3"
+            assert sorted(progress) == [(d, 8) for d in range(1, 9)]
+    finally:
+        server.shutdown()
+    print("✅ Test 1 PASSED\n")
+
+
+def test_retry_then_placeholder():
+    """Transient failures are retried; persistent ones fall back to a placeholder"""
+    print("\n🧪 Test 2: Retry + Placeholder")
+    server, calls = _stand_in_server()
+    try:
+        client = RunPodHTTPClient(base_url=f"http://127.0.0.1:{server.server_port}")
+        scenes = [{"image_prompt": p} for p in ("ok", "flaky", "broken")]
+        with tempfile.TemporaryDirectory() as tmp:
+            placeholder = Path(tmp) / "placeholder.png"
+            placeholder.write_bytes(b"P")
+            results = generate_scene_images(scenes, client, Path(tmp), retries=3, backoff=0.01,
+                                            fallback=lambda i, scene: placeholder)
+
+            assert [r["source"] for r in results] == ["backend", "backend", "placeholder"]
+            assert results[1]["attempts"] == 2 and calls["flaky"] == 2
+            assert results[2]["attempts"] == 3 and results[2]["path"] == placeholder
+            assert "GPU hiccup" in results[2]["error"]
+    finally:
+        server.shutdown()
+    print("✅ Test 2 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Scene Image Stage Tests")
+    print("="*70)
+
+    test_scenes_run_concurrently_in_order()
+    test_retry_then_placeholder()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_segment_log.py
+------------------------------
+Tests for api/segment_log.py: append-only segmented response log.
+"""
+
+import multiprocessing
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from api.segment_log import SPARSE_EVERY, SegmentedLogStore
+
+
+def _record(i: int) -> dict:
+    return {
+        "saved_at": f"2025-01-01T00:{i // 60:02d}:{i % 60:02d}",
+        "session_id": f"s{i % 7}",
+        "n": i,
+        "text": "x" * 50,
+    }
+
+
+def _append_many(root: str, start: int, count: int):
+    store = SegmentedLogStore(root, max_segment_bytes=2000)
+    for i in range(start, start + count):
+        store.append(_record(i))
+
+
+def test_rotation_and_iteration():
+    """Size rotation seals segments; iteration returns everything in order"""
+    print("\n🧪 Test 1: Rotation + Iteration")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SegmentedLogStore(tmp, max_segment_bytes=1000)
+        for i in range(100):
+            assert "#" in store.append(_record(i))
+
+        segments = store._segments()
+        assert len(segments) > 5
+        assert all(store._is_sealed(p) for _, _, p in segments[:-1])
+        assert [r["n"] for r in store.iter_records()] == list(range(100))
+    print("✅ Test 1 PASSED\n")
+
+
+def test_time_range_and_session_lookup():
+    """since/until and session lookups use the sparse indexes"""
+    print("\n🧪 Test 2: Range + Session Queries")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SegmentedLogStore(tmp, max_segment_bytes=1500, compression="gzip")
+        for i in range(150):
+            store.append(_record(i))
+        assert any(p.name.endswith(".gz") for _, _, p in store._segments())
+
+        since, until = _record(40)["saved_at"], _record(90)["saved_at"]
+        assert [r["n"] for r in store.iter_records(since, until)] == list(range(40, 91))
+        assert [r["n"] for r in store.find_session("s3")] == [i for i in range(150) if i % 7 == 3]
+    print("✅ Test 2 PASSED\n")
+
+
+def test_concurrent_writers():
+    """Several processes append to the same log without losing or mixing lines"""
+    print("\n🧪 Test 3: Concurrent Writers")
+    with tempfile.TemporaryDirectory() as tmp:
+        procs = [
+            multiprocessing.Process(target=_append_many, args=(tmp, w * 100, 100))
+            for w in range(4)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+
+        records = list(SegmentedLogStore(tmp).iter_records())
+        assert sorted(r["n"] for r in records) == list(range(400))
+    print("✅ Test 3 PASSED\n")
+
+
+def test_out_of_order_timestamps():
+    """A record stamped late but appended after a sparse entry is still found by since"""
+    print("\n🧪 Test 4: Out-of-Order Timestamps")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SegmentedLogStore(tmp)
+        for i in range(3 * SPARSE_EVERY):
+            # every record written just before a sparse entry carries a newer stamp
+            stamp = i + SPARSE_EVERY if i % SPARSE_EVERY == SPARSE_EVERY - 1 else i
+            store.append({**_record(stamp), "n": i})
+        store.seal_active()
+
+        since = _record(SPARSE_EVERY + 10)["saved_at"]
+        expected = [i for i in range(3 * SPARSE_EVERY)
+                    if (i + SPARSE_EVERY if i % SPARSE_EVERY == SPARSE_EVERY - 1 else i) >= SPARSE_EVERY + 10]
+        assert [r["n"] for r in store.iter_records(since)] == expected
+        assert SPARSE_EVERY - 1 in expected   # lives before the seek point of a naive index
+    print("✅ Test 4 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Segmented Log Tests")
+    print("="*70)
+
+    test_rotation_and_iteration()
+    test_time_range_and_session_lookup()
+    test_concurrent_writers()
+    test_out_of_order_timestamps()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_sql_storage.py
+------------------------------
+Tests for api/sql_storage.py: batched writer and analytics queries (SQLite).
+"""
+
+import json
+import sqlite3
+import sys
+import tempfile
+import threading
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from api.sql_storage import INSERT_EVENT, SQLiteAdapter, SQLStorageEngine
+
+
+def _engine(tmp: str, adapter=None, **kwargs) -> SQLStorageEngine:
+    kwargs.setdefault("spill_path", str(Path(tmp) / "spill.jsonl"))
+    return SQLStorageEngine(adapter or SQLiteAdapter(str(Path(tmp) / "test.db")), **kwargs)
+
+
+class _LockedConnection:
+    """sqlite3 connection whose writes fail with "database is locked" while adapter.locked"""
+
+    def __init__(self, conn, adapter):
+        self._conn, self._adapter = conn, adapter
+
+    def _check(self, sql):
+        if self._adapter.locked and sql.lstrip().upper().startswith("INSERT"):
+            raise sqlite3.OperationalError("database is locked")
+
+    def cursor(self):
+        outer = self
+
+        class Cursor:
+            def __init__(self):
+                self._cur = outer._conn.cursor()
+
+            def executemany(self, sql, rows):
+                outer._check(sql)
+                return self._cur.executemany(sql, rows)
+
+            def __getattr__(self, name):
+                return getattr(self._cur, name)
+        return Cursor()
+
+    def execute(self, sql, params=()):
+        self._check(sql)
+        return self._conn.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class LockableAdapter(SQLiteAdapter):
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        self.locked = False
+        self.closed_threads = []
+
+    def connect(self):
+        return _LockedConnection(super().connect(), self)
+
+    def close(self):
+        self.closed_threads.append(threading.current_thread().name)
+        super().close()
+
+
+def test_batched_writes():
+    """Queued rows land in batches; flush() makes them visible"""
+    print("\n🧪 Test 1: Batched Writes")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(tmp, flush_batch=50)
+        for i in range(120):
+            engine.record_response({
+                "language": "en" if i % 2 else "ar",
+                "saved_at": f"2025-01-01T00:00:{i % 60:02d}",
+                "recommendations": [{"sport": "Yoga", "match_score": 87}, {"sport": "Archery"}],
+                "n": i,
+            })
+        assert engine.flush()
+
+        conn = engine.adapter.connect()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 120
+        assert conn.execute("SELECT COUNT(*) FROM recommendations").fetchone()[0] == 240
+        assert conn.execute(
+            "SELECT match_score FROM recommendations WHERE sport_label = 'yoga' LIMIT 1"
+        ).fetchone()[0] == 0.87
+        assert sorted(r["n"] for r in engine.iter_sessions()) == list(range(120))
+        engine.close()
+    print("✅ Test 1 PASSED\n")
+
+
+def test_retention_and_activation():
+    """Retention / activation match the schema.sql definitions and use indexes"""
+    print("\n🧪 Test 2: Retention + Activation")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(tmp)
+        engine.record_response({"language": "ar", "saved_at": "2025-01-02T10:00:00",
+                                "recommendations": [{"sport": "Yoga"}]})
+        engine.record_response({"language": "en", "saved_at": "2025-01-03T10:00:00",
+                                "recommendations": []})
+        engine.flush()
+        conn = engine.adapter.connect()
+        user_id = conn.execute("SELECT id FROM users WHERE language = 'ar'").fetchone()[0]
+
+        engine.track_event(user_id, "quiz_started", {}, "2025-01-02T10:00:00")
+        engine.track_event(user_id, "returned", {}, "2025-01-06T10:00:00")
+        engine.flush()
+        assert engine.calculate_7day_retention(user_id) is True
+        engine.track_event(user_id, "returned", {}, "2025-01-20T10:00:00")
+        engine.flush()
+        assert engine.calculate_7day_retention(user_id) is False
+        assert engine.calculate_7day_retention("missing") is False
+
+        assert engine.calculate_activation_rate("2025-01-01", "2025-01-31") == 50.0
+        assert engine.calculate_activation_rate("2026-01-01", "2026-01-31") == 0.0
+
+        plan = " ".join(str(r) for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT MIN(created_at), MAX(created_at) "
+            "FROM analytics_events WHERE user_id = ?", (user_id,)
+        ))
+        assert "idx_analytics_user_created" in plan
+        engine.close()
+    print("✅ Test 2 PASSED\n")
+
+
+def test_bad_row_only_drops_itself():
+    """One failing row no longer rolls back the rest of its batch"""
+    print("\n🧪 Test 3: Row-by-Row Retry")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(tmp, flush_batch=500, flush_interval=0.05)
+        for i in range(10):
+            engine.track_event(None, f"event_{i}", {"i": i})
+        engine._enqueue(INSERT_EVENT, ("dup", None, "first", "{}", "2025-01-01 00:00:00"))
+        engine._enqueue(INSERT_EVENT, ("dup", None, "second", "{}", "2025-01-01 00:00:00"))  # PK clash
+        engine.track_event(None, "after_bad_row", {})
+        assert engine.flush()
+
+        conn = engine.adapter.connect()
+        assert conn.execute("SELECT COUNT(*) FROM analytics_events").fetchone()[0] == 12
+        assert conn.execute("SELECT event_name FROM analytics_events WHERE id = 'dup'").fetchone()[0] == "first"
+        assert engine.dropped == 1 and engine.spilled == 0
+        engine.close()
+    print("✅ Test 3 PASSED\n")
+
+
+def test_transient_errors_requeue_then_spill():
+    """Locked DB: rows are re-queued (flush waits for them), spilled after MAX_WRITE_ATTEMPTS, replayable"""
+    print("\n🧪 Test 4: Transient Errors")
+    with tempfile.TemporaryDirectory() as tmp:
+        adapter = LockableAdapter(str(Path(tmp) / "test.db"))
+        engine = _engine(tmp, adapter=adapter, flush_interval=0.01)
+
+        adapter.locked = True
+        engine.track_event(None, "while_locked", {})
+        assert engine.flush()
+        spill = Path(tmp) / "spill.jsonl"
+        assert engine.spilled == 1 and engine.dropped == 0
+        assert json.loads(spill.read_text(encoding="utf-8"))["params"][2] == "while_locked"
+
+        adapter.locked = False
+        assert engine.replay_spill() == 1 and not spill.exists()
+        engine.track_event(None, "after_unlock", {})
+        assert engine.flush()
+        names = [r[0] for r in adapter.connect().execute("SELECT event_name FROM analytics_events")]
+        assert sorted(names) == ["after_unlock", "while_locked"]
+
+        engine.close()
+        assert "sql-writer" in adapter.closed_threads   # writer closes its own connection
+    print("✅ Test 4 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 SQL Storage Tests")
+    print("="*70)
+
+    test_batched_writes()
+    test_retention_and_activation()
+    test_bad_row_only_drops_itself()
+    test_transient_errors_requeue_then_spill()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_storage.py
+--------------------------
+Tests for api/storage.py: research responses and statistics.
+"""
+
+import csv
+import gzip
+import io
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from api import storage
+
+
+SAMPLE_RESPONSES = [
+    {
+        "language": "ar",
+        "analysis_summary": {"profile_type": "Calm Solo Explorer"},
+        "recommendations": [{"sport": "Yoga"}, {"sport": "Archery"}, {"sport": "Climbing"}],
+        "research_consent": True,
+        "additional_info": "I like mountains",
+        "answers": [{"question_key": "q1", "answer_text": "a"}],
+    },
+    {
+        "language": "en",
+        "analysis_summary": {"profile_type": "Social Team Player"},
+        "recommendations": [{"sport": "Football"}, {"sport": "Yoga"}],
+        "research_consent": False,
+        "additional_info": "  ",
+        "answers": [],
+    },
+    {
+        "language": "ar",
+        "analysis_summary": {"profile_type": "Calm Solo Explorer"},
+        "recommendations": [{"sport": "Yoga"}],
+        "research_consent": True,
+    },
+]
+
+
+@contextmanager
+def temp_storage(backend: str = "files"):
+    """Point api.storage at a temporary directory"""
+    names = ("STORAGE_DIR", "STATS_PATH", "STATS_LOCK_PATH", "STORAGE_BACKEND", "LOG_DIR", "SQLITE_PATH")
+    saved = {name: getattr(storage, name) for name in names}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        storage.STORAGE_DIR = root
+        storage.STATS_PATH = root / "stats_rollup.json"
+        storage.STATS_LOCK_PATH = root / ".stats_rollup.lock"
+        storage.STORAGE_BACKEND = backend
+        storage.LOG_DIR = root / "log"
+        storage.SQLITE_PATH = root / "sportsync.db"
+        try:
+            yield root
+        finally:
+            for name, value in saved.items():
+                setattr(storage, name, value)
+
+
+def test_statistics_from_rollup():
+    """get_statistics reflects every save without rescanning"""
+    print("\n🧪 Test 1: Incremental Statistics")
+    with temp_storage():
+        assert storage.get_statistics()["total_responses"] == 0
+        for resp in SAMPLE_RESPONSES:
+            assert storage.save_response(dict(resp))
+
+        stats = storage.get_statistics()
+        assert stats["total_responses"] == 3
+        assert stats["languages"] == {"ar": 2, "en": 1}
+        assert list(stats["profile_types"].items())[0] == ("Calm Solo Explorer", 2)
+        assert stats["top_sports"]["Yoga"] == 3
+        assert stats["consent_rate"] == "66.7%"
+        assert stats["additional_info_rate"] == "33.3%"
+        assert stats["date_range"]["first"] <= stats["date_range"]["last"]
+    print("✅ Test 1 PASSED\n")
+
+
+def test_rebuild_matches_incremental():
+    """rebuild_statistics() recomputes the same rollup from the files"""
+    print("\n🧪 Test 2: Rebuild")
+    with temp_storage():
+        for resp in SAMPLE_RESPONSES:
+            storage.save_response(dict(resp))
+        incremental = storage.get_statistics()
+
+        storage.STATS_PATH.unlink()
+        assert storage.get_statistics() == incremental
+        assert storage.rebuild_statistics()["total_responses"] == 3
+    print("✅ Test 2 PASSED\n")
+
+
+def test_log_backend():
+    """The segmented log backend stores, streams and counts the same data"""
+    print("\n🧪 Test 3: Log Backend")
+    with temp_storage("log") as root:
+        for resp in SAMPLE_RESPONSES:
+            assert "#" in storage.save_response(dict(resp))
+        assert not list(root.glob("response_*.json"))
+        assert [r["language"] for r in storage.iter_responses()] == ["ar", "en", "ar"]
+        assert storage.get_statistics()["total_responses"] == 3
+        assert storage.rebuild_statistics()["languages"] == {"ar": 2, "en": 1}
+    print("✅ Test 3 PASSED\n")
+
+
+def test_sqlite_backend():
+    """The SQLite backend fills the schema.sql tables and streams responses back"""
+    print("\n🧪 Test 4: SQLite Backend")
+    with temp_storage("sqlite"):
+        for resp in SAMPLE_RESPONSES:
+            assert storage.save_response(dict(resp))
+        assert [r["language"] for r in storage.iter_responses()] == ["ar", "en", "ar"]
+        assert storage.get_statistics()["total_responses"] == 3
+
+        engine = storage.get_sql_engine()
+        assert engine.top_sports(1)[0]["sport_name"] == "Yoga"
+        assert engine.calculate_activation_rate("2000-01-01", "2999-01-01") == 100.0
+        engine.close()
+        storage._sql_engine = None
+    print("✅ Test 4 PASSED\n")
+
+
+def test_streaming_export():
+    """CSV is escaped and streamed (optionally gzipped); Parquet keeps z-scores as floats"""
+    print("\n🧪 Test 5: Streaming Export")
+    with temp_storage():
+        assert storage.export_to_csv() == "No data to export"
+        for resp in SAMPLE_RESPONSES:
+            storage.save_response(dict(resp))
+        storage.save_response({
+            "language": "en",
+            "analysis_summary": {"profile_type": 'The "Quiet", Focused One'},
+            "recommendations": [{"sport": "Tai Chi, Outdoor"}],
+            "personality_scores": {"calm_adrenaline": -0.5, "solo_group": 0.25},
+        })
+
+        rows = list(csv.reader(io.StringIO(storage.export_to_csv())))
+        assert rows[0] == storage.CSV_COLUMNS and len(rows) == 5
+        assert rows[4][3] == 'The "Quiet", Focused One' and rows[4][4] == "Tai Chi, Outdoor"
+
+        plain = b"".join(storage.iter_csv())
+        assert gzip.decompress(b"".join(storage.iter_csv(compress=True))) == plain
+
+        if storage.pa is not None:
+            table = storage.pq.read_table(io.BytesIO(b"".join(storage.iter_parquet(batch_rows=2))))
+            assert table.num_rows == 4
+            assert str(table.schema.field("z_calm_adrenaline").type) == "double"
+            assert table.column("z_calm_adrenaline").to_pylist() == [None, None, None, -0.5]
+            assert table.column("consent").to_pylist() == [True, False, True, False]
+    print("✅ Test 5 PASSED\n")
+
+
+def test_date_range_ignores_bad_timestamps():
+    """Missing or non-ISO saved_at values never become the first/last date"""
+    print("\n🧪 Test 6: Date Range Validation")
+    rollup = storage._empty_rollup()
+    for saved_at in ["2025-03-01T10:00:00", "unknown", None, "2025-02-01T10:00:00Z",
+                     "not a date", "2025-04-01T09:30:00.123456"]:
+        storage._apply_to_rollup(rollup, {"saved_at": saved_at})
+    storage._apply_to_rollup(rollup, {})
+    assert rollup["total_responses"] == 7
+    assert rollup["first_saved_at"] == "2025-02-01T10:00:00Z"
+    assert rollup["last_saved_at"] == "2025-04-01T09:30:00.123456"
+    print("✅ Test 6 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Storage Tests")
+    print("="*70)
+
+    test_statistics_from_rollup()
+    test_rebuild_matches_incremental()
+    test_log_backend()
+    test_sqlite_backend()
+    test_streaming_export()
+    test_date_range_ignores_bad_timestamps()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_text_overlay.py
+-------------------------------
+Tests for the scene text overlays (scripts/tools/text_overlay.py):
+font cache, pixel wrapping, band-only compositing, placeholder templates.
+"""
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2] / "scripts" / "tools"))
+
+from PIL import Image, ImageDraw
+
+from text_overlay import (
+    draw_scene_overlay, get_font, render_placeholder, shade_band, template_background, text_width, wrap_text_px,
+)
+
+TEXT = "محمد صلاح يسجل هدفاً رائعاً في الدقيقة التسعين ويقود ليفربول للفوز في مباراة مثيرة جداً"
+
+
+def test_font_cache_and_pixel_wrap():
+    """Same font object per size; every wrapped line fits the width"""
+    print("\n🧪 Test 1: Font Cache + Wrap")
+    assert get_font(45) is get_font(45)
+    assert get_font(45) is not get_font(45, bold=True)
+
+    lines = wrap_text_px(TEXT, 45, 500)
+    assert len(lines) > 1 and " ".join(lines) == " ".join(TEXT.split())
+    for line in lines:
+        assert text_width(line, 45) <= 500 or " " not in line
+    assert wrap_text_px("", 45, 500) == []
+    assert wrap_text_px("supercalifragilistic", 45, 10) == ["supercalifragilistic"]
+    print("✅ Test 1 PASSED\n")
+
+
+def test_band_matches_alpha_composite():
+    """Only the band rows change, and they match the old RGBA overlay exactly"""
+    print("\n🧪 Test 2: Band Compositing")
+    base = Image.linear_gradient("L").resize((1080, 1920)).convert("RGB")
+
+    overlay = Image.new("RGBA", base.size, (0, 0, 0, 0))
+    ImageDraw.Draw(overlay).rectangle([(0, 1400), (1080, 1800)], fill=(0, 0, 0, 180))
+    expected = Image.alpha_composite(base.convert("RGBA"), overlay).convert("RGB")
+
+    shaded = base.copy()
+    shade_band(shaded, (0, 1400, 1080, 1801))
+    assert shaded.tobytes() == expected.tobytes()
+    assert shaded.crop((0, 0, 1080, 1400)).tobytes() == base.crop((0, 0, 1080, 1400)).tobytes()
+    print("✅ Test 2 PASSED\n")
+
+
+def test_overlay_and_placeholder():
+    """Overlay keeps the size (scaled layouts too); templates are reused, not mutated"""
+    print("\n🧪 Test 3: Overlay + Placeholder")
+    img = draw_scene_overlay(Image.new("RGB", (1080, 1920), (90, 120, 60)), "الهدف", TEXT, 3, 12)
+    assert img.size == (1080, 1920) and img.mode == "RGB"
+    assert img.getpixel((5, 50)) == (90, 120, 60)          # outside every band
+    assert img.getpixel((5, 150)) != (90, 120, 60)         # title band
+
+    small = draw_scene_overlay(Image.new("RGBA", (540, 960)), "الهدف", TEXT, 3, 12)
+    assert small.size == (540, 960) and small.mode == "RGB"
+
+    first = render_placeholder("المشهد", TEXT, 1, 12, color=(25, 35, 45))
+    second = render_placeholder("المشهد", TEXT, 2, 12, color=(25, 35, 45))
+    assert first.size == (1080, 1920) and first.tobytes() != second.tobytes()
+    template = template_background((25, 35, 45))
+    assert template is template_background((25, 35, 45))
+    assert template.getpixel((5, 5)) == (25, 35, 45)
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Text Overlay Tests")
+    print("="*70)
+
+    test_font_cache_and_pixel_wrap()
+    test_band_matches_alpha_composite()
+    test_overlay_and_placeholder()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_track_stats.py
+------------------------------
+Tests for api/track_stats.py: streaming sketches behind /api/track/stats.
+"""
+
+import json
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from api.track_stats import HyperLogLog, StreamingStats, TopK, Welford, load_track_stats
+
+
+def _event(i: int, now: datetime) -> dict:
+    return {
+        "session_id": f"s{i % 50}",
+        "timestamp": (now - timedelta(minutes=i % 90)).isoformat(),
+        "language": "ar" if i % 3 else "en",
+        "profile_type": f"type{i % 4}",
+        "recommended_sports": [f"sport{i % 7}", "Yoga"],
+        "z_scores": {"calm_adrenaline": (i % 10) / 10},
+    }
+
+
+def test_sketch_accuracy():
+    """HLL, Count-Min top-k and Welford stay close to the exact answers"""
+    print("\n🧪 Test 1: Sketch Accuracy")
+    hll = HyperLogLog()
+    for i in range(50000):
+        hll.add(f"session-{i % 20000}")
+    assert abs(hll.count() - 20000) / 20000 < 0.05
+
+    rng = random.Random(7)
+    topk = TopK(k=5)
+    sports = [f"sport{i}" for i in range(500)]
+    weights = [1000 if i < 5 else 1 for i in range(500)]
+    for sport in rng.choices(sports, weights, k=20000):
+        topk.add(sport)
+    assert {row["sport"] for row in topk.top()} == {f"sport{i}" for i in range(5)}
+
+    values = [rng.gauss(0.3, 0.2) for _ in range(5000)]
+    w = Welford()
+    for v in values:
+        w.add(v)
+    mean = sum(values) / len(values)
+    var = sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+    assert abs(w.summary()["mean"] - mean) < 1e-3 and abs(w.summary()["variance"] - var) < 1e-3
+    print("✅ Test 1 PASSED\n")
+
+
+def test_snapshot_and_windows():
+    """Events land in the global counters and only in the windows that cover them"""
+    print("\n🧪 Test 2: Snapshot + Windows")
+    stats = StreamingStats()
+    now = datetime.utcnow()
+    for i, age in enumerate([timedelta(minutes=5), timedelta(hours=3), timedelta(days=3), timedelta(days=30)]):
+        stats.write([{
+            "session_id": f"s{i}",
+            "timestamp": (now - age).isoformat(),
+            "language": "ar" if i % 2 == 0 else "en",
+            "profile_type": "Balanced All-Rounder",
+            "recommended_sports": ["Yoga", "Archery"],
+            "z_scores": {"calm_adrenaline": i * 0.5},
+        }])
+
+    snap = stats.snapshot()
+    assert snap["total_events"] == 4 and snap["unique_sessions"] == 4
+    assert snap["languages"] == {"ar": 2, "en": 2}
+    assert snap["top_sports"][0] == {"sport": "Archery", "count": 4}
+    assert snap["z_scores"]["calm_adrenaline"]["mean"] == 0.75
+    assert snap["windows"]["last_hour"]["events"] == 1
+    assert snap["windows"]["last_day"]["events"] == 2
+    assert snap["windows"]["last_week"]["events"] == 3
+    assert snap["windows"]["last_week"]["unique_sessions"] == 3
+    print("✅ Test 2 PASSED\n")
+
+
+def test_cold_start_from_snapshot():
+    """Snapshot + background tail replay == full replay; requests never wait for it"""
+    print("\n🧪 Test 3: Snapshot Cold Start")
+    now = datetime.utcnow()
+    with tempfile.TemporaryDirectory() as tmp:
+        events_path = Path(tmp) / "events.jsonl"
+
+        # Previous process: 300 events flushed (disk sink first, then stats) and snapshotted at shutdown
+        first = load_track_stats(str(events_path))
+        batch = [_event(i, now) for i in range(300)]
+        events_path.write_text("".join(json.dumps(e) + "\n" for e in batch), encoding="utf-8")
+        first.write(batch)
+        first.close()
+        assert Path(tmp, "events.stats.json").exists()
+
+        # More events land on disk after the snapshot (e.g. another flush before the crash)
+        tail = [_event(i, now) for i in range(300, 420)]
+        with open(events_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e) + "\n" for e in tail))
+
+        restored = load_track_stats(str(events_path))
+        assert restored.warm.wait(5)
+        expected = StreamingStats()
+        expected.write(batch + tail)
+
+        got, want = restored.snapshot(), expected.snapshot()
+        assert got["warming"] is False
+        for key in ("total_events", "unique_sessions", "languages", "profile_types", "top_sports",
+                    "z_scores", "windows"):
+            assert got[key] == want[key], key
+
+        # A snapshot that claims more than the file holds (file rotated) is ignored
+        events_path.write_text(json.dumps(tail[0]) + "\n", encoding="utf-8")
+        rotated = load_track_stats(str(events_path))
+        assert rotated.warm.wait(5) and rotated.snapshot()["total_events"] == 1
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Track Stats Tests")
+    print("="*70)
+
+    test_sketch_accuracy()
+    test_snapshot_and_windows()
+    test_cold_start_from_snapshot()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
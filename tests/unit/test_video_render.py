@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_video_render.py
+-------------------------------
+Tests for the ffmpeg slideshow renderer (scripts/tools/video_render.py):
+concat list / command construction, and a real render when ffmpeg exists.
+"""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2] / "scripts" / "tools"))
+
+from video_render import build_command, find_ffmpeg, probe_duration, render_slideshow, write_concat_list
+
+
+def test_concat_list_and_command():
+    """Durations per image, repeated last frame, audio muxed with -shortest"""
+    print("\n🧪 Test 1: Concat List + Command")
+    with tempfile.TemporaryDirectory() as tmp:
+        images = [Path(tmp) / "a.png", Path(tmp) / "it's.png"]
+        list_path = write_concat_list(images, [2, 3.5], Path(tmp) / "files.ffconcat")
+        lines = list_path.read_text(encoding="utf-8").splitlines()
+        assert lines[0] == "ffconcat version 1.0"
+        assert lines[2] == "duration 2.000" and lines[4] == "duration 3.500"
+        assert lines[3].endswith("it'\\''s.png'") and lines[5] == lines[3]
+
+        cmd = build_command(list_path, Path(tmp) / "out.mp4", Path(tmp) / "voice.mp3",
+                            1080, 1920, 24, "medium", 20, None, "ffmpeg")
+        assert cmd[cmd.index("-f") + 1] == "concat"
+        assert "crop=1080:1920" in cmd[cmd.index("-vf") + 1]
+        assert "-shortest" in cmd and cmd[cmd.index("-progress") + 1] == "pipe:1"
+
+        silent = build_command(list_path, Path(tmp) / "out.mp4", None, 1080, 1920, 24, "medium", 20, None, "ffmpeg")
+        assert "-shortest" not in silent
+    print("✅ Test 1 PASSED\n")
+
+
+def test_render_with_audio():
+    """Real render: per-image durations, progress reaches the end, audio trims the video"""
+    print("\n🧪 Test 2: Render")
+    try:
+        ffmpeg = find_ffmpeg()
+    except RuntimeError:
+        print("⚠️  ffmpeg not installed - skipping")
+        return
+    from PIL import Image
+
+    with tempfile.TemporaryDirectory() as tmp:
+        images = []
+        for i, color in enumerate([(200, 30, 30), (30, 200, 30), (30, 30, 200)]):
+            path = Path(tmp) / f"scene_{i}.png"
+            Image.new("RGB", (720, 1280), color).save(path)
+            images.append(path)
+        audio = Path(tmp) / "voice.m4a"
+        subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-f", "lavfi",
+                        "-i", "sine=frequency=440:duration=2.5", "-c:a", "aac", str(audio)], check=True)
+
+        progress = []
+        silent = render_slideshow(images, Path(tmp) / "silent.mp4", durations=[1, 1, 1.5],
+                                  width=360, height=640, fps=12, preset="ultrafast",
+                                  on_progress=lambda done, total: progress.append((done, total)))
+        assert abs(probe_duration(silent) - 3.5) < 0.2
+        assert progress[-1][0] == progress[-1][1]
+
+        voiced = render_slideshow(images, Path(tmp) / "voiced.mp4", durations=2, audio=audio,
+                                  width=360, height=640, fps=12, preset="ultrafast")
+        assert abs(probe_duration(voiced) - 2.5) < 0.2   # -shortest
+    print("✅ Test 2 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Video Render Tests")
+    print("="*70)
+
+    test_concat_list_and_command()
+    test_render_with_audio()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
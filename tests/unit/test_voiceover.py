@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_voiceover.py
+----------------------------
+Tests for the per-scene TTS stage (scripts/tools/voiceover.py)
+using the offline "silent" engine.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2] / "scripts" / "tools"))
+
+from video_render import find_ffmpeg, probe_duration
+from voiceover import EspeakEngine, GTTSEngine, SilentEngine, synthesize_segment, synthesize_voiceover, tts_key
+
+
+class CountingEngine(SilentEngine):
+    def __init__(self):
+        super().__init__(voice="5")
+        self.texts = []
+
+    def synthesize(self, text, lang, out_path):
+        self.texts.append(text)
+        super().synthesize(text, lang, out_path)
+
+
+def test_key_covers_engine_voice_language_text():
+    print("\n🧪 Test 1: Cache Key")
+    key = tts_key("gtts", "com", "ar", "مرحبا")
+    assert key == tts_key("gtts", "com", "ar", " مرحبا ")
+    assert len({key, tts_key("espeak", "com", "ar", "مرحبا"), tts_key("gtts", "co.uk", "ar", "مرحبا"),
+                tts_key("gtts", "com", "en", "مرحبا"), tts_key("gtts", "com", "ar", "اهلا")}) == 5
+    print("✅ Test 1 PASSED\n")
+
+
+def test_per_scene_durations_and_cache():
+    """Durations line up with the stitched track; one edited scene = one synthesis"""
+    print("\n🧪 Test 2: Voiceover Stage")
+    try:
+        find_ffmpeg()
+    except RuntimeError:
+        print("⚠️  ffmpeg not installed - skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = CountingEngine()
+        texts = ["one two three four five six seven eight nine ten", "short", "a b c d e f g h i j k l m n o"]
+        voice = synthesize_voiceover(texts, Path(tmp) / "voice.m4a", engine=engine,
+                                     cache_dir=Path(tmp) / "cache", pause=0.25)
+        assert voice["cached"] == 0 and len(engine.texts) == 3
+        assert all(abs(d - want) < 0.05 for d, want in zip(voice["durations"], [2.25, 1.25, 3.25]))
+        assert abs(probe_duration(voice["path"]) - voice["total"]) < 0.15
+
+        texts[1] = "a slightly longer second scene"
+        again = synthesize_voiceover(texts, Path(tmp) / "voice.m4a", engine=engine,
+                                     cache_dir=Path(tmp) / "cache", pause=0.25)
+        assert again["cached"] == 2 and engine.texts[3:] == [texts[1]]
+        assert again["durations"][0] == voice["durations"][0]
+    print("✅ Test 2 PASSED\n")
+
+
+def test_key_covers_engine_settings():
+    """Speed / slow / pacing changes miss the cache instead of returning stale audio"""
+    print("\n🧪 Test 3: Engine Settings")
+    key = lambda engine: tts_key(engine.name, engine.cache_params(), "ar", "مرحبا")
+    assert key(GTTSEngine()) == key(GTTSEngine()) != key(GTTSEngine(slow=True))
+    assert key(EspeakEngine(speed=150)) != key(EspeakEngine(speed=120))
+    assert key(SilentEngine()) != key(SilentEngine(min_secs=2.0))
+
+    class FakeEspeak(EspeakEngine):
+        calls = []
+
+        def synthesize(self, text, lang, out_path):
+            self.calls.append(self.speed)
+            out_path.write_bytes(f"{self.speed}".encode())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first, hit = synthesize_segment("مرحبا", "ar", FakeEspeak(speed=150), tmp)
+        assert not hit
+        assert synthesize_segment("مرحبا", "ar", FakeEspeak(speed=150), tmp) == (first, True)
+        slower, hit = synthesize_segment("مرحبا", "ar", FakeEspeak(speed=120), tmp)
+        assert not hit and slower.read_bytes() == b"120"
+        assert FakeEspeak.calls == [150, 120]
+    print("✅ Test 3 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Voiceover Tests")
+    print("="*70)
+
+    test_key_covers_engine_voice_language_text()
+    test_per_scene_durations_and_cache()
+    test_key_covers_engine_settings()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
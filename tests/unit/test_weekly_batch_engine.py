@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+tests/unit/test_weekly_batch_engine.py
+--------------------------------------
+Tests for weekly_batch_engine.py: chunked pool run, JSONL output, checkpoint/resume.
+"""
+
+import csv
+import json
+import multiprocessing
+import sys
+import tempfile
+import types
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import pytest
+
+
+def _layer_stubs() -> dict:
+    """Minimal src.* layer modules: the batch mechanics are under test, not the analysis"""
+    def layer(label):
+        return lambda doc: [label] if "team" in doc else []
+
+    modules = {name: types.ModuleType(name) for name in (
+        "src", "src.analysis", "src.utils",
+        "src.analysis.analysis_layers_1_40", "src.analysis.analysis_layers_41_80",
+        "src.analysis.analysis_layers_81_100", "src.analysis.analysis_layers_101_141",
+        "src.analysis.layer_z_engine", "src.utils.chat_personality",
+    )}
+    for span in ("1_40", "41_80", "81_100", "101_141"):
+        setattr(modules[f"src.analysis.analysis_layers_{span}"], f"apply_layers_{span}", layer(f"trait_{span}"))
+    modules["src.analysis.layer_z_engine"].analyze_silent_drivers_combined = lambda doc: {"calm": "هدوء" in doc}
+    modules["src.utils.chat_personality"].get_chat_personality = lambda: {}
+    return modules
+
+
+try:
+    import weekly_batch_engine as engine
+    STUBBED = False
+except ImportError:
+    # The analysis layers (src/) are not part of this tree: import against stubs.
+    # Forked pool workers inherit the imported module, so the stubs need not stay installed.
+    sys.modules.pop("weekly_batch_engine", None)
+    with mock.patch.dict(sys.modules, _layer_stubs()):
+        import weekly_batch_engine as engine
+    sys.modules["weekly_batch_engine"] = engine  # pool.map pickles analyze_user by module name
+    STUBBED = True
+
+
+def _require_workers():
+    if STUBBED and multiprocessing.get_start_method() != "fork":
+        pytest.skip("stubbed analysis layers need fork-started pool workers")
+
+
+def _write_sessions(path: Path, start: int, count: int) -> None:
+    new_file = not path.exists()
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["user_id", "q1", "q2", "custom_input"])
+        if new_file:
+            writer.writeheader()
+        for i in range(start, start + count):
+            writer.writerow({"user_id": f"u{i:03d}", "q1": "أحب الهدوء", "q2": "team sports",
+                             "custom_input": f"session {i}"})
+
+
+def _output_ids(root: Path):
+    with open(root / "weekly_analysis.jsonl", encoding="utf-8") as f:
+        return [json.loads(line)["user_id"] for line in f]
+
+
+@contextmanager
+def temp_batch():
+    """Point weekly_batch_engine at a temporary directory"""
+    names = ("CSV_PATH", "OUTPUT_PATH", "CHECKPOINT_PATH", "AGGREGATES_PATH", "_write_json")
+    saved = {name: getattr(engine, name) for name in names}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        engine.CSV_PATH = str(root / "user_sessions.csv")
+        engine.OUTPUT_PATH = str(root / "weekly_analysis.jsonl")
+        engine.CHECKPOINT_PATH = str(root / "weekly_analysis.checkpoint.json")
+        engine.AGGREGATES_PATH = str(root / "weekly_aggregates.json")
+        try:
+            yield root
+        finally:
+            for name, value in saved.items():
+                setattr(engine, name, value)
+
+
+def test_interrupted_run_resumes_without_duplicates():
+    """A crash between a chunk's output and its checkpoint loses and duplicates nothing"""
+    print("\n🧪 Test 1: Interrupt + Resume")
+    _require_workers()
+    with temp_batch() as root:
+        _write_sessions(root / "user_sessions.csv", 0, 25)
+        write_json, calls = engine._write_json, []
+
+        def crash_on_second_checkpoint(path, data):
+            calls.append(path)
+            if len(calls) == 2:
+                raise KeyboardInterrupt("killed")
+            write_json(path, data)
+        engine._write_json = crash_on_second_checkpoint
+
+        try:
+            engine.run_batch_analysis(chunk_size=10, workers=2)
+            raise AssertionError("expected the run to be interrupted")
+        except KeyboardInterrupt:
+            pass
+        # chunk 2 reached the JSONL but not the checkpoint
+        assert len(_output_ids(root)) == 20
+        assert engine.load_checkpoint()["rows_done"] == 10
+
+        engine._write_json = write_json
+        aggregates = engine.run_batch_analysis(chunk_size=10, workers=2)
+        ids = _output_ids(root)
+        assert sorted(ids) == [f"u{i:03d}" for i in range(25)]
+        assert aggregates["users_analyzed"] == 25
+        if STUBBED:
+            assert aggregates["trait_counts"]["traits_1_40"] == {"trait_1_40": 25}
+        assert engine.load_checkpoint()["output_bytes"] == (root / "weekly_analysis.jsonl").stat().st_size
+    print("✅ Test 1 PASSED\n")
+
+
+def test_incremental_and_full_runs():
+    """Weekly runs only analyze new sessions; --full starts over"""
+    print("\n🧪 Test 2: Incremental Runs")
+    _require_workers()
+    with temp_batch() as root:
+        _write_sessions(root / "user_sessions.csv", 0, 12)
+        assert engine.run_batch_analysis(chunk_size=5, workers=2)["users_analyzed"] == 12
+        assert engine.run_batch_analysis(chunk_size=5, workers=2)["runs"][-1]["analyzed"] == 0
+
+        _write_sessions(root / "user_sessions.csv", 12, 7)
+        aggregates = engine.run_batch_analysis(chunk_size=5, workers=2)
+        assert aggregates["runs"][-1]["analyzed"] == 7 and aggregates["users_analyzed"] == 19
+        assert sorted(_output_ids(root)) == [f"u{i:03d}" for i in range(19)]
+        assert json.loads((root / "weekly_aggregates.json").read_text(encoding="utf-8")) == aggregates
+
+        aggregates = engine.run_batch_analysis(full=True, chunk_size=5, workers=2)
+        assert aggregates["users_analyzed"] == 19 and len(aggregates["runs"]) == 1
+        assert sorted(_output_ids(root)) == [f"u{i:03d}" for i in range(19)]
+    print("✅ Test 2 PASSED\n")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print("🚀 Weekly Batch Engine Tests")
+    print("="*70)
+
+    test_interrupted_run_resumes_without_duplicates()
+    test_incremental_and_full_runs()
+
+    print("="*70)
+    print("✅ ALL TESTS PASSED!")
+    print("="*70 + "\n")
@@ -1,7 +1,28 @@
+"""
+SportSync AI - Weekly Batch Engine
+Incremental analysis of data/user_sessions.csv
+
+- The CSV is streamed in chunks; each chunk is analyzed across a process pool.
+- Results are appended to data/weekly_analysis.jsonl (one user per line).
+- A checkpoint records the rows already analyzed (and the JSONL size at that
+  point), so each weekly run only analyzes sessions added since the last one
+  and an interrupted run resumes without duplicating output.
+- Running aggregates (users analyzed, trait frequencies) are saved in the
+  checkpoint after every chunk and published to data/weekly_aggregates.json.
+
+USAGE:
+    python weekly_batch_engine.py            # incremental
+    python weekly_batch_engine.py --full     # re-analyze everything
+"""
+
 import os
 import csv
 import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterator, List
 
 from src.analysis.analysis_layers_1_40 import apply_layers_1_40
 from src.analysis.analysis_layers_41_80 import apply_layers_41_80
@@ -14,14 +35,62 @@ from src.utils.chat_personality import get_chat_personality
 BASE_PERSONALITY = get_chat_personality()
 
 CSV_PATH = "data/user_sessions.csv"
-OUTPUT_PATH = "data/weekly_analysis.json"
+OUTPUT_PATH = "data/weekly_analysis.jsonl"
+CHECKPOINT_PATH = "data/weekly_analysis.checkpoint.json"
+AGGREGATES_PATH = "data/weekly_aggregates.json"
+CHUNK_SIZE = 500
 
-def read_user_sessions():
+TRAIT_GROUPS = ("traits_1_40", "traits_41_80", "traits_81_100", "traits_101_141", "silent_drivers")
+
+# ═══════════════════════════════════════════════════════════════
+# STATE FILES
+# ═══════════════════════════════════════════════════════════════
+
+def _read_json(path: str, default: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def load_checkpoint() -> Dict[str, Any]:
+    """Rows done, JSONL size and the aggregates at that point (one atomic file)"""
+    return _read_json(CHECKPOINT_PATH, {
+        "rows_done": 0,
+        "output_bytes": 0,
+        "updated_at": None,
+        "aggregates": {"users_analyzed": 0, "trait_counts": {}, "runs": []}
+    })
+
+# ═══════════════════════════════════════════════════════════════
+# INPUT
+# ═══════════════════════════════════════════════════════════════
+
+def iter_session_chunks(start_row: int = 0, chunk_size: int = CHUNK_SIZE) -> Iterator[List[Dict[str, str]]]:
+    """Stream CSV rows from start_row in lists of chunk_size"""
     if not os.path.exists(CSV_PATH):
-        return []
-    with open(CSV_PATH, mode="r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return list(reader)
+        return
+    with open(CSV_PATH, mode="r", encoding="utf-8", newline="") as f:
+        reader = islice(csv.DictReader(f), start_row, None)
+        while True:
+            chunk = list(islice(reader, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+def read_user_sessions():
+    """All sessions at once (small files / interactive use)"""
+    return [user for chunk in iter_session_chunks() for user in chunk]
+
+# ═══════════════════════════════════════════════════════════════
+# ANALYSIS
+# ═══════════════════════════════════════════════════════════════
 
 def analyze_user(user):
     full_text = ' '.join(str(user.get(f"q{i+1}", "")) for i in range(20)) + ' ' + str(user.get("custom_input", ""))
@@ -39,13 +108,69 @@ def analyze_user(user):
         "timestamp": datetime.utcnow().isoformat()
     }
 
-def run_batch_analysis():
-    sessions = read_user_sessions()
-    all_results = [analyze_user(user) for user in sessions]
+def _trait_names(value: Any) -> List[str]:
+    """Trait labels from a layer result (list of labels or {label: truthy})"""
+    if isinstance(value, dict):
+        return [str(k) for k, v in value.items() if v]
+    if isinstance(value, (list, tuple, set)):
+        return [str(v) for v in value if isinstance(v, (str, int, float))]
+    if isinstance(value, str) and value:
+        return [value]
+    return []
+
+def merge_into_aggregates(aggregates: Dict[str, Any], result: Dict[str, Any]) -> None:
+    aggregates["users_analyzed"] += 1
+    for group in TRAIT_GROUPS:
+        counts = aggregates["trait_counts"].setdefault(group, {})
+        for trait in _trait_names(result["analysis"].get(group)):
+            counts[trait] = counts.get(trait, 0) + 1
+
+# ═══════════════════════════════════════════════════════════════
+# BATCH RUN
+# ═══════════════════════════════════════════════════════════════
+
+def run_batch_analysis(full: bool = False, chunk_size: int = CHUNK_SIZE, workers: int = None) -> Dict[str, Any]:
+    """Analyze sessions added since the last checkpoint (everything when full=True)"""
     os.makedirs("data", exist_ok=True)
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(all_results, f, ensure_ascii=False, indent=2)
-    print(f"✅ تم حفظ تحليل {len(all_results)} مستخدم في {OUTPUT_PATH}")
+    if full:
+        for path in (OUTPUT_PATH, CHECKPOINT_PATH, AGGREGATES_PATH):
+            if os.path.exists(path):
+                os.remove(path)
+
+    checkpoint = load_checkpoint()
+    aggregates = checkpoint["aggregates"]
+
+    # Drop output written after the last checkpoint (interrupted run)
+    if os.path.exists(OUTPUT_PATH) and os.path.getsize(OUTPUT_PATH) > checkpoint["output_bytes"]:
+        with open(OUTPUT_PATH, "r+b") as f:
+            f.truncate(checkpoint["output_bytes"])
+
+    workers = workers or os.cpu_count() or 1
+    analyzed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(OUTPUT_PATH, "ab") as out:
+        for chunk in iter_session_chunks(checkpoint["rows_done"], chunk_size):
+            for result in pool.map(analyze_user, chunk, chunksize=max(1, len(chunk) // (workers * 4))):
+                out.write((json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8"))
+                merge_into_aggregates(aggregates, result)
+            out.flush()
+            os.fsync(out.fileno())
+
+            analyzed += len(chunk)
+            checkpoint = {
+                "rows_done": checkpoint["rows_done"] + len(chunk),
+                "output_bytes": out.tell(),
+                "updated_at": datetime.utcnow().isoformat(),
+                "aggregates": aggregates
+            }
+            _write_json(CHECKPOINT_PATH, checkpoint)
+            print(f"✓ {checkpoint['rows_done']} sessions analyzed")
+
+    aggregates["runs"] = (aggregates["runs"] + [{"run_at": datetime.utcnow().isoformat(), "analyzed": analyzed}])[-52:]
+    checkpoint["aggregates"] = aggregates
+    _write_json(CHECKPOINT_PATH, checkpoint)
+    _write_json(AGGREGATES_PATH, aggregates)
+    print(f"✅ تم حفظ تحليل {analyzed} مستخدم جديد في {OUTPUT_PATH} (الإجمالي {aggregates['users_analyzed']})")
+    return aggregates
 
-if _name_ == "_main_":
-    run_batch_analysis()
\ No newline at end of file
+if __name__ == "__main__":
+    run_batch_analysis(full="--full" in sys.argv[1:])